@@ -1,17 +1,43 @@
+import asyncio
 import logging
+import os
+from collections.abc import AsyncIterable
 from pathlib import Path
+from typing import Any
 
-from dotenv import load_dotenv
-from livekit.agents import (
-    Agent,
-    AgentServer,
-    AgentSession,
-    JobContext,
-    JobProcess,
-    cli,
-)
-from livekit.plugins import groq, silero
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from startup_profile import StartupProfiler
+
+# prometheus_client picks single- or multi-process metric storage when it is first
+# imported, so the directory has to be set before livekit.agents (and voice_metrics)
+# import it; AgentServer would only set it in run(). Job processes inherit it.
+PROMETHEUS_MULTIPROC_DIR = str(Path.home() / ".cache" / "livekit" / "prometheus")
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = PROMETHEUS_MULTIPROC_DIR
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# Cold-start breakdown (imports, model loads, warm-up) — logged at the end of prewarm
+startup_profile = StartupProfiler()
+
+with startup_profile.stage("import livekit.agents"):
+    from dotenv import load_dotenv
+    from livekit import rtc
+    from livekit.agents import (
+        Agent,
+        AgentServer,
+        AgentSession,
+        JobContext,
+        JobProcess,
+        ModelSettings,
+        cli,
+        llm,
+    )
+with startup_profile.stage("import livekit.plugins.groq"):
+    from livekit.plugins import groq
+with startup_profile.stage("import livekit.plugins.silero"):
+    from livekit.plugins import silero
+with startup_profile.stage("import turn_detector"):
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from piper_voices import VoiceOptions
+from worker_load import WorkerLoad
 
 logger = logging.getLogger("agent")
 
@@ -27,18 +53,106 @@ FALSE_INTERRUPTION_TIMEOUT  = 2.0    # 2s wait karo — false interrupt confirm
 RESUME_FALSE_INTERRUPTION   = True   # galat interrupt hua to agent resume kare
 DISCARD_UNINTERRUPTIBLE     = True
 
+# ── Piper PCM cache (greeting + common phrases synthesize once per host) ──
+PCM_CACHE_DIR               = Path.home() / ".cache" / "livekit" / "piper" / "pcm-cache"
+PCM_CACHE_MEMORY_BYTES      = 32 * 1024 * 1024
+PCM_CACHE_DISK_BYTES        = 512 * 1024 * 1024
+PIPER_LOOKAHEAD_CHUNKS      = 2      # chunks synthesizing ahead of the one being played
+PIPER_OUTPUT_SAMPLE_RATE    = 48000  # resample once in the plugin to the room's rate
+PIPER_FRAME_SIZE_MS         = 20     # fixed 20ms frames (10 also works)
+PIPER_TEXT_FRONTEND         = True   # speakable numbers/dates/phone numbers + phoneme-id cache
+
+# ── Piper voices per language: each reply goes to the voice of the language it is in ──
+PIPER_MODEL_DIR             = Path.home() / ".cache" / "livekit" / "piper"
+PIPER_LANGUAGE              = "de"   # default voice (greeting, fillers, unclear replies)
+PIPER_VOICES                = {      # download with src/download_piper_models.py <voice>
+    "de": "de_DE-thorsten-medium",
+    "en": "en_US-lessac-medium",
+    "fr": "fr_FR-siwis-medium",
+}
+PIPER_VOICE_RSS_BUDGET      = 1536 * 1024 * 1024  # process RSS; idle voices unloaded LRU above it
+
+# ── Piper inference executor (dedicated pool, first chunk of a reply runs first) ──
+# LiveKit runs every call in its own job process, so each process gets its share of the
+# host, not all of it: calls x workers x intra-op threads ~= cores
+CALLS_PER_HOST              = 4      # concurrent calls this host is sized for
+PIPER_THREADS_PER_CALL      = max(1, (os.cpu_count() or 2) // CALLS_PER_HOST)
+TTS_INFERENCE_WORKERS       = max(1, PIPER_THREADS_PER_CALL // 2)
+PIPER_VOICE_OPTIONS         = VoiceOptions(
+    intra_op_threads=min(2, PIPER_THREADS_PER_CALL),   # per inference call
+    inter_op_threads=1,
+    precision="fp32",     # "optimized" / "int8": compare with src/piper_optimize.py first
+)
+# Cross-session micro-batching of Piper runs (0 = off). Measure with
+# src/bench_piper_batching.py first — it trades first-byte latency for throughput.
+PIPER_BATCH_WINDOW_MS       = 0.0
+PIPER_BATCH_MAX_SIZE        = 8
+# Shared TTS server: one Piper model per host, serving every job process over a Unix
+# socket (src/piper_server.py). None = synthesize in-process. Falls back to in-process
+# synthesis whenever the server is unreachable.
+PIPER_SERVER_SOCKET: str | None = None
+# the server is one process for every call on the host: workers x threads ~= cores
+TTS_SERVER_WORKERS          = max(1, (os.cpu_count() or 2) // PIPER_VOICE_OPTIONS.intra_op_threads)
+
+# ── Warm-up in prewarm: first ONNX runs pay graph init + arena growth, not the first caller ──
+WARMUP_PASSES               = 2      # Piper and VAD warm-up runs (0 = off)
+WARMUP_TEXTS                = ("Grüezi.", "Hallo! Wie kann ich Ihnen helfen?")
+
+# ── Fillers (src/piper_fillers.py): prerendered in prewarm, played while the LLM is slow ──
+FILLER_PHRASES              = ("Moment bitte.", "Gern, ich luege das grad noche.", "Sekunde, bitte.")
+FILLER_AFTER_S              = 0.7    # LLM first token later than this = play a filler (None = off)
+
+# ── LLM response cache (src/llm_cache.py): repeated questions skip the Groq round-trip ──
+LLM_RESPONSE_CACHE          = False  # opt-in: replies are reused verbatim across calls
+                                     # (caller's first turn only: later replies may be personal)
+LLM_CACHE_DIR               = Path.home() / ".cache" / "livekit" / "llm-cache"  # shared by jobs
+LLM_CACHE_TTL_S             = 24 * 3600.0
+LLM_CACHE_MAX_ENTRIES       = 512    # per process; the directory keeps up to 10'000
+LLM_CACHE_CONTEXT_MESSAGES  = 1      # messages before the transcript that are part of the key
+
+# ── Chat context budget (src/context_compaction.py): long calls don't grow the prompt ──
+LLM_MODEL                   = "llama-3.1-8b-instant"
+CONTEXT_BUDGET_TOKENS       = 2000   # per LLM request, instructions included (None = off)
+CONTEXT_KEEP_TURNS          = 4      # caller turns kept verbatim; older ones are summarised
+
+# ── Metrics (per-turn stage latencies + TTS chunk timings, src/voice_metrics.py) ──
+PROMETHEUS_PORT             = 9464   # worker serves /metrics here (None = off)
+# PROMETHEUS_MULTIPROC_DIR is set at the top of this file, before prometheus_client is imported
+TURN_LOG_DIR                = Path.home() / ".cache" / "livekit" / "turns"  # rotating JSONL
+
+# ── Call records (src/call_recorder.py): transcript + optional audio per call, written off-loop ──
+CALL_RECORD_DIR: Path | None = Path.home() / ".cache" / "livekit" / "calls"  # None = off
+CALL_RECORD_AUDIO           = False  # also caller and agent PCM (gzip, ~1 MB per minute)
+
+# ── Worker load (src/worker_load.py): max of CPU, Piper queue backlog and synthesis RTF ──
+LOAD_STATUS_DIR             = str(Path.home() / ".cache" / "livekit" / "load")
+WORKER_LOAD_THRESHOLD       = 0.75   # stop accepting calls above this (must be < 1 in prod)
+
+
+def get_piper_voice_paths() -> dict[str, str]:
+    """Language -> model path of the PIPER_VOICES that are downloaded; loaded on first use."""
+    paths = {lang: PIPER_MODEL_DIR / f"{name}.onnx" for lang, name in PIPER_VOICES.items()}
+    return {lang: str(path) for lang, path in paths.items() if path.exists()}
+
 
 def get_piper_model_path() -> str | None:
-    model_path = Path.home() / ".cache" / "livekit" / "piper" / "de_DE-thorsten-medium.onnx"
-    if model_path.exists():
-        return str(model_path)
-    return None
+    return get_piper_voice_paths().get(PIPER_LANGUAGE)
 
 
 class Assistant(Agent):
     """Agent — settings dono jagah set hain: Agent + AgentSession (working agent pattern)."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        fillers: Any = None,
+        response_cache: Any = None,
+        compactor: Any = None,
+        recorder: Any = None,
+    ) -> None:
+        self._fillers = fillers  # FillerBank; None = silence until the first reply audio
+        self._recorder = recorder  # CallRecorder; its audio tracks are teed in stt/tts_node
+        self._response_cache = response_cache  # llm_cache.ResponseCache; None = always ask the LLM
+        self._compactor = compactor  # ContextCompactor; None = send the whole chat context
         super().__init__(
             instructions="""Du bisch en fründliche und professionelle KI-Sprachassistent für Telefongespräche.
                             Du redsch immer Schwiizerdütsch – egal ob dr Aarufer Hochdütsch, Schwiizerdütsch oder Änglisch redt.
@@ -67,24 +181,186 @@ class Assistant(Agent):
         """Agent room join karte hi pehle khud greeting de."""
         await self.session.say("Hallo! Wie kann ich Ihnen helfen?")
 
+    def llm_node(
+        self, chat_ctx: llm.ChatContext, tools: list[llm.Tool], model_settings: ModelSettings
+    ) -> Any:
+        """Default LLM on the budgeted context; a cached reply is served instead when the
+        question was asked before."""
+        if self._compactor is not None:
+            chat_ctx = self._compactor.compact(chat_ctx)
+        if self._response_cache is None:
+            return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+        return self._response_cache.respond(
+            chat_ctx,
+            self.instructions,
+            lambda: Agent.default.llm_node(self, chat_ctx, tools, model_settings),
+        )
 
-server = AgentServer()
+    def stt_node(self, audio: AsyncIterable[rtc.AudioFrame], model_settings: ModelSettings) -> Any:
+        """Default STT; the caller's audio is recorded on the way in when enabled."""
+        if self._recorder is not None and self._recorder.records_audio:
+            audio = self._recorder.tee(audio, "caller")
+        return Agent.default.stt_node(self, audio, model_settings)
+
+    def tts_node(
+        self, text: AsyncIterable[str], model_settings: ModelSettings
+    ) -> AsyncIterable[rtc.AudioFrame]:
+        """Default TTS; a prerendered filler plays first if the LLM is slow to start."""
+        if self._fillers is None or FILLER_AFTER_S is None:
+            frames = Agent.default.tts_node(self, text, model_settings)
+        else:
+            frames = self._fillers.mask_latency(
+                text,
+                lambda t: Agent.default.tts_node(self, t, model_settings),
+                after_s=FILLER_AFTER_S,
+            )
+        if self._recorder is not None and self._recorder.records_audio:
+            frames = self._recorder.tee(frames, "agent")
+        return frames
+
+
+def build_piper_tts(model_path: str, userdata: dict[str, Any], **overrides: Any):
+    """Piper TTS configured as every call uses it (src/loadtest_agent.py builds the same)."""
+    from piper_tts_plugin import create_piper_tts
+    options: dict[str, Any] = {
+        "cache": userdata.get("pcm_cache"),
+        "lookahead": PIPER_LOOKAHEAD_CHUNKS,
+        "sample_rate": PIPER_OUTPUT_SAMPLE_RATE,
+        "frame_size_ms": PIPER_FRAME_SIZE_MS,
+        "voice_options": PIPER_VOICE_OPTIONS,
+        "executor": userdata.get("tts_executor"),
+        "batching": userdata.get("tts_batching"),
+        "server_socket": PIPER_SERVER_SOCKET,
+        "text_frontend": PIPER_TEXT_FRONTEND,
+        "language": PIPER_LANGUAGE,
+        "voices": get_piper_voice_paths(),
+    }
+    options.update(overrides)
+    return create_piper_tts(model_path=model_path, config_path=model_path + ".json", **options)
+
+
+def build_session(*, stt: Any, llm: Any, tts: Any, vad: Any, turn_detection: Any) -> AgentSession:
+    """AgentSession with the call settings above; the models are the caller's choice."""
+    return AgentSession(
+        stt=stt,
+        llm=llm,
+        tts=tts,
+        vad=vad,
+        turn_detection=turn_detection,
+        preemptive_generation=True,
+        # Turn detection
+        min_endpointing_delay=MIN_ENDPOINTING_DELAY,
+        max_endpointing_delay=MAX_ENDPOINTING_DELAY,
+        # Interruption — realistic barge-in
+        allow_interruptions=ALLOW_INTERRUPTIONS,
+        min_interruption_duration=MIN_INTERRUPTION_DURATION,
+        min_interruption_words=MIN_INTERRUPTION_WORDS,
+        false_interruption_timeout=FALSE_INTERRUPTION_TIMEOUT,
+        resume_false_interruption=RESUME_FALSE_INTERRUPTION,
+        discard_audio_if_uninterruptible=DISCARD_UNINTERRUPTIBLE,
+    )
+
+
+server = AgentServer(
+    prometheus_port=PROMETHEUS_PORT,
+    prometheus_multiproc_dir=PROMETHEUS_MULTIPROC_DIR,  # aggregate all job processes
+    load_fnc=WorkerLoad(LOAD_STATUS_DIR),
+    load_threshold=WORKER_LOAD_THRESHOLD,
+)
 
 
 def prewarm(proc: JobProcess):
     # VAD — Silero defaults use karo (None = override mat karo)
     # Working agent ne yahi kiya tha — custom values se better results
-    proc.userdata["vad"] = silero.VAD.load()
+    with startup_profile.stage("load silero vad"):
+        proc.userdata["vad"] = silero.VAD.load()
+    if WARMUP_PASSES:
+        from startup_profile import warm_up_vad
+        with startup_profile.stage("warm-up silero vad"):
+            warm_up_vad(proc.userdata["vad"], WARMUP_PASSES)
+
+    from voice_metrics import JsonlSink
+    proc.userdata["turn_log"] = JsonlSink(TURN_LOG_DIR)
+
+    from piper_cache import PCMCache
+    from piper_executor import InferenceExecutor
+    workers = TTS_INFERENCE_WORKERS
+    if PIPER_BATCH_WINDOW_MS > 0:
+        workers = max(workers, PIPER_BATCH_MAX_SIZE)  # callers block in the batch, not on CPU
+    proc.userdata["tts_executor"] = InferenceExecutor(workers)
+    from worker_load import LoadReporter
+    proc.userdata["load_reporter"] = LoadReporter(
+        LOAD_STATUS_DIR, proc.userdata["tts_executor"]
+    ).start()
+    proc.userdata["pcm_cache"] = PCMCache(
+        max_memory_bytes=PCM_CACHE_MEMORY_BYTES,
+        disk_dir=PCM_CACHE_DIR,
+        max_disk_bytes=PCM_CACHE_DISK_BYTES,
+    )
+
+    if LLM_RESPONSE_CACHE:
+        from llm_cache import ResponseCache
+        proc.userdata["llm_cache"] = ResponseCache(
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+            ttl_s=LLM_CACHE_TTL_S,
+            context_messages=LLM_CACHE_CONTEXT_MESSAGES,
+            disk_dir=LLM_CACHE_DIR,
+        )
 
     model_path = get_piper_model_path()
+    server_ready = False
     if model_path:
+        # every process loads the other languages' voices itself, on first use
+        from piper_voices import voice_registry
+        voice_registry.max_rss_bytes = PIPER_VOICE_RSS_BUDGET
+    if model_path and PIPER_SERVER_SOCKET:
+        from piper_server import ensure_server_running
+        with startup_profile.stage("start piper server"):
+            server_ready = ensure_server_running(
+                PIPER_SERVER_SOCKET,
+                model_path,
+                workers=TTS_SERVER_WORKERS,
+                intra_op_threads=PIPER_VOICE_OPTIONS.intra_op_threads,
+                precision=PIPER_VOICE_OPTIONS.precision,
+                load_dir=LOAD_STATUS_DIR,
+            )
+        if server_ready:
+            logger.info("Piper TTS server ready")  # model lives there; fallback loads on demand
+    if model_path and not server_ready:
         try:
-            from piper import PiperVoice
-            proc.userdata["piper_voice"] = PiperVoice.load(model_path)
+            # Seed the process-wide registry — every session's PiperTTS resolves this instance
+            from piper_voices import voice_registry, warm_up_voice
+            with startup_profile.stage("import piper"):
+                import piper  # noqa: F401
+            with startup_profile.stage("load piper voice"):
+                voice = voice_registry.preload(model_path, PIPER_VOICE_OPTIONS)
+            proc.userdata["piper_voice"] = voice
+            if WARMUP_PASSES:
+                with startup_profile.stage("warm-up piper"):
+                    passes = warm_up_voice(
+                        voice, WARMUP_TEXTS, passes=WARMUP_PASSES, text_frontend=PIPER_TEXT_FRONTEND
+                    )
+                logger.info("Piper warm-up passes: %s", ", ".join(f"{p:.2f}s" for p in passes))
+            if PIPER_BATCH_WINDOW_MS > 0:
+                from piper_batching import BatchingEngine
+                proc.userdata["tts_batching"] = BatchingEngine(
+                    voice, window_ms=PIPER_BATCH_WINDOW_MS, max_batch=PIPER_BATCH_MAX_SIZE
+                )
             logger.info("Piper TTS pre-loaded")
+            if FILLER_AFTER_S is not None:
+                from piper_fillers import FillerBank
+                with startup_profile.stage("render fillers"):
+                    proc.userdata["fillers"] = FillerBank.render(
+                        voice,
+                        FILLER_PHRASES,
+                        sample_rate=PIPER_OUTPUT_SAMPLE_RATE,
+                        frame_size_ms=PIPER_FRAME_SIZE_MS,
+                    )
         except Exception as e:
             logger.warning(f"Failed to pre-load Piper TTS: {e}")
 
+    startup_profile.log()
+
 
 server.setup_fnc = prewarm
 
@@ -98,49 +374,85 @@ async def my_agent(ctx: JobContext):
 
     if piper_model_path:
         logger.info(f"Using Piper TTS: {piper_model_path}")
-        from piper_tts_plugin import create_piper_tts
-        tts_plugin = create_piper_tts(
-            model_path=piper_model_path,
-            config_path=piper_model_path + ".json",
-        )
+        tts_plugin = build_piper_tts(piper_model_path, ctx.proc.userdata)
+        ctx.add_shutdown_callback(tts_plugin.aclose)  # drop this session's voice reference
+
+        async def _log_chunk_sizing() -> None:
+            logger.info("Piper chunk sizing: %s", tts_plugin.chunk_metrics())
+
+        ctx.add_shutdown_callback(_log_chunk_sizing)
     else:
         logger.warning("Piper TTS not found, using Groq TTS")
         tts_plugin = groq.TTS(model="aura-2-zeus-en")
 
-    session = AgentSession(
+    session = build_session(
         stt=groq.STT(model="whisper-large-v3-turbo"),  # no language = auto-detect (English + Swiss German)
-        llm=groq.LLM(model="llama-3.1-8b-instant"),
+        llm=groq.LLM(model=LLM_MODEL),
         tts=tts_plugin,
         vad=vad,
         turn_detection=MultilingualModel(),
-        preemptive_generation=True,
-        # Turn detection
-        min_endpointing_delay=MIN_ENDPOINTING_DELAY,
-        max_endpointing_delay=MAX_ENDPOINTING_DELAY,
-        # Interruption — realistic barge-in
-        allow_interruptions=ALLOW_INTERRUPTIONS,
-        min_interruption_duration=MIN_INTERRUPTION_DURATION,
-        min_interruption_words=MIN_INTERRUPTION_WORDS,
-        false_interruption_timeout=FALSE_INTERRUPTION_TIMEOUT,
-        resume_false_interruption=RESUME_FALSE_INTERRUPTION,
-        discard_audio_if_uninterruptible=DISCARD_UNINTERRUPTIBLE,
     )
 
-    @session.on("user_input_transcribed")
-    def on_stt(event):
-        if event.is_final:
-            print(f"\n🎤 USER: {event.transcript}")
+    # Transcripts are logged and per-turn stage timings recorded (Prometheus + JSONL)
+    from voice_metrics import SessionMetrics
+    session_metrics = SessionMetrics(
+        session, sink=ctx.proc.userdata.get("turn_log"), room=ctx.room.name
+    )
+    session_metrics.attach()
+
+    async def _flush_metrics() -> None:
+        session_metrics.flush()
+
+    ctx.add_shutdown_callback(_flush_metrics)
+
+    compactor = None
+    if CONTEXT_BUDGET_TOKENS is not None:
+        from context_compaction import ContextCompactor, llm_summarizer
+        # own LLM instance: summary requests stay out of the session's per-turn metrics
+        compactor = ContextCompactor(
+            llm_summarizer(groq.LLM(model=LLM_MODEL)),
+            budget_tokens=CONTEXT_BUDGET_TOKENS,
+            keep_turns=CONTEXT_KEEP_TURNS,
+        )
+        compactor.attach(session)
+        ctx.add_shutdown_callback(compactor.aclose)
+
+    recorder = None
+    if CALL_RECORD_DIR is not None:
+        from call_recorder import CallRecorder
+        recorder = CallRecorder(CALL_RECORD_DIR, ctx.room.name, audio=CALL_RECORD_AUDIO)
+        recorder.attach(session)
+
+        async def _close_recorder() -> None:
+            await asyncio.to_thread(recorder.close)
+            logger.info("Call record %s: %s", recorder.path, recorder.stats)
+
+        ctx.add_shutdown_callback(_close_recorder)
+
+    load_reporter = ctx.proc.userdata.get("load_reporter")
+    if load_reporter is not None:
+
+        async def _close_load_reporter() -> None:
+            # one job per process: its end is the process's, so stop reporting its load
+            await asyncio.to_thread(load_reporter.close)
+
+        ctx.add_shutdown_callback(_close_load_reporter)
+
+    response_cache = ctx.proc.userdata.get("llm_cache")
+    if response_cache is not None:
+
+        async def _log_response_cache() -> None:
+            logger.info("LLM response cache: %s", response_cache.stats().as_dict())
 
-    @session.on("conversation_item_added")
-    def on_llm(event):
-        item = event.item
-        if hasattr(item, "role") and item.role == "assistant":
-            text = item.text_content
-            if text:
-                print(f"🤖 AGENT: {text}")
+        ctx.add_shutdown_callback(_log_response_cache)
 
     await session.start(
-        agent=Assistant(),
+        agent=Assistant(
+            fillers=ctx.proc.userdata.get("fillers") if piper_model_path else None,
+            response_cache=response_cache,
+            compactor=compactor,
+            recorder=recorder,
+        ),
         room=ctx.room,
     )
 
@@ -0,0 +1,126 @@
+"""
+Throughput / first-byte benchmark for cross-session batching of Piper inference.
+Usage:
+    uv run python src/bench_piper_batching.py [--sessions 12] [--windows 0,2,4,8]
+    uv run python src/bench_piper_batching.py --model ~/.cache/livekit/piper/de_DE-thorsten-medium.onnx
+
+Without --model a FakePiperVoice is used, with inference limited to --cores concurrent
+runs to model CPU contention and --batch-cost as the relative cost of each extra batch
+row; the fake numbers only show the shape of the trade-off, use --model for real ones.
+Window 0 = no batching (one run per sentence).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from typing import Any
+
+from bench_piper_pcm import CHUNKS
+from fake_piper_voice import FakePiperVoice
+from piper_batching import BatchingEngine, synthesize_batched
+from piper_tts_plugin import PiperChunkedStream
+
+
+class _CoreLimitedSession:
+    """Allow at most `cores` concurrent session.run calls, like a CPU-bound model."""
+
+    def __init__(self, session: Any, cores: int) -> None:
+        self._session = session
+        self._cores = threading.Semaphore(cores)
+
+    def run(self, output_names: Any, args: dict[str, Any]) -> Any:
+        with self._cores:
+            return self._session.run(output_names, args)
+
+
+def _load_voice(args: argparse.Namespace) -> Any:
+    if args.model:
+        from piper_voices import VoiceOptions, load_piper_voice
+
+        return load_piper_voice(args.model, VoiceOptions(intra_op_threads=1))
+    voice = FakePiperVoice(seconds_per_char=0.0015, call_overhead=0.004)
+    voice.session.batch_marginal_cost = args.batch_cost
+    voice.session = _CoreLimitedSession(voice.session, args.cores)
+    return voice
+
+
+def _run(
+    voice: Any, window_ms: float, sessions: int, chunks_per_session: int, runners: int
+) -> dict[str, Any]:
+    engine = None
+    if window_ms:
+        engine = BatchingEngine(voice, window_ms=window_ms, max_batch=sessions, runners=runners)
+    ttfb: list[float] = []
+    lock = threading.Lock()
+
+    def _session(idx: int) -> None:
+        for n in range(chunks_per_session):
+            text = CHUNKS[(idx + n) % len(CHUNKS)]
+            start = time.perf_counter()
+            first: list[float] = []
+
+            def _on_audio(pcm: bytes, first: list[float] = first, start: float = start) -> None:
+                if not first:
+                    first.append(time.perf_counter() - start)
+
+            if engine is not None:
+                synthesize_batched(engine, text, on_audio=_on_audio)
+            else:
+                PiperChunkedStream._synthesize(voice, text, on_audio=_on_audio)
+            with lock:
+                ttfb.extend(first)
+
+    threads = [threading.Thread(target=_session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    result = {
+        "window_ms": window_ms,
+        "sessions": sessions,
+        "chunks_per_s": sessions * chunks_per_session / wall,
+        "ttfb_p50_ms": statistics.median(ttfb) * 1000,
+        "ttfb_p95_ms": statistics.quantiles(ttfb, n=20)[-1] * 1000,
+    }
+    if engine is not None:
+        stats = engine.stats()
+        result["mean_batch"] = stats.mean_batch
+        engine.close()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", help="real Piper .onnx model (default: fake voice)")
+    parser.add_argument("--sessions", type=int, default=12)
+    parser.add_argument("--chunks", type=int, default=6, help="chunks per session")
+    parser.add_argument("--windows", default="0,1,2,4,8,16", help="batch windows in ms")
+    parser.add_argument("--cores", type=int, default=4, help="concurrent runs (fake voice)")
+    parser.add_argument("--batch-cost", type=float, default=0.35, help="fake voice only")
+    parser.add_argument("--runners", type=int, default=4, help="concurrent batches")
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args()
+
+    voice = _load_voice(args)
+    if not args.json:
+        print(f"{'window ms':>10}{'chunks/s':>10}{'p50 ttfb':>10}{'p95 ttfb':>10}{'batch':>7}")
+    for window in (float(w) for w in args.windows.split(",")):
+        r = _run(voice, window, args.sessions, args.chunks, args.runners)
+        if args.json:
+            print(json.dumps(r))
+            continue
+        print(
+            f"{r['window_ms']:>10.1f}{r['chunks_per_s']:>10.1f}{r['ttfb_p50_ms']:>10.1f}"
+            f"{r['ttfb_p95_ms']:>10.1f}{r.get('mean_batch', 1.0):>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
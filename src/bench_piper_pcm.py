@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: WAV round-trip vs. raw PCM path for one Piper chunk.
+Usage:
+    uv run python src/bench_piper_pcm.py [--iterations 200]
+
+Uses FakePiperVoice with its audio prerendered per chunk, so only the audio plumbing
+(int16 conversion, WAV encode/decode, copies) is measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import wave
+from collections.abc import Iterator
+from io import BytesIO
+from typing import Any
+
+from fake_piper_voice import FakeAudioChunk, FakePiperVoice
+from piper_tts_plugin import PiperChunkedStream
+
+CHUNKS = [
+    "Hallo! Wie kann ich Ihnen helfen?",
+    "Gern, ich luege das grad noche. Mir händ hüt bis am sächsi offe.",
+    "Söll ich Ihne en Rückruef organisiere, oder wänd Sie lieber en Termin?",
+]
+
+
+class _PrerenderedVoice(FakePiperVoice):
+    def __init__(self) -> None:
+        super().__init__()
+        self._rendered = {text: list(super().synthesize(text)) for text in CHUNKS}
+
+    def synthesize(self, text: str, syn_config: Any = None) -> Iterator[FakeAudioChunk]:
+        yield from self._rendered[text]
+
+
+def wav_roundtrip(voice: FakePiperVoice, text: str) -> tuple[bytes, int]:
+    """The previous PiperChunkedStream._synthesize, instrumented with bytes copied."""
+    copied = 0
+    buf = BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setframerate(voice.config.sample_rate)
+        wf.setsampwidth(2)
+        wf.setnchannels(1)
+        for chunk in voice.synthesize(text):
+            pcm = chunk.audio_int16_bytes  # array -> bytes
+            wf.writeframes(pcm)  # bytes -> BytesIO
+            copied += 2 * len(pcm)
+    buf.seek(0)
+    with wave.open(buf, "rb") as wf:
+        data = wf.readframes(wf.getnframes())  # BytesIO -> bytes
+    copied += len(data)
+    return data, copied
+
+
+def raw_pcm(voice: FakePiperVoice, text: str) -> tuple[list[bytes], int]:
+    parts = PiperChunkedStream._synthesize(voice, text, on_audio=lambda pcm: None)
+    return parts, sum(len(p) for p in parts)  # one array -> bytes copy per sentence
+
+
+def _bench(fn, voice: FakePiperVoice, iterations: int) -> tuple[float, int, int]:
+    total_time = 0.0
+    total_copied = 0
+    total_pcm = 0
+    for _ in range(iterations):
+        for text in CHUNKS:
+            start = time.perf_counter()
+            out, copied = fn(voice, text)
+            total_time += time.perf_counter() - start
+            total_copied += copied
+            total_pcm += len(out) if isinstance(out, bytes) else sum(len(p) for p in out)
+    n = iterations * len(CHUNKS)
+    return total_time / n, total_copied // n, total_pcm // n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    voice = _PrerenderedVoice()
+    print(f"{'path':<14}{'us/chunk':>12}{'pcm B/chunk':>14}{'copied B/chunk':>16}")
+    for name, fn in (("wav-roundtrip", wav_roundtrip), ("raw-pcm", raw_pcm)):
+        fn(voice, CHUNKS[0])  # warm-up
+        per_chunk, copied, pcm = _bench(fn, voice, args.iterations)
+        print(f"{name:<14}{per_chunk * 1e6:>12.1f}{pcm:>14}{copied:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Offline benchmark for the Piper TTS plugin: chunking, TTFB, RTF, throughput, peak RSS.
+Usage:
+    uv run python src/bench_piper_tts.py [--concurrency 1,2,4,8] [--json out.json]
+    uv run python src/bench_piper_tts.py --model ~/.cache/livekit/piper/de_DE-thorsten-medium.onnx
+    uv run python src/bench_piper_tts.py --json new.json --compare baseline.json
+
+Each stream is one PiperTTS instance (like one call) synthesizing the reply corpus
+back to back through PiperTTS.synthesize; N streams run concurrently on one event loop
+and share one voice and executor, as sessions in a job process do. Without --model a
+FakePiperVoice with a fixed per-character cost is used, so results are deterministic
+enough to compare across commits: keep the --json output of one and --compare the other.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from fake_piper_voice import FakePiperVoice
+from piper_executor import InferenceExecutor
+from piper_tts_plugin import PIPER_SAMPLE_RATE, PiperTTS, _chunk_text_for_tts
+from piper_voices import VoiceRegistry
+
+# Typical agent replies (Swiss German as prompted, some Standard German and mixed)
+REPLIES = [
+    "Grüezi mitenand, do isch de digitali Assistent vo de Praxis Müller. Wie chan ich hälfe?",
+    "Mir händ hüt bis am sächsi offe, und morn am Morge ab achti.",
+    "Söll ich Ihne en Rückruef organisiere, oder wänd Sie lieber grad en Termin abmache?",
+    "Alles klar, ich han Sie für de Dunnschtig am halbi drü iitrait. Passt Ihne das?",
+    "Das tuet mir leid, da chan ich Ihne leider nöd witerhälfe. Ich verbind Sie gern.",
+    "Guten Tag, Sie sprechen mit dem digitalen Assistenten. Was kann ich für Sie tun?",
+    "Einen Moment bitte, ich schaue kurz nach, ob am Freitagvormittag noch etwas frei ist.",
+    "Dankschön für Ihre Aaruef, und e schöne Tag no. Uf Widerluege!",
+]
+
+REGRESSION_KEYS = {"ttfb_p50_ms": -1, "ttfb_p95_ms": -1, "audio_s_per_s": 1}  # sign: better
+
+
+def _rss_mb() -> tuple[float, float]:
+    """(current, peak) resident set size of this process in MB (Linux units)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        current = peak
+    return current, peak
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _load_voice(args: argparse.Namespace) -> Any:
+    if args.model:
+        from piper_voices import VoiceOptions, load_piper_voice
+
+        return load_piper_voice(args.model, VoiceOptions(intra_op_threads=args.intra_op_threads))
+    return FakePiperVoice(
+        seconds_per_char=args.fake_seconds_per_char, call_overhead=args.fake_overhead
+    )
+
+
+def bench_chunking(replies: list[str], iterations: int = 200) -> dict[str, Any]:
+    chunks = [_chunk_text_for_tts(r) for r in replies]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for r in replies:
+            _chunk_text_for_tts(r)
+    elapsed = time.perf_counter() - start
+    return {
+        "replies": len(replies),
+        "chunks_per_reply": statistics.mean(len(c) for c in chunks),
+        "first_chunk_chars": statistics.mean(len(c[0]) for c in chunks if c),
+        "us_per_reply": elapsed / (iterations * len(replies)) * 1e6,
+    }
+
+
+async def _run_stream(tts: PiperTTS, replies: list[str]) -> tuple[list[float], float, float]:
+    """Synthesize replies in turn; returns (ttfb per reply, audio seconds, wall seconds)."""
+    ttfbs: list[float] = []
+    samples = 0
+    start = time.perf_counter()
+    for text in replies:
+        t0 = time.perf_counter()
+        first = True
+        async for ev in tts.synthesize(text):
+            if first:
+                ttfbs.append(time.perf_counter() - t0)
+                first = False
+            samples += ev.frame.samples_per_channel
+    return ttfbs, samples / tts.sample_rate, time.perf_counter() - start
+
+
+async def bench_level(
+    voice: Any, concurrency: int, replies: list[str], *, workers: int, lookahead: int
+) -> dict[str, Any]:
+    registry = VoiceRegistry(loader=lambda path, options: voice)
+    executor = InferenceExecutor(workers)
+    streams = [
+        PiperTTS(
+            model_path="bench.onnx",
+            registry=registry,
+            executor=executor,
+            lookahead=lookahead,
+            adaptive_chunking=False,  # same chunks at every level
+        )
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        # rotate the corpus so streams don't all start on the same reply
+        *(
+            _run_stream(tts, replies[i % len(replies) :] + replies[: i % len(replies)])
+            for i, tts in enumerate(streams)
+        )
+    )
+    wall = time.perf_counter() - start
+    for tts in streams:
+        await tts.aclose()
+    executor.shutdown()
+
+    ttfbs = [t for r in results for t in r[0]]
+    audio_s = sum(r[1] for r in results)
+    current_rss, peak_rss = _rss_mb()
+    return {
+        "concurrency": concurrency,
+        "ttfb_p50_ms": statistics.median(ttfbs) * 1000,
+        "ttfb_p95_ms": statistics.quantiles(ttfbs, n=20)[-1] * 1000
+        if len(ttfbs) > 1
+        else ttfbs[0] * 1000,
+        "rtf_mean": statistics.mean(r[2] / r[1] for r in results if r[1]),
+        "audio_s_per_s": audio_s / wall,
+        "replies_per_s": concurrency * len(replies) / wall,
+        "rss_mb": current_rss,
+        "peak_rss_mb": peak_rss,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Regressions larger than `tolerance` (fraction) per concurrency level."""
+    base_levels = {lvl["concurrency"]: lvl for lvl in baseline.get("levels", [])}
+    problems = []
+    for lvl in current["levels"]:
+        base = base_levels.get(lvl["concurrency"])
+        if base is None:
+            continue
+        for key, better in REGRESSION_KEYS.items():
+            old, new = base[key], lvl[key]
+            if old and (new - old) / old * better < -tolerance:
+                problems.append(
+                    f"c={lvl['concurrency']} {key}: {old:.1f} -> {new:.1f} "
+                    f"({(new - old) / old:+.0%})"
+                )
+    return problems
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    voice = _load_voice(args)
+    levels = []
+    for n in (int(c) for c in args.concurrency.split(",")):
+        levels.append(
+            await bench_level(voice, n, REPLIES, workers=args.workers, lookahead=args.lookahead)
+        )
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "voice": args.model or "fake",
+            "fake_seconds_per_char": None if args.model else args.fake_seconds_per_char,
+            "workers": args.workers,
+            "lookahead": args.lookahead,
+            "sample_rate": PIPER_SAMPLE_RATE,
+        },
+        "chunking": bench_chunking(REPLIES),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", help="real Piper .onnx model (default: fake voice)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated stream counts")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--lookahead", type=int, default=2)
+    parser.add_argument("--intra-op-threads", type=int, default=1, help="real model only")
+    parser.add_argument("--fake-seconds-per-char", type=float, default=0.0005)
+    parser.add_argument("--fake-overhead", type=float, default=0.002)
+    parser.add_argument("--json", type=Path, help="write results here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+    c = result["chunking"]
+    print(
+        f"chunking: {c['chunks_per_reply']:.1f} chunks/reply, first {c['first_chunk_chars']:.0f}"
+        f" chars, {c['us_per_reply']:.1f} us/reply"
+    )
+    print(f"{'streams':>8}{'p50 ttfb':>10}{'p95 ttfb':>10}{'rtf':>7}{'audio/s':>9}{'peak MB':>9}")
+    for lvl in result["levels"]:
+        print(
+            f"{lvl['concurrency']:>8}{lvl['ttfb_p50_ms']:>10.1f}{lvl['ttfb_p95_ms']:>10.1f}"
+            f"{lvl['rtf_mean']:>7.2f}{lvl['audio_s_per_s']:>9.1f}{lvl['peak_rss_mb']:>9.0f}"
+        )
+
+    if args.compare:
+        problems = compare(result, json.loads(args.compare.read_text()), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Per-call record of transcripts and, optionally, caller and agent audio.
+
+Everything on the event loop only appends to an in-memory buffer: `event()` for
+transcript lines, `audio()` for PCM frames (Assistant tees the STT input and TTS output
+through `tee()`). A background thread wakes every `flush_interval_s`, takes the whole
+buffer and writes it in one go to
+
+    <dir>/<room>-<start>.jsonl.gz           transcript and state events, one JSON per line
+    <dir>/<room>-<start>.<track>.pcm.gz     raw s16le PCM per track ("caller", "agent")
+
+so a slow disk never stalls the audio path. The buffer is bounded by `max_buffer_bytes`;
+what doesn't fit is dropped and counted (`stats` and voice_metrics), never waited for.
+Each audio file's format is in the transcript's first "audio" event; play it with e.g.
+`gunzip -c call.agent.pcm.gz | ffplay -f s16le -ar 48000 -ac 1 -`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import AsyncIterable, AsyncIterator
+from pathlib import Path
+from typing import IO, Any
+
+from livekit import rtc
+
+from voice_metrics import record_recorder_drop
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_BYTES = 16 * 1024 * 1024  # ~2.5 min of both tracks at 48 kHz
+FLUSH_INTERVAL_S = 1.0
+_UNSAFE_RE = re.compile(r"[^\w.-]")  # room names become file names
+
+
+class CallRecorder:
+    """Bounded, non-blocking recorder for one call, written by its own thread."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        room: str,
+        *,
+        audio: bool = False,
+        max_buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self.records_audio = audio
+        self._max_buffer_bytes = max_buffer_bytes
+        self._flush_interval_s = flush_interval_s
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{_UNSAFE_RE.sub('_', room) or 'room'}-{time.strftime('%Y%m%d-%H%M%S')}"
+        self._prefix = directory / stem
+        self.path = self._prefix.with_name(f"{stem}.jsonl.gz")
+
+        self._cond = threading.Condition()
+        self._buffer: list[tuple[str, bytes]] = []  # (track, PCM) or ("", JSON line)
+        self._buffer_bytes = 0
+        self._closed = False
+        self._tracks: set[str] = set()
+        self.stats: dict[str, int] = {
+            "events": 0,
+            "audio_bytes": 0,
+            "dropped_events": 0,
+            "dropped_audio_bytes": 0,
+        }
+        self._files: dict[str, IO[bytes]] = {}
+        self._thread = threading.Thread(target=self._run, name="CallRecorder", daemon=True)
+        self._thread.start()
+
+    # ── producers (event loop) ───────────────────────────────────
+    def event(self, kind: str, **fields: Any) -> None:
+        line = json.dumps({"ts": time.time(), "kind": kind, **fields}, ensure_ascii=False)
+        if self._put("", (line + "\n").encode("utf-8")):
+            self.stats["events"] += 1
+        else:
+            self.stats["dropped_events"] += 1
+            record_recorder_drop("event")
+
+    def audio(self, track: str, frame: rtc.AudioFrame) -> None:
+        if track not in self._tracks:
+            self._tracks.add(track)
+            self.event(
+                "audio",
+                track=track,
+                file=f"{self._prefix.name}.{track}.pcm.gz",
+                sample_rate=frame.sample_rate,
+                channels=frame.num_channels,
+            )
+        pcm = bytes(frame.data)
+        if self._put(track, pcm):
+            self.stats["audio_bytes"] += len(pcm)
+        else:
+            self.stats["dropped_audio_bytes"] += len(pcm)
+            record_recorder_drop("audio", len(pcm))
+
+    async def tee(
+        self, frames: AsyncIterable[rtc.AudioFrame], track: str
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        """Pass `frames` through unchanged, recording them as `track`."""
+        async for frame in frames:
+            self.audio(track, frame)
+            yield frame
+
+    def attach(self, session: Any) -> None:
+        """Record final transcripts, conversation items and agent state changes."""
+
+        def _on_transcript(ev: Any) -> None:
+            if ev.is_final:
+                self.event("transcript", text=ev.transcript, language=ev.language)
+
+        def _on_item(ev: Any) -> None:
+            item = ev.item
+            if getattr(item, "type", None) == "message" and item.text_content:
+                self.event(
+                    "message", role=item.role, text=item.text_content, interrupted=item.interrupted
+                )
+
+        def _on_agent_state(ev: Any) -> None:
+            self.event("agent_state", state=ev.new_state)
+
+        session.on("user_input_transcribed", _on_transcript)
+        session.on("conversation_item_added", _on_item)
+        session.on("agent_state_changed", _on_agent_state)
+
+    def _put(self, track: str, data: bytes) -> bool:
+        with self._cond:
+            if self._closed or self._buffer_bytes + len(data) > self._max_buffer_bytes:
+                return False
+            self._buffer.append((track, data))
+            self._buffer_bytes += len(data)
+            return True
+
+    # ── writer thread ────────────────────────────────────────────
+    def close(self) -> None:
+        """Write what is buffered and close the files (blocking; call from a thread)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self._flush_interval_s)
+                batch, self._buffer, self._buffer_bytes = self._buffer, [], 0
+                closed = self._closed
+            try:
+                self._write(batch)
+            except OSError as e:
+                logger.warning("Call recorder write failed, %d items lost: %s", len(batch), e)
+            if closed:
+                break
+        for f in self._files.values():
+            try:
+                f.close()
+            except OSError as e:
+                logger.warning("Call recorder close failed: %s", e)
+
+    def _write(self, batch: list[tuple[str, bytes]]) -> None:
+        if not batch:
+            return
+        chunks: dict[str, list[bytes]] = {}
+        for track, data in batch:
+            chunks.setdefault(track, []).append(data)
+        for track, parts in chunks.items():
+            f = self._files.get(track)
+            if f is None:
+                path = self.path if not track else Path(f"{self._prefix}.{track}.pcm.gz")
+                f = self._files[track] = gzip.open(path, "ab", compresslevel=5)  # noqa: SIM115 - closed by _run
+            f.write(b"".join(parts))
+            f.flush()  # a sync point per batch: a crashed call still leaves a readable file
@@ -0,0 +1,175 @@
+"""Token-budgeted chat context for long calls.
+
+AgentSession appends every turn to the chat context, so without a bound each LLM request
+of a long call sends a longer prompt and the first token comes later. ContextCompactor
+builds the context actually sent (`compact`, called from Assistant.llm_node):
+
+- the system instructions, verbatim;
+- a running summary of the older turns, as one more system message;
+- the last `keep_turns` caller turns and everything after them, verbatim;
+
+dropping the oldest turns that are neither summarised nor recent if it would still go
+over `budget_tokens`. The summary is brought up to date between turns (`schedule`,
+called when the agent's reply is committed) by a background LLM call, so no caller waits
+for it; until it catches up, the turns it will fold in are sent verbatim as far as the
+budget allows. Token counts are estimates (~4 characters per token); the real prompt
+size of every request is reported per turn by voice_metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from livekit.agents import llm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_TOKENS = 2000
+DEFAULT_KEEP_TURNS = 4
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per message
+
+SUMMARY_INSTRUCTIONS = (
+    "Fasse das bisherige Telefongespräch kurz und sachlich zusammen (höchstens 5 Sätze). "
+    "Behalte Anliegen des Anrufers, Namen, Nummern, Termine, Zusagen und offene Punkte; "
+    "lass Begrüssungen und Smalltalk weg."
+)
+SUMMARY_PREFIX = "Bisheriges Gespräch (Zusammenfassung): "
+
+Summarizer = Callable[[str, Sequence[llm.ChatMessage]], Awaitable[str]]
+
+
+def estimate_tokens(item: llm.ChatItem) -> int:
+    if item.type == "message":
+        text = item.text_content or ""
+    elif item.type == "function_call":
+        text = item.name + item.arguments
+    elif item.type == "function_call_output":
+        text = item.output
+    else:
+        text = ""
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def llm_summarizer(model: llm.LLM) -> Summarizer:
+    """Summarizer that asks `model` to fold `messages` into the running `summary`."""
+
+    async def _summarize(summary: str, messages: Sequence[llm.ChatMessage]) -> str:
+        transcript = "\n".join(f"{m.role}: {(m.text_content or '').strip()}" for m in messages)
+        chat_ctx = llm.ChatContext.empty()
+        chat_ctx.add_message(role="system", content=SUMMARY_INSTRUCTIONS)
+        chat_ctx.add_message(
+            role="user",
+            content=(f"Bisherige Zusammenfassung:\n{summary}\n\n" if summary else "")
+            + f"Neue Gesprächsteile:\n{transcript}",
+        )
+        parts: list[str] = []
+        async with model.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        return "".join(parts).strip()
+
+    return _summarize
+
+
+class ContextCompactor:
+    """Per-session budgeted view of the chat context with a background running summary."""
+
+    def __init__(
+        self,
+        summarize: Summarizer,
+        *,
+        budget_tokens: int = DEFAULT_BUDGET_TOKENS,
+        keep_turns: int = DEFAULT_KEEP_TURNS,
+    ) -> None:
+        self._summarize = summarize
+        self.budget_tokens = budget_tokens
+        self.keep_turns = max(1, keep_turns)
+        self.summary = ""
+        self._summarized: set[str] = set()  # ids of items folded into the summary
+        self._task: asyncio.Task[None] | None = None
+        self.last_estimate = 0  # tokens of the last compacted context
+
+    def attach(self, session: Any) -> None:
+        """Update the summary whenever the agent's reply lands in the session history."""
+
+        def _on_item(ev: Any) -> None:
+            if getattr(ev.item, "role", None) == "assistant":
+                self.schedule(session.history)
+
+        session.on("conversation_item_added", _on_item)
+
+    def _split(self, chat_ctx: llm.ChatContext) -> tuple[list[Any], list[Any], list[Any]]:
+        """(instructions, older items, recent items) of `chat_ctx`."""
+        instructions, conversation = [], []
+        for item in chat_ctx.items:
+            if item.type == "message" and item.role in ("system", "developer"):
+                instructions.append(item)
+            else:
+                conversation.append(item)
+        user_turns = [
+            i
+            for i, item in enumerate(conversation)
+            if item.type == "message" and item.role == "user"
+        ]
+        start = user_turns[-self.keep_turns] if len(user_turns) >= self.keep_turns else 0
+        return instructions, conversation[:start], conversation[start:]
+
+    def compact(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """The context to send: instructions, summary and recent turns within the budget."""
+        instructions, older, recent = self._split(chat_ctx)
+        pending = [item for item in older if item.id not in self._summarized]
+        head = list(instructions)
+        if self.summary:
+            head.append(llm.ChatMessage(role="system", content=[SUMMARY_PREFIX + self.summary]))
+
+        budget = self.budget_tokens - sum(estimate_tokens(item) for item in head)
+        tail: list[Any] = []
+        # newest first: the caller's latest message always goes, older ones while they fit
+        for i, item in enumerate(reversed(pending + recent)):
+            cost = estimate_tokens(item)
+            if budget - cost < 0 and i > 0:
+                break
+            budget -= cost
+            tail.append(item)
+        tail.reverse()
+        while tail and tail[0].type == "function_call_output":
+            tail.pop(0)  # never send a tool result without its call
+
+        self.last_estimate = self.budget_tokens - budget
+        return llm.ChatContext(head + tail)
+
+    def schedule(self, chat_ctx: llm.ChatContext) -> None:
+        """Fold turns that left the recent window into the summary, in the background."""
+        if self._task is not None and not self._task.done():
+            return  # the next reply catches up
+        _, older, _ = self._split(chat_ctx)
+        pending = [item for item in older if item.id not in self._summarized]
+        if not pending:
+            return
+        self._task = asyncio.create_task(self._update(pending), name="ContextCompactor")
+
+    async def _update(self, items: list[Any]) -> None:
+        messages = [
+            item for item in items if item.type == "message" and (item.text_content or "").strip()
+        ]
+        if not messages:
+            self._summarized.update(item.id for item in items)  # tool calls only
+            return
+        try:
+            summary = await self._summarize(self.summary, messages)
+        except Exception as e:  # noqa: BLE001 - the call goes on with the verbatim turns
+            logger.warning("Chat context summary failed: %s", e)
+            return
+        if summary:
+            self.summary = summary
+            self._summarized.update(item.id for item in items)
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
@@ -1,114 +1,293 @@
 """
-Download Piper TTS German models for low-latency local TTS.
+Download Piper TTS voices listed in src/piper_models.json.
+
+Voices are fetched concurrently. Every file goes to `<name>.part` first, resumes from
+there with an HTTP Range request after an interrupted transfer, is checked against the
+manifest's SHA-256 and size, and only then renamed into place, so the agent never finds
+a truncated or corrupt model. Files already in place are re-hashed instead of skipped
+blindly. For files not pinned yet, the source's own SHA-256 and size stand in (Hugging
+Face sends them as X-Linked-Etag / X-Linked-Size, other servers at least a
+Content-Length); a file that can't be checked against anything is an error, not a pass.
+`--mirror` points at a local directory or file server laid out like the upstream
+repository, or a flat copy of another node's model directory (for container builds and
+node bootstrap without internet access).
+
 Usage:
-    uv run python src/download_piper_models.py
+    uv run python src/download_piper_models.py                      # manifest defaults
+    uv run python src/download_piper_models.py de_DE-thorsten-low --mirror /srv/piper
+    uv run python src/download_piper_models.py --all --pin          # record checksums
 """
 
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import sys
+import time
+import urllib.error
 import urllib.request
-import hashlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, BinaryIO
+
+MANIFEST_PATH = Path(__file__).with_name("piper_models.json")
+BLOCK_SIZE = 1024 * 1024
+MAX_ATTEMPTS = 4  # per file; each retry resumes from what is already on disk
+RETRY_DELAY_S = 1.0
+TIMEOUT_S = 30.0
 
-# Piper TTS German model - Thorsten (low latency, good quality)
-# This is a small, fast model perfect for demos
-MODEL_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main/de/de_DE/thorsten/medium/de_DE-thorsten-medium.onnx"
-CONFIG_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main/de/de_DE/thorsten/medium/de_DE-thorsten-medium.onnx.json"
 
-# Expected file sizes for verification
-MODEL_SIZE = 52428800  # ~50MB (approximate)
-CONFIG_SIZE = 10240    # ~10KB (approximate)
+class DownloadError(Exception):
+    pass
 
-def get_model_dir():
+
+@dataclass
+class ModelFile:
+    path: str  # relative to the manifest's base URL (and to a mirror)
+    sha256: str | None = None  # None: not pinned yet, the source's checksum is used
+    size: int | None = None
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).name
+
+
+def get_model_dir() -> Path:
     """Get the directory where models are stored."""
     # Use same directory as other LiveKit models
     base_dir = Path.home() / ".cache" / "livekit" / "piper"
     base_dir.mkdir(parents=True, exist_ok=True)
     return base_dir
 
-def download_file(url, dest_path, description):
-    """Download a file with progress."""
-    print(f"Downloading {description}...")
-    print(f"  URL: {url}")
-    print(f"  Destination: {dest_path}")
-    
-    if dest_path.exists():
-        print(f"  ✓ Already exists, skipping...")
-        return True
-    
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def manifest_files(manifest: dict[str, Any], voices: list[str]) -> list[ModelFile]:
+    unknown = [v for v in voices if v not in manifest["voices"]]
+    if unknown:
+        raise DownloadError(f"not in the manifest: {', '.join(unknown)}")
+    return [ModelFile(**entry) for voice in voices for entry in manifest["voices"][voice]]
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source(base: str, rel_path: str) -> str:
+    if "://" in base:
+        return f"{base.rstrip('/')}/{rel_path}"
+    nested = Path(base) / rel_path  # local mirror directory, upstream layout
+    flat = Path(base) / Path(rel_path).name  # ... or a copy of another node's model dir
+    return str(nested if nested.exists() or not flat.exists() else flat)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None  # the resolve response itself carries the LFS checksum
+
+
+def remote_info(source: str) -> tuple[str | None, int | None]:
+    """(SHA-256, size) the source reports for a file, either None if it doesn't."""
+    if "://" not in source:
+        return None, os.stat(source).st_size
+    request = urllib.request.Request(source, method="HEAD")
     try:
-        # Download with progress
-        def reporthook(blocknum, blocksize, totalsize):
-                    readsofar = blocknum * blocksize
-                    if totalsize > 0:
-                        percent = readsofar * 100 / totalsize
-                        print(f"\r  Progress: {percent:.1f}%", end='')
-        
-        urllib.request.urlretrieve(url, dest_path, reporthook)
-        print(f"\r  ✓ Download complete!")
-        return True
-    except Exception as e:
-        print(f"\n  ✗ Download failed: {e}")
-        return False
-
-def verify_file(path, min_size):
-    """Verify file was downloaded correctly."""
-    if not path.exists():
-        return False
-    
-    actual_size = path.stat().st_size
-    print(f"  File size: {actual_size / 1024 / 1024:.2f} MB")
-    
-    # Basic size check (allow some variance)
-    if actual_size < min_size * 0.5:
-        print(f"  ✗ File seems too small, may be corrupted")
-        return False
-    
-    return True
-
-def main():
-    print("=" * 60)
-    print("Piper TTS German Model Downloader")
-    print("=" * 60)
-    print()
-    
-    model_dir = get_model_dir()
-    model_path = model_dir / "de_DE-thorsten-medium.onnx"
-    config_path = model_dir / "de_DE-thorsten-medium.onnx.json"
-    
-    print(f"Model directory: {model_dir}")
-    print()
-    
-    # Download model
-    model_ok = download_file(MODEL_URL, model_path, "German TTS model (ONNX)")
-    if model_ok:
-        model_ok = verify_file(model_path, 10 * 1024 * 1024)  # At least 10MB
-    
-    print()
-    
-    # Download config
-    config_ok = download_file(CONFIG_URL, config_path, "German TTS config")
-    if config_ok:
-        config_ok = verify_file(config_path, 1024)  # At least 1KB
-    
-    print()
-    
-    # Summary
-    print("=" * 60)
-    if model_ok and config_ok:
-        print("✓ SUCCESS! Piper TTS models downloaded successfully.")
-        print()
-        print(f"Model:  {model_path}")
-        print(f"Config: {config_path}")
-        print()
-        print("You can now use Piper TTS in your agent:")
-        print('  tts=piper.TTS(')
-        print(f'      model_path="{model_path}",')
-        print(f'      config_path="{config_path}"')
-        print('  )')
-    else:
-        print("✗ FAILED! Some downloads failed.")
-        print("Please check your internet connection and try again.")
-    print("=" * 60)
+        response = urllib.request.build_opener(_NoRedirect).open(request, timeout=TIMEOUT_S)
+        headers = response.headers
+    except urllib.error.HTTPError as e:
+        if not 300 <= e.code < 400:
+            raise
+        headers = e.headers
+    etag = (headers.get("X-Linked-Etag") or "").strip('"').lower()
+    sha256 = etag if len(etag) == 64 and all(c in "0123456789abcdef" for c in etag) else None
+    size = headers.get("X-Linked-Size") or headers.get("Content-Length")
+    if size is None and headers.get("Location"):
+        head = urllib.request.Request(source, method="HEAD")  # follow the redirect
+        with urllib.request.urlopen(head, timeout=TIMEOUT_S) as response:
+            size = response.headers.get("Content-Length")
+    return sha256, int(size) if size is not None else None
+
+
+def _open(source: str, offset: int) -> tuple[BinaryIO, bool, int | None]:
+    """(stream, resumed from `offset`?, total size if known)."""
+    if "://" not in source:
+        f = open(source, "rb")  # noqa: SIM115 - closed by the caller
+        total = os.fstat(f.fileno()).st_size
+        f.seek(min(offset, total))
+        return f, True, total
+    request = urllib.request.Request(source)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    response = urllib.request.urlopen(request, timeout=TIMEOUT_S)
+    resumed = response.status == 206
+    length = response.headers.get("Content-Length")
+    total = int(length) + (offset if resumed else 0) if length else None
+    return response, resumed, total
+
+
+def _fetch(source: str, part: Path, expected_size: int | None) -> None:
+    """Download `source` into `part`, continuing after whatever is already there."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        if expected_size is not None and offset > expected_size:
+            part.unlink()  # not a prefix of this file
+            offset = 0
+        try:
+            stream, resumed, total = _open(source, offset)
+            with stream, open(part, "ab" if resumed else "wb") as out:
+                shutil.copyfileobj(stream, out, BLOCK_SIZE)
+            if total is not None and part.stat().st_size != total:
+                raise DownloadError(f"got {part.stat().st_size} of {total} bytes")
+            return
+        except urllib.error.HTTPError as e:
+            if e.code == 416:  # range past the end: complete, or not a prefix of this file
+                if expected_size is not None and offset == expected_size:
+                    return
+                part.unlink()
+                continue
+            if e.code < 500 or attempt == MAX_ATTEMPTS:
+                raise DownloadError(f"{source}: HTTP {e.code}") from e
+        except FileNotFoundError as e:
+            raise DownloadError(f"{source}: not in the mirror") from e
+        except (OSError, DownloadError) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise DownloadError(f"{source}: {e}") from e
+        time.sleep(RETRY_DELAY_S * attempt)
+
+
+def download_file(
+    model: ModelFile,
+    base: str,
+    dest_dir: Path,
+    *,
+    remote: Callable[[str], tuple[str | None, int | None]] = remote_info,
+) -> str:
+    """Fetch one file into `dest_dir` unless a verified copy is there; returns its SHA-256."""
+    dest = dest_dir / model.name
+    source = _source(base, model.path)
+    sha256, size = model.sha256, model.size
+    if sha256 is None:
+        try:
+            remote_sha256, remote_size = remote(source)
+        except (OSError, urllib.error.URLError) as e:
+            raise DownloadError(f"{model.name}: not pinned and {source} unreachable: {e}") from e
+        sha256, size = remote_sha256, size if size is not None else remote_size
+        if sha256 is None and size is None:
+            raise DownloadError(f"{model.name}: not pinned and the source reports no size")
+
+    if dest.exists():
+        digest = sha256_file(dest)
+        if (size is None or dest.stat().st_size == size) and (sha256 is None or digest == sha256):
+            return digest
+        print(f"  {model.name}: checksum or size mismatch, downloading again")
+        dest.unlink()
+
+    part = dest.with_name(dest.name + ".part")
+    _fetch(source, part, size)
+    digest = sha256_file(part)
+    if (size is not None and part.stat().st_size != size) or (
+        sha256 is not None and digest != sha256
+    ):
+        part.unlink()  # corrupt: start from scratch next time
+        raise DownloadError(f"{model.name}: checksum or size mismatch")
+    if model.name.endswith(".json"):
+        try:
+            json.loads(part.read_bytes())  # a voice config must at least parse
+        except ValueError as e:
+            part.unlink()
+            raise DownloadError(f"{model.name}: not valid JSON") from e
+    os.replace(part, dest)  # atomic: readers see the old file or the complete new one
+    return digest
+
+
+def download(
+    files: list[ModelFile], base: str, dest_dir: Path, *, jobs: int = 4
+) -> dict[str, str | Exception]:
+    """Download `files` concurrently; maps each file name to its SHA-256 or the error."""
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    def _one(model: ModelFile) -> str | Exception:
+        start = time.perf_counter()
+        try:
+            digest = download_file(model, base, dest_dir)
+        except (DownloadError, OSError) as e:
+            print(f"  ✗ {model.name}: {e}")
+            return e
+        print(f"  ✓ {model.name} ({time.perf_counter() - start:.1f}s)")
+        return digest
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return dict(zip([f.name for f in files], pool.map(_one, files), strict=True))
+
+
+def pin(manifest: dict[str, Any], dest_dir: Path, results: dict[str, str | Exception]) -> int:
+    """Record checksums and sizes of freshly verified files in the manifest; returns count."""
+    pinned = 0
+    for entries in manifest["voices"].values():
+        for entry in entries:
+            name = Path(entry["path"]).name
+            digest = results.get(name)
+            if isinstance(digest, str) and entry.get("sha256") is None:
+                entry["sha256"] = digest
+                entry["size"] = (dest_dir / name).stat().st_size
+                pinned += 1
+    return pinned
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("voices", nargs="*", help="voice names (default: the manifest's)")
+    parser.add_argument("--all", action="store_true", help="every voice in the manifest")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    parser.add_argument("--mirror", help="base URL or local directory to fetch from instead")
+    parser.add_argument("--dest", type=Path, default=None, help="default: ~/.cache/livekit/piper")
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent downloads")
+    parser.add_argument(
+        "--pin", action="store_true", help="write checksums of unpinned files into the manifest"
+    )
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    voices = list(manifest["voices"]) if args.all else args.voices or manifest["default"]
+    dest_dir = args.dest or get_model_dir()
+    base = args.mirror or manifest["base_url"]
+    try:
+        files = manifest_files(manifest, voices)
+    except DownloadError as e:
+        print(f"✗ {e}")
+        return 2
+
+    print(f"Downloading {', '.join(voices)} from {base} to {dest_dir}")
+    results = download(files, base, dest_dir, jobs=args.jobs)
+    unpinned = [f.name for f in files if f.sha256 is None]
+    if args.pin:
+        if pinned := pin(manifest, dest_dir, results):
+            args.manifest.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+            print(f"Pinned {pinned} checksums in {args.manifest}")
+    elif unpinned:
+        print(
+            f"! no checksum pinned for {', '.join(unpinned)} (run with --pin from a trusted source)"
+        )
+
+    failed = [name for name, r in results.items() if isinstance(r, Exception)]
+    if failed:
+        print(f"✗ FAILED: {', '.join(failed)}")
+        return 1
+    print("✓ All voices downloaded and verified.")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Deterministic stand-in for piper.PiperVoice.
+
+Produces synthetic audio at a fixed cost so the TTS plugin can be exercised and
+benchmarked without downloading the ONNX model. It mirrors Piper's pipeline
+(phonemize -> phoneme ids -> ONNX session) closely enough for the batched and
+phoneme-id code paths to run against it.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import wave
+from collections.abc import Iterator
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+FAKE_SAMPLE_RATE = 22050
+FAKE_HOP_LENGTH = 256
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class FakeAudioChunk:
+    """Mirrors the fields of piper.AudioChunk that the plugin reads."""
+
+    sample_rate: int
+    sample_width: int
+    sample_channels: int
+    audio_float_array: np.ndarray
+
+    @property
+    def audio_int16_array(self) -> np.ndarray:
+        return np.clip(self.audio_float_array * 32767.0, -32767.0, 32767.0).astype(np.int16)
+
+    @property
+    def audio_int16_bytes(self) -> bytes:
+        return self.audio_int16_array.tobytes()
+
+
+class FakeOnnxSession:
+    """Fake VITS session: `samples_per_id` samples of tone per phoneme id.
+
+    Cost model: `call_overhead` per run() plus `seconds_per_id` per padded input id of the
+    longest row; each extra batch row costs `batch_marginal_cost` of a row (1.0 = batching
+    saves nothing but the overhead). Spent in time.sleep so it releases the GIL like
+    onnxruntime does. `durations=False` mimics older exports without a durations output.
+    """
+
+    def __init__(
+        self,
+        *,
+        samples_per_id: int,
+        seconds_per_id: float = 0.0,
+        call_overhead: float = 0.0,
+        batch_marginal_cost: float = 1.0,
+        sample_rate: int = FAKE_SAMPLE_RATE,
+        durations: bool = True,
+    ) -> None:
+        self.samples_per_id = samples_per_id
+        self.seconds_per_id = seconds_per_id
+        self.call_overhead = call_overhead
+        self.batch_marginal_cost = batch_marginal_cost
+        self.sample_rate = sample_rate
+        self.durations = durations
+        self.calls = 0
+
+    def get_outputs(self) -> list[SimpleNamespace]:
+        names = ["output", "durations"] if self.durations else ["output"]
+        return [SimpleNamespace(name=name) for name in names]
+
+    def run(self, output_names: Any, args: dict[str, np.ndarray]) -> list[np.ndarray]:
+        ids = args["input"]
+        lengths = args["input_lengths"]
+        batch, max_len = ids.shape
+        self.calls += 1
+        rows = 1 + (batch - 1) * self.batch_marginal_cost
+        cost = self.call_overhead + self.seconds_per_id * max_len * rows
+        if cost:
+            time.sleep(cost)
+
+        audio = np.zeros((batch, 1, 1, max_len * self.samples_per_id), dtype=np.float32)
+        durations = np.zeros((batch, 1, max_len), dtype=np.float32)
+        for i in range(batch):
+            n = int(lengths[i])
+            audio[i, 0, 0, : n * self.samples_per_id] = self._render(ids[i, :n])
+            durations[i, 0, :n] = self.samples_per_id / FAKE_HOP_LENGTH
+        return [audio, durations] if self.durations else [audio]
+
+    def _render(self, ids: np.ndarray) -> np.ndarray:
+        n = len(ids) * self.samples_per_id
+        freq = 110.0 + (int(ids.sum()) % 200)  # deterministic per sentence
+        t = np.arange(n, dtype=np.float32) / self.sample_rate
+        return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+class FakePiperVoice:
+    """Fake voice: one phoneme per character, `audio_per_char` seconds of tone each,
+    costing `seconds_per_char` of wall time."""
+
+    def __init__(
+        self,
+        *,
+        audio_per_char: float = 0.06,
+        seconds_per_char: float = 0.0,
+        call_overhead: float = 0.0,
+        sample_rate: int = FAKE_SAMPLE_RATE,
+        durations: bool = True,
+    ) -> None:
+        self.config = SimpleNamespace(
+            sample_rate=sample_rate,
+            hop_length=FAKE_HOP_LENGTH,
+            length_scale=1.0,
+            noise_scale=0.667,
+            noise_w_scale=0.8,
+            num_speakers=1,
+        )
+        self.session = FakeOnnxSession(
+            samples_per_id=int(audio_per_char * sample_rate),
+            seconds_per_id=seconds_per_char,
+            call_overhead=call_overhead,
+            sample_rate=sample_rate,
+            durations=durations,
+        )
+        self.texts: list[str] = []
+
+    def phonemize(self, text: str) -> list[list[str]]:
+        return [list(s) for s in _SENTENCE_RE.split(text.strip()) if s]
+
+    def phonemes_to_ids(self, phonemes: list[str]) -> list[int]:
+        return [ord(p) % 251 + 1 for p in phonemes]
+
+    def phoneme_ids_to_audio(self, phoneme_ids: list[int], syn_config: Any = None) -> np.ndarray:
+        ids = np.array([phoneme_ids], dtype=np.int64)
+        args = {"input": ids, "input_lengths": np.array([ids.shape[1]], dtype=np.int64)}
+        return self.session.run(None, args)[0].squeeze()
+
+    def synthesize(self, text: str, syn_config: Any = None) -> Iterator[FakeAudioChunk]:
+        self.texts.append(text)
+        for phonemes in self.phonemize(text):
+            audio = self.phoneme_ids_to_audio(self.phonemes_to_ids(phonemes), syn_config)
+            peak = np.max(np.abs(audio))
+            if peak > 1e-8:
+                audio = audio / peak  # Piper's default normalize_audio
+            yield FakeAudioChunk(
+                sample_rate=self.config.sample_rate,
+                sample_width=2,
+                sample_channels=1,
+                audio_float_array=np.clip(audio, -1.0, 1.0).astype(np.float32),
+            )
+
+    def synthesize_wav(self, text: str, wav_file: wave.Wave_write, syn_config: Any = None) -> None:
+        wav_file.setframerate(self.config.sample_rate)
+        wav_file.setsampwidth(2)
+        wav_file.setnchannels(1)
+        for chunk in self.synthesize(text, syn_config=syn_config):
+            wav_file.writeframes(chunk.audio_int16_bytes)
@@ -0,0 +1,251 @@
+"""Response cache in front of the LLM for the questions every caller asks.
+
+A reply is keyed on the caller's final transcript (case, punctuation and whitespace
+folded), a hash of the agent's instructions and the last `context_messages` messages
+before it, so "Wann händ Sie offe?" right after the greeting gets the same reply on
+every call without the Groq round-trip. Replies that called tools or were cut short by
+an interruption are never stored.
+
+Only the caller's first turn is cached: once the context holds anything the caller said
+earlier (or a tool result), the reply may depend on it ("Wann isch min Termin nomal?"),
+and a key over the last few messages would serve it to every other caller.
+
+Like PCMCache, entries live in a bounded in-process LRU with an optional directory
+shared by every job process on the host (each call runs in its own process, so the
+memory tier alone would only ever see one caller). Entries expire after `ttl_s`.
+Because a hit replays exactly the same reply text, its TTS chunks usually hit the PCM
+cache as well, and the turn costs neither the LLM nor Piper.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import AsyncIterable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from livekit.agents import llm
+
+from voice_metrics import record_llm_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_DISK_ENTRIES = 10_000
+DEFAULT_TTL_S = 24 * 3600.0
+ENTRY_SUFFIX = ".json"
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_transcript(text: str) -> str:
+    """Fold case, punctuation and whitespace: "Wer isch dra?" == "wer isch dra"."""
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(_PUNCTUATION_RE.sub(" ", text).split())
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    bypassed: int = 0  # turns that could not be cached (not the caller's first turn)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + shared disk directory) cache of reply texts with a TTL."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = DEFAULT_TTL_S,
+        context_messages: int = 1,
+        disk_dir: str | Path | None = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._context_messages = context_messages
+        self._max_disk_entries = max_disk_entries
+        self._clock = clock  # wall time: entries are shared between processes
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ResponseCacheStats()
+        self._disk_dir: Path | None = None
+        self._disk_entries = 0
+        if disk_dir is not None:
+            self._disk_dir = Path(disk_dir)
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_entries = len(self._scan_disk())
+
+    def key(self, chat_ctx: llm.ChatContext, instructions: str = "") -> str | None:
+        """Cache key for the reply to `chat_ctx`, or None unless it ends on the caller's
+        first message (no earlier caller turns or tool results to depend on)."""
+        if any(item.type != "message" for item in chat_ctx.items):
+            return None
+        messages = [item for item in chat_ctx.items if item.role != "system"]
+        if not messages or messages[-1].role != "user":
+            return None
+        if any(m.role == "user" for m in messages[:-1]):
+            return None
+        transcript = normalize_transcript(messages[-1].text_content or "")
+        if not transcript:
+            return None
+        history = messages[:-1][-self._context_messages :] if self._context_messages else []
+        context = [[m.role, normalize_transcript(m.text_content or "")] for m in history]
+        payload = json.dumps(
+            {
+                "instructions": hashlib.sha256(instructions.encode("utf-8")).hexdigest(),
+                "context": context,
+                "transcript": transcript,
+            },
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and now - entry[0] > self._ttl_s:
+                self._memory.pop(key, None)
+                self._stats.expired += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+                self._insert_memory(key, entry)
+        record_llm_cache("miss" if entry is None else "hit")
+        return None if entry is None else entry[1]
+
+    def put(self, key: str, reply: str) -> None:
+        if not reply.strip():
+            return
+        entry = (self._clock(), reply)
+        with self._lock:
+            self._stats.stores += 1
+            self._insert_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def bypass(self) -> None:
+        with self._lock:
+            self._stats.bypassed += 1
+        record_llm_cache("bypass")
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(**asdict(self._stats))
+
+    async def respond(
+        self,
+        chat_ctx: llm.ChatContext,
+        instructions: str,
+        llm_node: Callable[[], AsyncIterable[llm.ChatChunk | str | Any]],
+    ) -> AsyncIterable[llm.ChatChunk | str | Any]:
+        """Serve the reply from the cache, or stream `llm_node()` and store what it said."""
+        key = self.key(chat_ctx, instructions)
+        if key is None:
+            self.bypass()
+            async for chunk in llm_node():
+                yield chunk
+            return
+        reply = self.get(key)
+        if reply is not None:
+            yield reply
+            return
+
+        parts: list[str] = []
+        cacheable = True
+        async for chunk in llm_node():
+            if isinstance(chunk, str):
+                parts.append(chunk)
+            elif isinstance(chunk, llm.ChatChunk) and chunk.delta is not None:
+                if chunk.delta.tool_calls:
+                    cacheable = False
+                parts.append(chunk.delta.content or "")
+            yield chunk
+        # only reached when the reply streamed to the end (an interruption closes us at a yield)
+        if cacheable:
+            self.put(key, "".join(parts))
+
+    def _insert_memory(self, key: str, entry: tuple[float, str]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    # ── disk tier ────────────────────────────────────────────────
+    def _read_disk(self, key: str) -> tuple[float, str] | None:
+        if self._disk_dir is None:
+            return None
+        path = self._disk_dir / f"{key}{ENTRY_SUFFIX}"
+        try:
+            data = json.loads(path.read_text("utf-8"))
+            os.utime(path)  # mtime doubles as LRU timestamp for eviction
+            return float(data["created"]), str(data["reply"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, key: str, entry: tuple[float, str]) -> None:
+        if self._disk_dir is None:
+            return
+        tmp: str | None = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self._disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": entry[0], "reply": entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp, self._disk_dir / f"{key}{ENTRY_SUFFIX}")
+        except OSError as e:
+            logger.warning("LLM response cache disk write failed: %s", e)
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_entries += 1
+            over = self._disk_entries > self._max_disk_entries
+        if over:
+            self._evict_disk()
+
+    def _scan_disk(self) -> list[tuple[float, Path]]:
+        assert self._disk_dir is not None
+        entries = []
+        for path in self._disk_dir.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        return entries
+
+    def _evict_disk(self) -> None:
+        # Other processes write to the same directory, so rescan; oldest entries go first.
+        entries = sorted(self._scan_disk())
+        for _, path in entries[: max(0, len(entries) - self._max_disk_entries)]:
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._disk_entries = min(len(entries), self._max_disk_entries)
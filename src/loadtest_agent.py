@@ -0,0 +1,663 @@
+"""
+Capacity load test: N concurrent calls through the real agent pipeline on one host.
+Usage:
+    uv run python src/loadtest_agent.py [--calls 1,2,4,8] [--turns 4] [--json out.json]
+    uv run python src/loadtest_agent.py --calls 4,8,16 --stt-latency 0.25 --llm-ttft 0.4
+    uv run python src/loadtest_agent.py --calls-per-process 8   # many calls per process
+
+Each call is an AgentSession running the real Assistant, Silero VAD and Piper TTS with
+the call settings from agent.py. Only the network models are local stand-ins: StubSTT
+and StubLLM answer after a configurable latency (the LLM streams a German reply at a
+configurable token rate). A synthetic caller speaks formant-synthesized "speech" (or
+WAV files from --caller-wav) in real time, waits for the agent's reply and answers again;
+agent audio is played out against a real-time clock, so barge-in timing and playout
+backpressure behave as in a room.
+
+Calls run one per process by default, like LiveKit's job processes. Per level the report
+has mouth-to-ear latency (end of caller speech -> first agent audio frame) and the
+per-stage timings from voice_metrics.SessionMetrics as percentiles, CPU cores used, RSS
+and event loop lag. Turn detection is VAD-only: the multilingual turn detector needs
+the worker's inference process. --json writes the results for fleet sizing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import time
+import wave
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psutil
+from livekit import rtc
+from livekit.agents import APIConnectOptions, NotGivenOr, llm, stt, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN
+from livekit.agents.voice import io
+
+from bench_piper_tts import REPLIES
+
+CALLER_SAMPLE_RATE = 16000
+CALLER_FRAME_MS = 10
+OUTPUT_QUEUE_S = 0.2  # audio buffered ahead of playout, like rtc.AudioSource(queue_size_ms=200)
+
+# What the synthetic caller "says" (the stub STT returns these in turn)
+CALLER_LINES = [
+    "Grüezi, ich hett gern en Termin.",
+    "Wänn händ Sie am Dunnschtig Ziit?",
+    "Guten Tag, ist die Praxis heute offen?",
+    "Chönd Sie mich zruggrüefe?",
+    "Ja, das passt mir guet, merci.",
+    "Nein danke, das wär alles.",
+]
+
+# (F1, F2, F3) of a few vowels, Hz
+_VOWELS = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480)]
+
+
+@dataclass
+class LoadTestConfig:
+    turns: int = 4  # caller utterances per call (after the greeting)
+    stt_latency: float = 0.3  # end of speech segment -> final transcript
+    llm_ttft: float = 0.5
+    llm_tokens_per_s: float = 40.0
+    think_s: float = 0.6  # caller pause after the agent stops speaking
+    reply_timeout_s: float = 15.0  # caller gives up waiting for an answer
+    ramp_s: float = 2.0  # call starts are spread over this window
+    model_path: str | None = None  # None: agent.get_piper_model_path(), else fake voice
+    fake_voice: bool = False
+    fake_seconds_per_char: float = 0.0005
+    tts_workers: int | None = None  # None: agent.TTS_INFERENCE_WORKERS
+    caller_wav: list[str] = field(default_factory=list)
+    seed: int = 0
+
+
+# ── Local stand-ins for the network models ──────────────────────────────
+
+
+class StubSTT(stt.STT):
+    """Non-streaming STT (AgentSession pairs it with the VAD) with a fixed latency."""
+
+    def __init__(self, *, latency: float, lines: list[str], offset: int = 0) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self._latency = latency
+        self._lines = lines
+        self._next = offset
+
+    async def _recognize_impl(
+        self,
+        buffer: utils.AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self._latency)
+        text = self._lines[self._next % len(self._lines)]
+        self._next += 1
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="de", text=text)],
+        )
+
+
+class StubLLM(llm.LLM):
+    """Streams canned replies word by word after `ttft`, at `tokens_per_s`."""
+
+    def __init__(
+        self, *, ttft: float, tokens_per_s: float, replies: list[str], offset: int = 0
+    ) -> None:
+        super().__init__()
+        self._ttft = ttft
+        self._token_s = 1.0 / tokens_per_s
+        self._replies = replies
+        self._next = offset
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.Tool] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs: Any,
+    ) -> _StubLLMStream:
+        reply = self._replies[self._next % len(self._replies)]
+        self._next += 1
+        return _StubLLMStream(
+            self, reply, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+
+class _StubLLMStream(llm.LLMStream):
+    def __init__(self, stub: StubLLM, reply: str, **kwargs: Any) -> None:
+        super().__init__(stub, **kwargs)
+        self._stub = stub
+        self._reply = reply
+
+    async def _run(self) -> None:
+        request_id = utils.shortuuid("stub_")
+        await asyncio.sleep(self._stub._ttft)
+        for i, word in enumerate(self._reply.split(" ")):
+            if i:
+                await asyncio.sleep(self._stub._token_s)
+            token = word if i == 0 else " " + word
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=token))
+            )
+
+
+# ── Synthetic caller and real-time playout ──────────────────────────────
+
+
+def synth_utterance(duration: float, *, f0: float = 120.0, seed: int = 0) -> np.ndarray:
+    """Formant-synthesized syllables Silero scores as speech; int16 at 16 kHz."""
+    rng = np.random.default_rng(seed)
+    sr = CALLER_SAMPLE_RATE
+    n = int(duration * sr)
+    out = np.zeros(n)
+    pos = 0
+    while pos < n:
+        m = min(int(rng.uniform(0.16, 0.28) * sr), n - pos)
+        t = np.arange(m) / sr
+        pitch = f0 * (1 + 0.15 * math.sin(2 * math.pi * 0.6 * pos / sr)) * rng.normal(1, 0.04)
+        pulses = np.diff(np.floor(np.cumsum(np.full(m, pitch)) / sr), prepend=0.0)
+        # vocal tract: formant resonances on a falling spectral tilt, applied in frequency
+        freqs = np.fft.rfftfreq(m, 1 / sr)
+        tract = np.zeros_like(freqs)
+        for formant, bandwidth in zip(
+            (*_VOWELS[rng.integers(len(_VOWELS))], 3300), (60, 90, 120, 200), strict=True
+        ):
+            tract += 1 / (1 + ((freqs - formant) / (bandwidth / 2)) ** 2)
+        tract /= np.sqrt(1 + (freqs / 150) ** 2)
+        syllable = np.fft.irfft(np.fft.rfft(pulses) * tract, m)
+        syllable /= np.abs(syllable).max() + 1e-9
+        syllable *= np.minimum(1, np.minimum(t / 0.03, (t[-1] - t) / 0.05))
+        onset = int(0.2 * m)  # consonant-like noise burst
+        syllable[:onset] = 0.15 * rng.standard_normal(onset) * np.hanning(onset)
+        out[pos : pos + m] = syllable
+        pos += m
+    return (out / np.abs(out).max() * 0.5 * 32767).astype(np.int16)
+
+
+def _read_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError(f"{path}: need 16-bit mono WAV")
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        rate = wf.getframerate()
+    if rate != CALLER_SAMPLE_RATE:
+        from piper_resample import PolyphaseResampler
+
+        rs = PolyphaseResampler(rate, CALLER_SAMPLE_RATE)
+        audio = np.frombuffer(rs.push(audio.tobytes()) + rs.flush(), dtype=np.int16)
+    return audio
+
+
+class SyntheticCaller(io.AudioInput):
+    """Real-time caller audio: silence, an utterance, then waits for the agent's answer."""
+
+    def __init__(
+        self,
+        session: Any,
+        utterances: list[np.ndarray],
+        *,
+        turns: int,
+        think_s: float,
+        reply_timeout_s: float,
+    ) -> None:
+        super().__init__(label="SyntheticCaller")
+        self._session = session
+        self._utterances = utterances
+        self._turns = turns
+        self._think_s = think_s
+        self._reply_timeout_s = reply_timeout_s
+        self._spf = CALLER_SAMPLE_RATE * CALLER_FRAME_MS // 1000
+        self._silence = np.zeros(self._spf, dtype=np.int16)
+        self._current: np.ndarray | None = None  # utterance being spoken
+        self._pos = 0
+        self._spoken = 0
+        self._last_agent_audio = time.perf_counter()
+        self._greeted = False  # callers wait for the greeting before speaking
+        self._awaiting_reply_since: float | None = None
+        self._speech_ended_at: float | None = None
+        self._next_frame_at: float | None = None
+        self.done = asyncio.Event()
+        self.latencies: list[float] = []  # end of caller speech -> first agent audio frame
+        self.missed = 0  # utterances the agent never answered
+
+    def agent_audio_started(self) -> None:
+        """Called by PacedAudioOutput when agent audio reaches the caller."""
+        now = time.perf_counter()
+        self._last_agent_audio = now
+        self._greeted = True
+        if self._speech_ended_at is not None:
+            self.latencies.append(now - self._speech_ended_at)
+            self._speech_ended_at = None
+            self._awaiting_reply_since = None
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        now = time.perf_counter()
+        if self._next_frame_at is None:
+            self._next_frame_at = now
+        self._next_frame_at += CALLER_FRAME_MS / 1000
+        if self._next_frame_at > now:
+            await asyncio.sleep(self._next_frame_at - now)
+        # a lagging loop delivers the backlog in a burst, as a jitter buffer would
+        return rtc.AudioFrame(self._next_samples().tobytes(), CALLER_SAMPLE_RATE, 1, self._spf)
+
+    def _next_samples(self) -> np.ndarray:
+        if self._current is not None:
+            chunk = self._current[self._pos : self._pos + self._spf]
+            self._pos += self._spf
+            if self._pos >= len(self._current):
+                self._current = None
+                self._speech_ended_at = time.perf_counter()
+                self._awaiting_reply_since = self._speech_ended_at
+            if len(chunk) < self._spf:
+                chunk = np.pad(chunk, (0, self._spf - len(chunk)))
+            return chunk
+
+        now = time.perf_counter()
+        if self._awaiting_reply_since is not None:
+            if now - self._awaiting_reply_since < self._reply_timeout_s:
+                return self._silence
+            self.missed += 1
+            self._speech_ended_at = self._awaiting_reply_since = None
+        if not self._greeted or self._session.agent_state != "listening":
+            self._last_agent_audio = now
+            return self._silence
+        if now - self._last_agent_audio < self._think_s:
+            return self._silence
+        if self._spoken >= self._turns:
+            self.done.set()
+            return self._silence
+        self._current = self._utterances[self._spoken % len(self._utterances)]
+        self._pos = 0
+        self._spoken += 1
+        return self._silence
+
+
+class PacedAudioOutput(io.AudioOutput):
+    """Plays agent audio against a real-time clock instead of publishing a track."""
+
+    def __init__(self, *, sample_rate: int, on_first_frame: Callable[[], None]) -> None:
+        super().__init__(
+            label="PacedAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=True),
+            sample_rate=sample_rate,
+        )
+        self._on_first_frame = on_first_frame
+        self._play_until = 0.0  # monotonic time the buffered audio finishes
+        self._pushed = 0.0
+        self._segment_started = False
+        self._paused_at: float | None = None
+        self._playing = asyncio.Event()
+        self._playing.set()
+        self._interrupted = asyncio.Event()
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def _now(self) -> float:
+        return self._paused_at if self._paused_at is not None else time.monotonic()
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        await self._playing.wait()
+        now = time.monotonic()
+        if not self._segment_started:
+            self._segment_started = True
+            self.on_playback_started(created_at=time.time())
+            self._on_first_frame()
+        self._play_until = max(self._play_until, now) + frame.duration
+        self._pushed += frame.duration
+        ahead = self._play_until - now - OUTPUT_QUEUE_S
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._segment_started:
+            return
+        self._segment_started = False
+        self._flush_task = asyncio.create_task(self._wait_for_playout())
+
+    def clear_buffer(self) -> None:
+        if self._pushed:
+            self._interrupted.set()
+
+    def pause(self) -> None:
+        super().pause()
+        if self._paused_at is None:
+            self._paused_at = time.monotonic()
+            self._playing.clear()
+
+    def resume(self) -> None:
+        super().resume()
+        if self._paused_at is not None:
+            self._play_until += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self._playing.set()
+
+    async def _wait_for_playout(self) -> None:
+        interrupted = False
+        while not interrupted:
+            await self._playing.wait()
+            remaining = self._play_until - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._interrupted.wait(), remaining)
+                interrupted = True
+            except TimeoutError:
+                pass  # played out, unless a pause moved the end
+        position = self._pushed - max(0.0, self._play_until - self._now())
+        if interrupted:
+            self._play_until = self._now()
+        self._pushed = 0.0
+        self._interrupted.clear()
+        self.on_playback_finished(playback_position=position, interrupted=interrupted)
+
+
+# ── One process worth of calls ───────────────────────────────────────────
+
+
+class _TurnCollector:
+    """SessionMetrics sink that keeps the turn records in memory."""
+
+    def __init__(self) -> None:
+        self.turns: list[dict[str, Any]] = []
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.turns.append(record)
+
+
+class _LoopLag:
+    """Samples how late the event loop wakes up (a saturated loop delays audio frames)."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self._interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            self.samples.append(time.perf_counter() - start - self._interval)
+
+    async def stop(self) -> None:
+        if self._task:
+            await utils.aio.cancel_and_wait(self._task)
+
+
+def _caller_utterances(cfg: LoadTestConfig, seed: int) -> list[np.ndarray]:
+    if cfg.caller_wav:
+        return [_read_wav(p) for p in cfg.caller_wav]
+    rng = random.Random(seed)
+    return [
+        synth_utterance(rng.uniform(1.0, 2.2), f0=rng.uniform(105, 135), seed=seed * 100 + i)
+        for i in range(3)
+    ]
+
+
+async def run_call(
+    index: int, cfg: LoadTestConfig, *, vad: Any, userdata: dict[str, Any], registry: Any
+) -> dict[str, Any]:
+    """One call; returns its latencies and per-turn stage records."""
+    import agent
+    from voice_metrics import SessionMetrics
+
+    model_path = cfg.model_path or agent.get_piper_model_path() or "fake.onnx"
+    session = agent.build_session(
+        stt=StubSTT(latency=cfg.stt_latency, lines=CALLER_LINES, offset=index),
+        llm=StubLLM(
+            ttft=cfg.llm_ttft, tokens_per_s=cfg.llm_tokens_per_s, replies=REPLIES, offset=index
+        ),
+        tts=agent.build_piper_tts(model_path, userdata, registry=registry, cache=None),
+        vad=vad,
+        turn_detection="vad",
+    )
+    caller = SyntheticCaller(
+        session,
+        _caller_utterances(cfg, cfg.seed + index),
+        turns=cfg.turns,
+        think_s=cfg.think_s,
+        reply_timeout_s=cfg.reply_timeout_s,
+    )
+    session.input.audio = caller
+    session.output.audio = PacedAudioOutput(
+        sample_rate=agent.PIPER_OUTPUT_SAMPLE_RATE, on_first_frame=caller.agent_audio_started
+    )
+    collector = _TurnCollector()
+    session_metrics = SessionMetrics(session, sink=collector, room=f"loadtest-{index}")  # type: ignore[arg-type]
+    session_metrics.attach()
+
+    await session.start(agent=agent.Assistant())
+    budget = cfg.turns * (cfg.reply_timeout_s + 10.0) + 30.0
+    try:
+        await asyncio.wait_for(caller.done.wait(), budget)
+    except TimeoutError:
+        caller.missed += cfg.turns - len(caller.latencies)
+    await session.aclose()
+    session_metrics.flush()
+    return {
+        "latencies": caller.latencies,
+        "missed": caller.missed,
+        "turns": collector.turns,
+    }
+
+
+def _load_models(cfg: LoadTestConfig) -> tuple[Any, dict[str, Any], Any]:
+    """VAD, userdata and voice registry for one process, as agent.prewarm sets them up."""
+    from livekit.plugins import silero
+
+    import agent
+    from piper_executor import InferenceExecutor
+    from piper_voices import VoiceRegistry, voice_registry
+
+    vad = silero.VAD.load()
+    workers = cfg.tts_workers or agent.TTS_INFERENCE_WORKERS
+    userdata: dict[str, Any] = {"tts_executor": InferenceExecutor(workers)}
+    model_path = cfg.model_path or agent.get_piper_model_path()
+    if model_path and not cfg.fake_voice:
+        voice_registry.preload(model_path, agent.PIPER_VOICE_OPTIONS)
+        return vad, userdata, voice_registry
+
+    from fake_piper_voice import FakePiperVoice
+
+    fake = FakePiperVoice(seconds_per_char=cfg.fake_seconds_per_char)
+    return vad, userdata, VoiceRegistry(loader=lambda path, options: fake)
+
+
+async def run_calls(calls: list[int], cfg: LoadTestConfig, barrier: Any = None) -> dict[str, Any]:
+    """Run `calls` concurrently in this process; returns results plus process usage."""
+    vad, userdata, registry = _load_models(cfg)
+    if barrier is not None:
+        await asyncio.to_thread(barrier.wait)  # every process loaded: start together
+
+    proc = psutil.Process()
+    cpu_start = sum(proc.cpu_times()[:2])
+    peak_rss = proc.memory_info().rss
+    lag = _LoopLag()
+    lag.start()
+
+    async def _sample_rss() -> None:
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, proc.memory_info().rss)
+            await asyncio.sleep(0.5)
+
+    rss_task = asyncio.create_task(_sample_rss())
+    rng = random.Random(cfg.seed)
+
+    async def _staggered(i: int) -> dict[str, Any]:
+        await asyncio.sleep(rng.uniform(0, cfg.ramp_s))
+        return await run_call(i, cfg, vad=vad, userdata=userdata, registry=registry)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_staggered(i) for i in calls))
+    wall = time.perf_counter() - start
+    await utils.aio.cancel_and_wait(rss_task)
+    await lag.stop()
+    userdata["tts_executor"].shutdown()
+    return {
+        "calls": results,
+        "cpu_s": sum(proc.cpu_times()[:2]) - cpu_start,
+        "wall_s": wall,
+        "peak_rss": peak_rss,
+        "loop_lag": lag.samples,
+    }
+
+
+def _process_main(calls: list[int], cfg_dict: dict[str, Any], barrier: Any) -> dict[str, Any]:
+    return asyncio.run(run_calls(calls, LoadTestConfig(**cfg_dict), barrier))
+
+
+# ── Levels and report ────────────────────────────────────────────────────
+
+
+def _pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def summarize(n_calls: int, processes: list[dict[str, Any]], turns: int) -> dict[str, Any]:
+    calls = [c for p in processes for c in p["calls"]]
+    e2e = [x * 1000 for c in calls for x in c["latencies"]]
+    records = [t for c in calls for t in c["turns"]]
+    wall = max(p["wall_s"] for p in processes)
+    cpu = sum(p["cpu_s"] for p in processes)
+    lag = [x * 1000 for p in processes for x in p["loop_lag"]]
+    level: dict[str, Any] = {
+        "calls": n_calls,
+        "processes": len(processes),
+        "answered": len(e2e),
+        "expected": n_calls * turns,
+        "missed": sum(c["missed"] for c in calls),
+        "e2e_p50_ms": _pct(e2e, 50),
+        "e2e_p95_ms": _pct(e2e, 95),
+        "e2e_p99_ms": _pct(e2e, 99),
+    }
+    for stage in ("eou", "stt", "llm_ttft", "tts_ttfb", "response"):
+        values = [r[stage] * 1000 for r in records if stage in r]
+        level[f"{stage}_p50_ms"] = _pct(values, 50)
+        level[f"{stage}_p95_ms"] = _pct(values, 95)
+    level.update(
+        cpu_cores=cpu / wall,
+        cpu_cores_per_call=cpu / wall / n_calls,
+        rss_mb=sum(p["peak_rss"] for p in processes) / 2**20,  # shared pages counted per process
+        rss_mb_per_process=max(p["peak_rss"] for p in processes) / 2**20,
+        loop_lag_p99_ms=_pct(lag, 99),
+        wall_s=wall,
+    )
+    return level
+
+
+def run_level(n_calls: int, cfg: LoadTestConfig, calls_per_process: int) -> dict[str, Any]:
+    groups = [
+        list(range(i, min(i + calls_per_process, n_calls)))
+        for i in range(0, n_calls, calls_per_process)
+    ]
+    if len(groups) == 1:
+        processes = [asyncio.run(run_calls(groups[0], cfg))]
+    else:
+        ctx = get_context("spawn")
+        with ctx.Manager() as manager, ProcessPoolExecutor(len(groups), mp_context=ctx) as pool:
+            barrier = manager.Barrier(len(groups))
+            futures = [pool.submit(_process_main, g, asdict(cfg), barrier) for g in groups]
+            processes = [f.result() for f in futures]
+    return summarize(n_calls, processes, cfg.turns)
+
+
+def capacity(levels: list[dict[str, Any]], slo_ms: float) -> int:
+    """Largest tested call count whose p95 mouth-to-ear latency meets the SLO, none missed."""
+    ok = [
+        lvl["calls"]
+        for lvl in levels
+        if not lvl["missed"] and lvl["e2e_p95_ms"] is not None and lvl["e2e_p95_ms"] <= slo_ms
+    ]
+    return max(ok, default=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--calls-per-process", type=int, default=1)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-ttft", type=float, default=0.5)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=40.0)
+    parser.add_argument("--model", help="Piper .onnx model (default: agent's model if present)")
+    parser.add_argument("--fake-voice", action="store_true", help="use FakePiperVoice")
+    parser.add_argument("--fake-seconds-per-char", type=float, default=0.0005)
+    parser.add_argument("--tts-workers", type=int, help="inference workers per process")
+    parser.add_argument("--caller-wav", nargs="*", default=[], help="16-bit mono WAV files")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 mouth-to-ear target")
+    parser.add_argument("--json", type=Path, help="write results here")
+    args = parser.parse_args()
+
+    cfg = LoadTestConfig(
+        turns=args.turns,
+        stt_latency=args.stt_latency,
+        llm_ttft=args.llm_ttft,
+        llm_tokens_per_s=args.llm_tokens_per_s,
+        model_path=args.model,
+        fake_voice=args.fake_voice,
+        fake_seconds_per_char=args.fake_seconds_per_char,
+        tts_workers=args.tts_workers,
+        caller_wav=args.caller_wav,
+    )
+    print(
+        f"{'calls':>6}{'procs':>6}{'answered':>10}{'e2e p50':>9}{'e2e p95':>9}"
+        f"{'ttfb p95':>10}{'cores':>7}{'RSS MB':>8}{'lag p99':>9}"
+    )
+    levels = []
+    for n in (int(c) for c in args.calls.split(",")):
+        lvl = run_level(n, cfg, args.calls_per_process)
+        levels.append(lvl)
+        print(
+            f"{lvl['calls']:>6}{lvl['processes']:>6}{lvl['answered']:>6}/{lvl['expected']:<3}"
+            f"{_fmt(lvl['e2e_p50_ms']):>9}{_fmt(lvl['e2e_p95_ms']):>9}"
+            f"{_fmt(lvl['tts_ttfb_p95_ms']):>10}{lvl['cpu_cores']:>7.2f}{lvl['rss_mb']:>8.0f}"
+            f"{_fmt(lvl['loop_lag_p99_ms']):>9}",
+            flush=True,
+        )
+    cap = capacity(levels, args.slo_ms)
+    print(f"capacity: {cap} calls per host within p95 {args.slo_ms:.0f} ms")
+
+    if args.json:
+        result = {
+            "meta": {
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "config": asdict(cfg),
+                "calls_per_process": args.calls_per_process,
+                "slo_ms": args.slo_ms,
+            },
+            "levels": levels,
+            "capacity": cap,
+        }
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+def _fmt(ms: float | None) -> str:
+    return "-" if ms is None else f"{ms:.0f}"
+
+
+if __name__ == "__main__":
+    main()
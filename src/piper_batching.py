@@ -0,0 +1,222 @@
+"""Cross-session micro-batching of Piper ONNX inference.
+
+With many calls live in one worker process, every stream sends its own single-sentence
+`session.run`. BatchingEngine collects sentence requests from all sessions for a few
+milliseconds, pads them into one batched run, and scatters the audio back to each caller.
+Each caller still gets its own sentences in order, because it blocks on them one by one.
+
+Opt-in: batching trades a few ms of first-byte latency for per-core throughput, so choose
+the window with bench_piper_batching.py on the target hardware. Each row's audio is cut at
+the length its phoneme durations add up to; models exported without a durations output
+give no way to tell a row's end from padding, so their sentences run one at a time.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from piper_frontend import audio_to_pcm, frontend_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MS = 4.0
+DEFAULT_MAX_BATCH = 8
+DEFAULT_RUNNERS = 1
+
+
+@dataclass
+class _Request:
+    phoneme_ids: list[int]
+    scales: tuple[float, float, float]
+    speaker_id: int | None
+    future: concurrent.futures.Future[np.ndarray] = field(default_factory=concurrent.futures.Future)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    items: int = 0
+    max_batch: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+
+class BatchingEngine:
+    """Batches phoneme-id inference requests for one voice across threads/sessions."""
+
+    def __init__(
+        self,
+        voice: Any,
+        *,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        runners: int = DEFAULT_RUNNERS,
+    ) -> None:
+        self._voice = voice
+        self._window = window_ms / 1000.0
+        self._max_batch = max(1, max_batch)
+        self._runners = max(1, runners)  # batches that may run concurrently
+        self._queue: queue.Queue[_Request | None] = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = BatchStats()
+        outputs = voice.session.get_outputs()
+        self.batches = len(outputs) > 1  # a durations output after the audio
+        if not self.batches:
+            logger.info("Piper model has no durations output; inference is not batched")
+
+    @property
+    def voice(self) -> Any:
+        return self._voice
+
+    def stats(self) -> BatchStats:
+        with self._lock:
+            return BatchStats(**vars(self._stats))
+
+    def infer(self, phoneme_ids: list[int], syn_config: Any = None) -> np.ndarray:
+        """Blocking: float audio for one sentence, computed in whichever batch it lands in."""
+        cfg = self._voice.config
+        length_scale = getattr(syn_config, "length_scale", None) or cfg.length_scale
+        noise_scale = getattr(syn_config, "noise_scale", None) or cfg.noise_scale
+        noise_w_scale = getattr(syn_config, "noise_w_scale", None) or cfg.noise_w_scale
+        speaker_id = getattr(syn_config, "speaker_id", None)
+        if cfg.num_speakers <= 1:
+            speaker_id = None
+        elif speaker_id is None:
+            speaker_id = 0
+
+        request = _Request(
+            phoneme_ids=phoneme_ids,
+            scales=(noise_scale, length_scale, noise_w_scale),
+            speaker_id=speaker_id,
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingEngine is closed")
+            if not self._threads:
+                for i in range(self._runners):
+                    t = threading.Thread(
+                        target=self._batch_loop, name=f"piper-batching-{i}", daemon=True
+                    )
+                    t.start()
+                    self._threads.append(t)
+        self._queue.put(request)
+        return request.future.result()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join()
+
+    def _batch_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self._window
+            stop = False
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            # requests with different scales/speaker can't share one run
+            groups: dict[tuple[Any, ...], list[_Request]] = {}
+            for i, req in enumerate(batch):
+                key = (req.scales, req.speaker_id) if self.batches else (i,)
+                groups.setdefault(key, []).append(req)
+            for group in groups.values():
+                self._run_batch(group)
+            if stop:
+                return
+
+    def _run_batch(self, group: list[_Request]) -> None:
+        lengths = [len(r.phoneme_ids) for r in group]
+        ids = np.zeros((len(group), max(lengths)), dtype=np.int64)  # 0 = Piper's pad id
+        for i, r in enumerate(group):
+            ids[i, : lengths[i]] = r.phoneme_ids
+        args = {
+            "input": ids,
+            "input_lengths": np.array(lengths, dtype=np.int64),
+            "scales": np.array(group[0].scales, dtype=np.float32),
+        }
+        if group[0].speaker_id is not None:
+            args["sid"] = np.full(len(group), group[0].speaker_id, dtype=np.int64)
+
+        try:
+            result = self._voice.session.run(None, args)
+        except Exception as e:  # noqa: BLE001 - delivered to every waiting caller
+            for r in group:
+                r.future.set_exception(e)
+            return
+
+        audio = result[0].reshape(len(group), -1)
+        durations = result[1].reshape(len(group), -1) if len(result) > 1 else None
+        hop_length = self._voice.config.hop_length
+        for i, r in enumerate(group):
+            n = audio.shape[1]  # a single row has no padding
+            if durations is not None:
+                n = int(durations[i, : lengths[i]].sum() * hop_length)
+            r.future.set_result(audio[i, :n].copy())  # copy: don't pin the whole batch buffer
+
+        with self._lock:
+            self._stats.batches += 1
+            self._stats.items += len(group)
+            self._stats.max_batch = max(self._stats.max_batch, len(group))
+
+
+def _phoneme_ids(voice: Any, text: str) -> list[list[int]]:
+    """What PiperVoice.synthesize feeds the model for `text`, one list per sentence."""
+    return [voice.phonemes_to_ids(p) for p in voice.phonemize(text) if p]
+
+
+def synthesize_batched(
+    engine: BatchingEngine,
+    text: str,
+    syn_config: Any = None,
+    on_audio: Callable[[bytes], None] | None = None,
+    abort: threading.Event | None = None,
+    *,
+    frontend: bool = False,
+) -> list[bytes]:
+    """Batched equivalent of PiperVoice.synthesize, or with `frontend` of
+    piper_frontend.synthesize_pcm (normalised text, cached phoneme ids)."""
+    voice = engine.voice
+    sentences = frontend_for(voice).phoneme_ids(text) if frontend else _phoneme_ids(voice, text)
+    parts: list[bytes] = []
+    for phoneme_ids in sentences:
+        if abort is not None and abort.is_set():
+            break
+        audio = engine.infer(list(phoneme_ids), syn_config)
+        pcm = audio_to_pcm(audio, syn_config)
+        if not pcm:
+            continue
+        parts.append(pcm)
+        if on_audio is not None:
+            on_audio(pcm)
+    return parts
@@ -0,0 +1,246 @@
+"""Content-addressed PCM cache for Piper TTS.
+
+Synthesized chunks are keyed on (model file, synthesis params, normalized text) and kept
+as raw 16-bit PCM in a byte-bounded in-process LRU. An optional on-disk tier spills entries
+to a directory shared by every worker process on the host, so the greeting and common
+acknowledgements are synthesized once per host instead of once per call. Only the memory
+tier is touched inline: disk lookups from the event loop go through `aget` (a worker
+thread), and disk stores and eviction run on the cache's own writer thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024  # ~12 min of 22050 Hz mono int16
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+DISK_LOW_WATER = 0.9  # eviction frees down to this share, so it rescans only now and then
+PCM_SUFFIX = ".pcm"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text for cache lookups (unicode form + whitespace only)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Identify a model file by path, size and mtime so a replaced model never hits stale audio."""
+    path = Path(model_path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        return str(path)
+    return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def cache_key(model_id: str, params: Mapping[str, Any], text: str) -> str:
+    payload = json.dumps(
+        {"model": model_id, "params": dict(params), "text": normalize_text(text)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+    memory_bytes: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "hits": self.hits, "hit_rate": self.hit_rate}
+
+
+class PCMCache:
+    """Two-tier (memory LRU + shared disk directory) cache of raw PCM chunks.
+
+    Thread-safe. `put` never blocks on disk, `get` may (use `aget` on the event loop).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        disk_dir: str | Path | None = None,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+    ) -> None:
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._disk_dir: Path | None = None
+        self._disk_bytes = 0
+        self._writer: concurrent.futures.ThreadPoolExecutor | None = None
+        if disk_dir is not None:
+            self._disk_dir = Path(disk_dir)
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            self._writer = concurrent.futures.ThreadPoolExecutor(1, "pcm-cache-writer")
+
+    def get(self, key: str) -> bytes | None:
+        pcm = self._get_memory(key)
+        return pcm if pcm is not None else self._get_disk(key)
+
+    async def aget(self, key: str) -> bytes | None:
+        """`get` for the event loop: a memory hit inline, the disk tier in a thread."""
+        pcm = self._get_memory(key)
+        if pcm is not None or self._disk_dir is None:
+            return pcm if pcm is not None else self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def put(self, key: str, pcm: bytes) -> None:
+        if not pcm:
+            return
+        with self._lock:
+            self._stats.stores += 1
+            self._insert_memory(key, pcm)
+        if self._writer is not None and len(pcm) <= self._max_disk_bytes:
+            self._writer.submit(self._write_disk, key, pcm)
+
+    def flush(self) -> None:
+        """Block until queued disk stores are written."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._stats.memory_bytes = self._memory_bytes
+            return CacheStats(**asdict(self._stats))
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    # ── memory tier ──────────────────────────────────────────────
+    def _get_memory(self, key: str) -> bytes | None:
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self._stats.memory_hits += 1
+            return pcm
+
+    def _insert_memory(self, key: str, pcm: bytes) -> None:
+        if len(pcm) > self._max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = pcm
+        self._memory_bytes += len(pcm)
+        while self._memory_bytes > self._max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats.memory_evictions += 1
+
+    # ── disk tier ────────────────────────────────────────────────
+    def _disk_path(self, key: str) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / f"{key}{PCM_SUFFIX}"
+
+    def _get_disk(self, key: str) -> bytes | None:
+        pcm = self._read_disk(key)
+        with self._lock:
+            if pcm is None:
+                self._stats.misses += 1
+                return None
+            self._stats.disk_hits += 1
+            self._insert_memory(key, pcm)
+        return pcm
+
+    def _read_disk(self, key: str) -> bytes | None:
+        if self._disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pcm = bytes(mm)
+            os.utime(path)  # mtime doubles as LRU timestamp for eviction
+        except (OSError, ValueError):
+            return None
+        return pcm
+
+    def _write_disk(self, key: str, pcm: bytes) -> None:
+        """Writer thread: store one entry, evicting if the directory went over budget."""
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        tmp: str | None = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self._disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("PCM cache disk write failed: %s", e)
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_bytes += len(pcm)
+            over = self._disk_bytes > self._max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _scan_disk(self) -> list[tuple[Path, int, float]]:
+        assert self._disk_dir is not None
+        entries = []
+        for path in self._disk_dir.glob(f"*{PCM_SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict_disk(self) -> None:
+        # Other processes write to the same directory, so rescan instead of trusting our count.
+        entries = sorted(self._scan_disk(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self._max_disk_bytes * DISK_LOW_WATER if total > self._max_disk_bytes else total
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._stats.disk_evictions += evicted
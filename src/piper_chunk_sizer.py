@@ -0,0 +1,122 @@
+"""Adaptive chunk sizing from measured synthesis speed.
+
+The first chunk of a reply should be as small as possible (its synthesis time is the
+first-byte latency) but still long enough that its audio covers synthesis of the next
+chunk; later chunks should be long enough that per-call overhead never lets playback
+catch up with synthesis. Both depend on how fast this host synthesizes right now, so
+ChunkSizer fits `synth_seconds = overhead + seconds_per_char * chars` from recent chunks
+and derives the limits from it, scaled by the inference queue depth at decision time.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+MIN_FIRST_CHARS = 20  # shorter openings lose their prosody
+MAX_FIRST_CHARS = 80
+MIN_CHUNK_CHARS = 40
+MAX_CHUNK_LIMIT = 200
+FIRST_CHUNK_BUDGET_S = 0.35  # first chunk synthesis time we aim to stay under
+UNDERRUN_MARGIN = 1.5  # audio per chunk >= margin x next chunk's synthesis time
+MIN_OBSERVATIONS = 3  # keep the static limits until the fit has this many chunks
+DECAY = 0.85  # weight of history per new observation (~7 chunk memory)
+
+
+@dataclass(frozen=True)
+class ChunkSizes:
+    first_max_chars: int
+    max_chars: int
+
+
+@dataclass
+class ChunkSizerMetrics:
+    observations: int
+    rtf: float  # EWMA synthesis seconds / audio seconds (1.0 = real time)
+    seconds_per_char: float
+    overhead_s: float
+    audio_per_char: float
+    load: float  # queue factor applied to the last decision
+    first_max_chars: int
+    max_chars: int
+
+
+class ChunkSizer:
+    """Per-session chunk size controller (one per PiperTTS instance)."""
+
+    def __init__(self, *, first_max_chars: int, max_chars: int) -> None:
+        self._default = ChunkSizes(first_max_chars, max_chars)
+        self._last = self._default
+        self._load = 1.0
+        self._n = 0
+        # exponentially weighted sums for the least-squares fit and the ratios
+        self._w = self._sc = self._st = self._scc = self._sct = 0.0
+        self._audio = self._synth = self._chars = 0.0
+
+    def observe(self, chars: int, audio_s: float, synth_s: float) -> None:
+        """Record one synthesized chunk (cache hits shouldn't be reported)."""
+        if chars <= 0 or audio_s <= 0:
+            return
+        d = DECAY
+        self._n += 1
+        self._w = d * self._w + 1.0
+        self._sc = d * self._sc + chars
+        self._st = d * self._st + synth_s
+        self._scc = d * self._scc + chars * chars
+        self._sct = d * self._sct + chars * synth_s
+        self._audio = d * self._audio + audio_s
+        self._synth = d * self._synth + synth_s
+        self._chars = d * self._chars + chars
+
+    def _fit(self) -> tuple[float, float]:
+        """(overhead_s, seconds_per_char); falls back to a pure per-char rate."""
+        var = self._w * self._scc - self._sc * self._sc
+        if var > 1e-9 * self._w * self._scc:
+            slope = (self._w * self._sct - self._sc * self._st) / var
+            overhead = (self._st - slope * self._sc) / self._w
+            if slope > 0 and overhead >= 0:
+                return overhead, slope
+        return 0.0, self._synth / self._chars
+
+    def sizes(self, *, queue_depth: int = 0, workers: int = 1) -> ChunkSizes:
+        """Limits for the next reply. `queue_depth`/`workers` describe the executor now."""
+        if self._n < MIN_OBSERVATIONS:
+            return self._default
+        # queued work ahead of us stretches synthesis time roughly proportionally
+        self._load = 1.0 + queue_depth / max(1, workers)
+        overhead, per_char = self._fit()
+        overhead *= self._load
+        per_char = max(per_char * self._load, 1e-6)
+        audio_per_char = self._audio / self._chars
+
+        # later chunks: audio(c) >= margin * synth(c)  =>  c >= m*o / (a - m*s)
+        headroom = audio_per_char - UNDERRUN_MARGIN * per_char
+        if headroom <= 0:
+            max_chars = MAX_CHUNK_LIMIT  # slower than real time: fewer, longer calls
+        else:
+            needed = UNDERRUN_MARGIN * overhead / headroom
+            max_chars = max(self._default.max_chars, MIN_CHUNK_CHARS, math.ceil(needed))
+        max_chars = min(max_chars, MAX_CHUNK_LIMIT)
+
+        # first chunk: its audio must cover the second chunk's synthesis ...
+        covering = UNDERRUN_MARGIN * (overhead + per_char * max_chars) / audio_per_char
+        # ... but its own synthesis should fit the first-byte budget
+        budget = (FIRST_CHUNK_BUDGET_S - overhead) / per_char
+        first = max(math.ceil(covering), MIN_FIRST_CHARS)
+        first = min(first, max(MIN_FIRST_CHARS, math.floor(budget)), MAX_FIRST_CHARS)
+
+        self._last = ChunkSizes(first, max_chars)
+        return self._last
+
+    def metrics(self) -> ChunkSizerMetrics:
+        overhead, per_char = self._fit() if self._n else (0.0, 0.0)
+        return ChunkSizerMetrics(
+            observations=self._n,
+            rtf=self._synth / self._audio if self._audio else 0.0,
+            seconds_per_char=per_char,
+            overhead_s=overhead,
+            audio_per_char=self._audio / self._chars if self._chars else 0.0,
+            load=self._load,
+            first_max_chars=self._last.first_max_chars,
+            max_chars=self._last.max_chars,
+        )
@@ -0,0 +1,155 @@
+"""Dedicated thread pool for Piper inference with a priority queue.
+
+Inference used to go through asyncio.to_thread, i.e. the loop's default executor shared
+with everything else. Here it gets its own workers, and queued work is ordered by
+priority so a session's first chunk (the one the caller is waiting on) jumps ahead of
+tail chunks from other sessions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import os
+import queue
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PRIORITY_FIRST_CHUNK = 0  # lower runs first; later chunks use their index
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass(order=True)
+class _WorkItem:
+    priority: int
+    seq: int
+    fn: Callable[..., Any] | None = field(compare=False)
+    args: tuple[Any, ...] = field(compare=False, default=())
+    future: concurrent.futures.Future[Any] | None = field(compare=False, default=None)
+
+
+class InferenceExecutor:
+    """Fixed-size worker pool draining a priority queue (FIFO within a priority)."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, *, name: str = "piper-tts") -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._max_workers = max_workers
+        self._name = name
+        self._queue: queue.PriorityQueue[_WorkItem] = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._busy = 0
+        self._completed = 0
+        self._pending = 0  # queued and not cancelled
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def queue_depth(self) -> int:
+        """Work items waiting for a worker (excludes running and cancelled ones)."""
+        return self._pending
+
+    @property
+    def busy_workers(self) -> int:
+        return self._busy
+
+    def submit(
+        self, fn: Callable[..., T], *args: Any, priority: int = PRIORITY_FIRST_CHUNK
+    ) -> concurrent.futures.Future[T]:
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(f"{self._name} executor is shut down")
+            self._queue.put(_WorkItem(priority, next(self._seq), fn, args, future))
+            self._pending += 1
+            if len(self._threads) < self._max_workers:
+                self._start_worker()
+        # a cancelled item stays in the heap until a worker skips it; stop counting it now
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: concurrent.futures.Future[Any]) -> None:
+        if future.cancelled():  # only possible before it started
+            with self._lock:
+                self._pending -= 1
+
+    async def run(
+        self, fn: Callable[..., T], *args: Any, priority: int = PRIORITY_FIRST_CHUNK
+    ) -> T:
+        """Run `fn(*args)` on the pool. Cancelling the awaiting task drops it from the queue
+        if it hasn't started yet."""
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self._max_workers,
+            "busy": self._busy,
+            "queued": self.queue_depth,
+            "completed": self._completed,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            # sentinels sort after every real priority
+            self._queue.put(_WorkItem(2**62, next(self._seq), None))
+        if wait:
+            for t in threads:
+                t.join()
+
+    def _start_worker(self) -> None:
+        t = threading.Thread(
+            target=self._worker, name=f"{self._name}-{len(self._threads)}", daemon=True
+        )
+        self._threads.append(t)
+        t.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item.fn is None:
+                return
+            assert item.future is not None
+            if not item.future.set_running_or_notify_cancel():
+                continue  # cancelled while queued (already uncounted)
+            with self._lock:
+                self._pending -= 1
+                self._busy += 1
+            try:
+                item.future.set_result(item.fn(*item.args))
+            except BaseException as e:  # noqa: BLE001 - forwarded to the awaiting caller
+                item.future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._completed += 1
+
+
+_default_executor: InferenceExecutor | None = None
+_default_lock = threading.Lock()
+
+
+def default_executor() -> InferenceExecutor:
+    """Process-wide executor used by PiperTTS when none is passed explicitly."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = InferenceExecutor()
+        return _default_executor
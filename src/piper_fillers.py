@@ -0,0 +1,139 @@
+"""Prerendered filler phrases that cover slow LLM first tokens.
+
+While groq.LLM works on the first tokens of a reply the caller hears silence. FillerBank
+renders a handful of short Swiss German fillers with the loaded Piper voice once, in
+`prewarm`, and keeps their PCM in memory at the output sample rate. `mask_latency` wraps
+a TTS node: if no reply text has arrived `after_s` into the turn it plays one filler,
+completely, and then the real answer's audio, which kept synthesizing in the meantime.
+Playing a filler costs no inference.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Sequence
+from typing import Any
+
+from livekit import rtc
+from livekit.agents import utils
+
+from piper_resample import PolyphaseResampler
+from voice_metrics import record_filler
+
+logger = logging.getLogger(__name__)
+
+FILLER_PHRASES = (
+    "Moment bitte.",
+    "Gern, ich luege das grad noche.",
+    "Sekunde, bitte.",
+    "Jo, guet.",
+)
+FILLER_AFTER_S = 0.7  # LLM first-token latency above which a filler is played
+FRAME_SIZE_MS = 20
+
+
+class FillerBank:
+    """Filler clips as int16 mono PCM at `sample_rate`, handed out in rotation."""
+
+    def __init__(
+        self, clips: Sequence[bytes], *, sample_rate: int, frame_size_ms: int = FRAME_SIZE_MS
+    ) -> None:
+        self.clips = [clip for clip in clips if clip]
+        self.sample_rate = sample_rate
+        self._frame_size_ms = frame_size_ms
+        self._next = itertools.cycle(range(len(self.clips)))
+
+    @classmethod
+    def render(
+        cls,
+        voice: Any,
+        phrases: Sequence[str] = FILLER_PHRASES,
+        *,
+        sample_rate: int,
+        syn_config: Any = None,
+        frame_size_ms: int = FRAME_SIZE_MS,
+    ) -> FillerBank:
+        """Synthesize `phrases` with a loaded Piper voice (blocking; call from prewarm)."""
+        from piper_tts_plugin import PiperChunkedStream
+
+        start = time.perf_counter()
+        source_rate = voice.config.sample_rate
+        clips = []
+        for phrase in phrases:
+            pcm = b"".join(PiperChunkedStream._synthesize(voice, phrase, syn_config))
+            if sample_rate != source_rate:
+                resampler = PolyphaseResampler(source_rate, sample_rate)
+                pcm = resampler.push(pcm) + resampler.flush()
+            clips.append(pcm)
+        bank = cls(clips, sample_rate=sample_rate, frame_size_ms=frame_size_ms)
+        logger.info(
+            "Rendered %d filler phrases (%.1fs of audio) in %.2fs",
+            len(bank.clips),
+            bank.audio_seconds,
+            time.perf_counter() - start,
+        )
+        return bank
+
+    @property
+    def audio_seconds(self) -> float:
+        return sum(len(clip) for clip in self.clips) / 2 / self.sample_rate
+
+    def frames(self) -> list[rtc.AudioFrame]:
+        """The next filler as fixed-size frames (empty if the bank is empty)."""
+        if not self.clips:
+            return []
+        bstream = utils.audio.AudioByteStream(
+            sample_rate=self.sample_rate,
+            num_channels=1,
+            samples_per_channel=self.sample_rate * self._frame_size_ms // 1000,
+        )
+        clip = self.clips[next(self._next)]
+        return [*bstream.push(clip), *bstream.flush()]
+
+    async def mask_latency(
+        self,
+        text: AsyncIterable[str],
+        tts_node: Callable[[AsyncIterable[str]], AsyncIterable[rtc.AudioFrame]],
+        *,
+        after_s: float = FILLER_AFTER_S,
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        """Audio of `tts_node(text)`, preceded by a filler if `text` is slow to start."""
+        text_started = asyncio.Event()
+
+        async def _watch_text() -> AsyncIterator[str]:
+            try:
+                async for delta in text:
+                    text_started.set()
+                    yield delta
+            finally:
+                text_started.set()  # no text at all (e.g. a tool call): nothing to cover
+
+        # the reply's TTS runs from the start so its audio is ready when the filler ends
+        audio_ch = utils.aio.Chan[rtc.AudioFrame]()
+
+        async def _synthesize() -> None:
+            try:
+                async for frame in tts_node(_watch_text()):
+                    audio_ch.send_nowait(frame)
+            finally:
+                audio_ch.close()
+
+        task = asyncio.create_task(_synthesize(), name="FillerBank._synthesize")
+        try:
+            try:
+                await asyncio.wait_for(text_started.wait(), after_s)
+            except TimeoutError:
+                frames = self.frames()
+                if frames:
+                    record_filler()
+                    logger.debug("LLM slower than %.2fs, playing a filler", after_s)
+                for frame in frames:
+                    yield frame
+            async for frame in audio_ch:
+                yield frame
+            await task  # propagate TTS errors
+        finally:
+            await utils.aio.cancel_and_wait(task)
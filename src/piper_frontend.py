@@ -0,0 +1,385 @@
+"""Text frontend ahead of Piper inference: normalisation and cached phoneme ids.
+
+PiperVoice.synthesize phonemizes every chunk through espeak before ONNX runs, and
+espeak expands numbers on its own terms: phone numbers become one huge cardinal, times
+and Swiss prices come out inconsistently. TextFrontend
+
+1. normalises numbers, dates, times, prices, percentages and phone numbers into
+   speakable German (`normalize_german`),
+2. splits the result into sentences and looks each one up in a bounded LRU of phoneme-id
+   sequences, so greetings and stock phrases skip espeak entirely,
+3. hands the ids straight to the ONNX model (`synthesize_pcm`).
+
+Per-sentence time in each stage (normalize, phonemize, infer) and the cache hit rate are
+exported by voice_metrics.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from voice_metrics import record_frontend_stage, record_phoneme_cache
+
+PHONEME_CACHE_SIZE = 4096  # sentences per voice; ~100 ids each, a few MB at most
+
+# ── German number words ──────────────────────────────────────────────────
+_ONES = [
+    "null", "eins", "zwei", "drei", "vier", "fünf", "sechs", "sieben", "acht", "neun",
+    "zehn", "elf", "zwölf", "dreizehn", "vierzehn", "fünfzehn", "sechzehn", "siebzehn",
+    "achtzehn", "neunzehn",
+]  # fmt: skip
+_TENS = [
+    "", "", "zwanzig", "dreissig", "vierzig", "fünfzig", "sechzig", "siebzig", "achtzig",
+    "neunzig",
+]  # fmt: skip
+_MONTHS = [
+    "Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September",
+    "Oktober", "November", "Dezember",
+]  # fmt: skip
+_ORDINAL_IRREGULAR = {1: "erste", 3: "dritte", 7: "siebte", 8: "achte"}
+_DATIVE_BEFORE = {"am", "vom", "zum", "bis", "ab", "seit", "dem", "den", "im"}
+_WEEKDAYS = {
+    "montag", "dienstag", "mittwoch", "donnerstag", "freitag", "samstag", "sonntag",
+    "mo", "di", "mi", "do", "fr", "sa", "so",
+}  # fmt: skip
+# "12.3." is only a date after one of these; otherwise it is a number ("Kapitel 2.3.")
+_DATE_BEFORE = _DATIVE_BEFORE | _WEEKDAYS | {"per", "datum", "der"}
+# "2. Mal" is an ordinal after one of these (or at the start of a sentence)
+_ORDINAL_BEFORE = _DATIVE_BEFORE | {
+    "der", "die", "das", "des", "zur", "beim", "jeden", "jede", "jedes", "diesem", "diesen",
+    "dieser", "dieses", "diese",
+}  # fmt: skip
+_ORDINAL_WEAK_EN = _DATIVE_BEFORE | {"des", "zur", "beim", "jeden", "diesem", "diesen"}
+# "1 Person" -> "eine Person"; other nouns take "ein"
+_FEMININE_SUFFIXES = ("ung", "heit", "keit", "schaft", "ion", "tät", "ik", "ur", "e")
+_FEMININE_NOUNS = {"person", "nacht", "frau", "zeit", "stadt", "nummer", "praxis", "adresse"}
+# 1100-1999 read as a year only after one of these ("Zimmer 1234" is a count)
+_YEAR_BEFORE = {
+    "jahr", "jahre", "jahres", "seit", "gegründet", "anno", "im", "frühling", "sommer",
+    "herbst", "winter",
+}  # fmt: skip
+_SECTION_BEFORE = {"kapitel", "abschnitt", "artikel", "art", "ziffer", "punkt", "version"}
+_DIGITS = _ONES[:10]
+
+
+def number_to_words(n: int) -> str:
+    """Cardinal in German, e.g. 1291 -> "tausendzweihunderteinundneunzig"."""
+    if n < 0:
+        return "minus " + number_to_words(-n)
+    if n >= 10**9:
+        return " ".join(_DIGITS[int(d)] for d in str(n))
+    if n < 20:
+        return _ONES[n]
+    return _compound(n, final=True)
+
+
+def _compound(n: int, *, final: bool = False) -> str:
+    """Number word used inside a larger one: a 1 is "ein" ("hunderteintausend") unless it
+    ends the whole number (`final`: "hunderteins")."""
+    if n == 0:
+        return ""
+    if n == 1:
+        return "eins" if final else "ein"
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        ones, tens = n % 10, n // 10
+        return (f"{_compound(ones)}und" if ones else "") + _TENS[tens]
+    if n < 1000:
+        head = "" if n // 100 == 1 else _compound(n // 100)
+        return head + "hundert" + _compound(n % 100, final=final)
+    if n < 10**6:
+        head = "" if n // 1000 == 1 else _compound(n // 1000)
+        return head + "tausend" + _compound(n % 1000, final=final)
+    millions, rest = divmod(n, 10**6)
+    head = "eine Million" if millions == 1 else f"{_compound(millions)} Millionen"
+    return f"{head} {number_to_words(rest)}" if rest else head
+
+
+def ordinal_to_words(n: int, *, dative: bool = False) -> str:
+    word = _ORDINAL_IRREGULAR.get(n) or (_compound(n) + ("te" if n < 20 else "ste"))
+    return word + "n" if dative else word
+
+
+def year_to_words(year: int) -> str:
+    """1291 -> "zwölfhunderteinundneunzig"; other numbers as cardinals."""
+    if 1100 <= year < 2000:
+        return _compound(year // 100) + "hundert" + _compound(year % 100, final=True)
+    return number_to_words(year)
+
+
+def _word_before(text: str, start: int) -> str:
+    words = text[:start].split()
+    return words[-1].strip(".,:;()").lower() if words else ""
+
+
+def _dative(text: str, start: int) -> bool:
+    """After "am", "vom", ... ; a weekday in between keeps it ("Am Freitag, 2.3.")."""
+    words = [w.strip(".,:;()").lower() for w in text[:start].split()]
+    while words and words[-1] in _WEEKDAYS:
+        words.pop()
+    return bool(words) and words[-1] in _DATIVE_BEFORE
+
+
+def _date(m: re.Match[str]) -> str:
+    day, month, year = int(m["day"]), int(m["month"]), m["year"]
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return m[0]
+    if not year and _word_before(m.string, m.start()) not in _DATE_BEFORE:
+        return m[0]
+    words = f"{ordinal_to_words(day, dative=_dative(m.string, m.start()))} {_MONTHS[month - 1]}"
+    if year:
+        words += " " + year_to_words(int(year) + (2000 if len(year) == 2 else 0))
+    return words
+
+
+def _day_of_month(m: re.Match[str]) -> str:
+    return f"{ordinal_to_words(int(m[1]), dative=_dative(m.string, m.start()))} {m[2]}"
+
+
+def _ordinal(m: re.Match[str]) -> str:
+    """ "das 2. Mal" -> "das zweite Mal", "im 1. Stock" -> "im ersten Stock"."""
+    before = m.string[: m.start()].rstrip()
+    word = _word_before(m.string, m.start())
+    if before and before[-1] not in ".!?:" and word not in _ORDINAL_BEFORE:
+        return m[0]
+    n = int(m[1])
+    return ordinal_to_words(n, dative=word in _ORDINAL_WEAK_EN) + " "
+
+
+def _clock(hours: int, minutes: int, *, uhr: bool = True) -> str | None:
+    if hours > 24 or minutes > 59:
+        return None
+    if not minutes:
+        return f"{number_to_words(hours)} Uhr" if uhr else number_to_words(hours)
+    return f"{number_to_words(hours)} Uhr {number_to_words(minutes)}"
+
+
+def _time(m: re.Match[str]) -> str:
+    return _clock(int(m["h"]), int(m["m"] or m["m2"])) or m[0]
+
+
+def _time_range(m: re.Match[str]) -> str:
+    """8.00-12.00 Uhr, 10-12 Uhr, 14:00-17:00 -> "... bis ..."."""
+    if not m["uhr"] and not (m["s1"] == m["s2"] == ":"):
+        return m[0]
+    start = _clock(int(m["h1"]), int(m["m1"] or 0), uhr=False)
+    end = _clock(int(m["h2"]), int(m["m2"] or 0))
+    if start is None or end is None:
+        return m[0]
+    return f"{start} bis {end}"
+
+
+def _score(m: re.Match[str]) -> str:
+    return f"{number_to_words(int(m[1]))} zu {number_to_words(int(m[2]))}"
+
+
+def _phone(m: re.Match[str]) -> str:
+    groups = re.findall(r"\+|\d+", m[0])
+    spoken = ["plus" if g == "+" else " ".join(_DIGITS[int(d)] for d in g) for g in groups]
+    return ", ".join(spoken).replace("plus, ", "plus ")
+
+
+def _price(m: re.Match[str]) -> str:
+    francs = int(re.sub(r"[.'’]", "", m["fr"] or m["fr2"]))
+    cents = m["rp"] or m["rp2"]
+    rappen = int(cents) if cents and cents != "-" else 0
+    words = f"{'ein' if francs == 1 else number_to_words(francs)} Franken"
+    if rappen:
+        words += f" {number_to_words(rappen)}"
+    # "100 Fr." at the end of the text also ended the sentence
+    return words + "." if m[0].endswith("Fr.") and m.end() == len(m.string) else words
+
+
+def _decimal(m: re.Match[str]) -> str:
+    fraction = " ".join(_DIGITS[int(d)] for d in m[2])
+    return f"{number_to_words(int(m[1]))} Komma {fraction}"
+
+
+def _dotted(m: re.Match[str]) -> str:
+    """3.5 as a decimal; 2.3 after "Kapitel" and 1.2.4 as numbered sections."""
+    parts = m[0].split(".")
+    if len(parts) > 2 or _word_before(m.string, m.start()) in _SECTION_BEFORE:
+        return " Punkt ".join(number_to_words(int(p)) for p in parts)
+    return _decimal(re.match(r"(\d+)\.(\d+)", m[0]))  # type: ignore[arg-type]
+
+
+def _number(m: re.Match[str]) -> str:
+    n = int(m[0])
+    if 1100 <= n < 2000 and _word_before(m.string, m.start()) in _YEAR_BEFORE:
+        return year_to_words(n)
+    if n == 1 and (noun := re.match(r"\s+([A-ZÄÖÜ]\w*)", m.string[m.end() :])):
+        word = noun[1].lower()
+        return "eine" if word in _FEMININE_NOUNS or word.endswith(_FEMININE_SUFFIXES) else "ein"
+    return number_to_words(n)
+
+
+_MONTH_NAMES = "|".join(_MONTHS)
+_THOUSANDS = r"\d{1,3}(?:[.'’]\d{3})+(?![\d]|[.,'’]\d)"  # 1'500, 1.000 (never 1.5)
+_FRANCS = r"\d{1,3}(?:['’]\d{3})+|\d{1,3}(?:\.\d{3})+(?!\d|\.\d)|\d+"  # 1'200.50, 1.000
+_RULES: list[tuple[re.Pattern[str], str | Callable[[re.Match[str]], str]]] = [
+    # +41 44 123 45 67, 044 123 45 67, 079/123 45 67
+    (
+        re.compile(r"(?<![\w.,'+])(?:\+\d{2}\s?|0)\d{2}(?:[ /-]?\d{2,3}){3,4}(?!\w|[.,]\d)"),
+        _phone,
+    ),
+    # CHF 12.50, Fr. 12.-, 2,50 Franken, 100 Fr., CHF 1'200 (before dates: "CHF 5.10.")
+    (
+        re.compile(
+            rf"(?:\b(?:CHF|Fr\.)\s?(?P<fr>{_FRANCS})(?:[.,](?P<rp>\d{{2}}(?!\d)|-))?"
+            rf"|\b(?P<fr2>{_FRANCS})(?:[.,](?P<rp2>\d{{2}}|-))?\s?(?:CHF\b|Franken\b|Fr\.))"
+        ),
+        _price,
+    ),
+    # 8.00-12.00 Uhr, 10-12 Uhr, 14:00-17:00 (before "minus" and the decimal rule)
+    (
+        re.compile(
+            r"\b(?P<h1>\d{1,2})(?:(?P<s1>[.:])(?P<m1>\d{2}))?\s?[-–]\s?"
+            r"(?P<h2>\d{1,2})(?:(?P<s2>[.:])(?P<m2>\d{2}))?(?!\d)(?P<uhr>\s?Uhr\b)?"
+        ),
+        _time_range,
+    ),
+    # -5 Grad, -3,5 (a dash right before the number, not between two)
+    (re.compile(r"(?<![\w.,])[-−–](?=\d)"), "minus "),
+    # 12.03.2025, 1.3.25, 12.03.
+    (
+        re.compile(
+            r"\b(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4}|\d{2}(?!\d))?"
+            r"(?!\d)"
+        ),
+        _date,
+    ),
+    (re.compile(rf"\b(\d{{1,2}})\.\s?({_MONTH_NAMES})\b"), _day_of_month),
+    (re.compile(r"\b(\d{1,3})\.\s(?=[A-ZÄÖÜ]\w)"), _ordinal),  # das 2. Mal, im 1. Stock
+    # 14:30, 9.30 Uhr
+    (
+        re.compile(r"\b(?P<h>\d{1,2})(?::(?P<m>\d{2})(?:\s?Uhr\b)?|\.(?P<m2>\d{2})\s?Uhr\b)(?!\d)"),
+        _time,
+    ),
+    (re.compile(r"\b(\d{1,2}):(\d{1,2})\b"), _score),  # 1:0
+    # thousands separators: 1'500 and 1.000 are counts, never years or decimals
+    (
+        re.compile(rf"\b{_THOUSANDS}"),
+        lambda m: number_to_words(int(re.sub(r"[.'’]", "", m[0]))),
+    ),
+    (re.compile(r"\b(\d+),(\d+)\b"), _decimal),
+    (re.compile(r"\b\d+(?:\.\d+)+(?!\d)"), _dotted),  # 3.5, Kapitel 2.3
+    (re.compile(r"\s?%"), " Prozent"),
+    (re.compile(r"\d+"), _number),
+]
+
+
+def normalize_german(text: str) -> str:
+    """Expand numbers, dates, times, prices, percentages and phone numbers into words."""
+    if not any(c.isdigit() for c in text) and "%" not in text:
+        return text
+    for pattern, replacement in _RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+# ── Phoneme-id cache ─────────────────────────────────────────────────────
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class TextFrontend:
+    """Normalised text -> phoneme-id sequences for one voice, with a sentence LRU."""
+
+    def __init__(self, voice: Any, *, cache_size: int = PHONEME_CACHE_SIZE) -> None:
+        self._voice = voice
+        self._cache: OrderedDict[str, tuple[tuple[int, ...], ...]] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def phoneme_ids(self, text: str) -> list[tuple[int, ...]]:
+        """One id sequence per sentence (as Piper would synthesize them)."""
+        start = time.perf_counter()
+        normalized = normalize_german(text)
+        record_frontend_stage("normalize", time.perf_counter() - start)
+        ids: list[tuple[int, ...]] = []
+        for sentence in _SENTENCE_RE.split(normalized.strip()):
+            if sentence:
+                ids.extend(self._sentence_ids(sentence))
+        return ids
+
+    def _sentence_ids(self, sentence: str) -> tuple[tuple[int, ...], ...]:
+        with self._lock:
+            cached = self._cache.get(sentence)
+            if cached is not None:
+                self._cache.move_to_end(sentence)
+                self.hits += 1
+        if cached is not None:
+            record_phoneme_cache(hit=True)
+            return cached
+
+        start = time.perf_counter()
+        voice = self._voice
+        ids = tuple(tuple(voice.phonemes_to_ids(p)) for p in voice.phonemize(sentence) if p)
+        record_frontend_stage("phonemize", time.perf_counter() - start)
+        record_phoneme_cache(hit=False)
+        with self._lock:
+            self.misses += 1
+            self._cache[sentence] = ids
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return ids
+
+
+_frontends: dict[int, tuple[weakref.ref[Any], TextFrontend]] = {}
+_frontends_lock = threading.Lock()
+
+
+def frontend_for(voice: Any) -> TextFrontend:
+    """The process's TextFrontend for `voice` (voices are shared via the registry)."""
+    with _frontends_lock:
+        entry = _frontends.get(id(voice))
+        if entry is None or entry[0]() is not voice:
+            entry = (weakref.ref(voice), TextFrontend(voice))
+            _frontends[id(voice)] = entry
+            for key in [k for k, (ref, _) in _frontends.items() if ref() is None]:
+                del _frontends[key]
+        return entry[1]
+
+
+def audio_to_pcm(audio: np.ndarray, syn_config: Any = None) -> bytes:
+    """Piper's post-processing: peak normalisation, volume, int16 PCM."""
+    if getattr(syn_config, "normalize_audio", True):
+        peak = np.max(np.abs(audio)) if audio.size else 0.0
+        audio = audio / peak if peak > 1e-8 else np.zeros_like(audio)
+    volume = getattr(syn_config, "volume", 1.0)
+    if volume != 1.0:
+        audio = audio * volume
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def synthesize_pcm(
+    voice: Any,
+    text: str,
+    syn_config: Any = None,
+    on_audio: Callable[[bytes], None] | None = None,
+    abort: threading.Event | None = None,
+) -> list[bytes]:
+    """PiperVoice.synthesize through the frontend: one int16 PCM buffer per sentence."""
+    parts: list[bytes] = []
+    for ids in frontend_for(voice).phoneme_ids(text):
+        start = time.perf_counter()
+        audio = np.squeeze(voice.phoneme_ids_to_audio(list(ids), syn_config))
+        record_frontend_stage("infer", time.perf_counter() - start)
+        pcm = audio_to_pcm(audio, syn_config)
+        if pcm:
+            parts.append(pcm)
+            if on_audio is not None:
+                on_audio(pcm)
+        if abort is not None and abort.is_set():
+            break
+    return parts
@@ -0,0 +1,55 @@
+"""Which of the loaded voices' languages a reply is in.
+
+PiperTTS routes each utterance to one voice. The STT language only says what the caller
+spoke, not what the agent answers in, so the reply text itself decides: its words are
+scored against short lists of very frequent function words per language. Anything
+without a clear winner (short acknowledgements, names, numbers) stays with the default
+voice.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+
+def _words(text: str) -> frozenset[str]:
+    return frozenset(text.split())
+
+
+# frequent words that are rare in the other languages (Swiss German spellings included)
+_STOPWORDS: dict[str, frozenset[str]] = {
+    "de": _words(
+        "und ich isch ist nicht nöd nid das dass der die dem den ein eine mit für vo von "
+        "zu bi bei mir wir sie ihr ihne ihnen gern gärn auch au oder aber wie wänn wenn "
+        "chan kann cha händ hat hend hei guet gut danke bitte grüezi uf auf"
+    ),
+    "en": _words(
+        "the and is are you your to of for with that this it we i can will not be have "
+        "what how please thanks thank yes hello would could our my"
+    ),
+    "fr": _words(
+        "le la les et est vous je nous de des du un une pour avec que qui pas ne ce "
+        "cette merci bonjour oui au aux sur votre notre suis êtes peux pouvez"
+    ),
+    "it": _words(
+        "il lo gli e è sono non che di del della per con una un grazie buongiorno "
+        "si sì posso può lei noi mi ci"
+    ),
+}
+_WORD_RE = re.compile(r"[^\W\d_]+")
+MIN_WORDS = 2  # fewer matched words than this: not enough evidence to switch voice
+
+
+def detect_language(text: str, languages: Iterable[str], default: str) -> str:
+    """The language of `text` among `languages`, or `default` if unclear."""
+    words = [w.casefold() for w in _WORD_RE.findall(text)]
+    scores = {
+        lang: sum(w in _STOPWORDS[lang] for w in words) for lang in languages if lang in _STOPWORDS
+    }
+    if not scores:
+        return default
+    best = max(scores, key=lambda lang: (scores[lang], lang == default))
+    if scores[best] < MIN_WORDS or scores[best] <= scores.get(default, 0):
+        return default
+    return best
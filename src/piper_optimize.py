@@ -0,0 +1,176 @@
+"""
+Offline optimisation of a Piper voice: graph-optimised and int8 variants, and a report.
+Usage:
+    uv run python src/piper_optimize.py ~/.cache/livekit/piper/de_DE-thorsten-medium.onnx
+    uv run python src/piper_optimize.py MODEL --no-quantize --json report.json
+
+Writes next to the model (see piper_voices.variant_path):
+  <voice>.optimized.onnx  onnxruntime's graph-optimised float model (the same file the
+                          agent caches on first load with precision="optimized")
+  <voice>.int8.onnx       weights dynamically quantised to int8 (needs `pip install onnx`)
+and then reports, per precision, the real-time factor on the benchmark replies and how
+far the audio drifts from the float model: duration change and SNR. Synthesis runs with
+noise_scale = noise_w_scale = 0, so every precision renders the same deterministic
+utterance. Select a precision in the agent with VoiceOptions(precision=...).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from bench_piper_tts import REPLIES
+from piper_voices import PRECISIONS, VoiceOptions, load_piper_voice, variant_path
+
+QUANTIZE_OP_TYPES = ("MatMul", "Conv")
+
+
+def optimize(model_path: str) -> Path:
+    """Write (or refresh) the graph-optimised float variant."""
+    load_piper_voice(model_path, VoiceOptions(precision="optimized"))
+    return variant_path(model_path, "optimized")
+
+
+def quantize(model_path: str, op_types: Sequence[str] = QUANTIZE_OP_TYPES) -> Path:
+    """Write the int8 variant: shape-inferred, then weights dynamically quantised."""
+    try:
+        from onnxruntime.quantization import QuantType, quant_pre_process, quantize_dynamic
+    except ImportError as e:
+        raise ImportError("int8 quantisation needs the onnx package: pip install onnx") from e
+
+    target = variant_path(model_path, "int8")
+    with tempfile.TemporaryDirectory(dir=target.parent) as tmp:
+        prepared = Path(tmp) / "prepared.onnx"
+        quantized = Path(tmp) / "int8.onnx"
+        quant_pre_process(model_path, str(prepared), skip_symbolic_shape=True)
+        quantize_dynamic(
+            str(prepared),
+            str(quantized),
+            weight_type=QuantType.QInt8,
+            op_types_to_quantize=list(op_types),
+        )
+        os.replace(quantized, target)  # atomic: a loading agent never sees half a model
+    return target
+
+
+def audio_difference(reference: np.ndarray, audio: np.ndarray) -> dict[str, float]:
+    """Duration change (%) and SNR (dB) of `audio` against `reference` (int16 arrays)."""
+    n = min(len(reference), len(audio))
+    ref = reference[:n].astype(np.float64)
+    noise = ref - audio[:n].astype(np.float64)
+    signal_energy, noise_energy = float(np.sum(ref**2)), float(np.sum(noise**2))
+    if noise_energy == 0:
+        snr = float("inf")
+    else:
+        snr = 10 * np.log10(signal_energy / noise_energy) if signal_energy else float("-inf")
+    delta = (len(audio) - len(reference)) / len(reference) * 100 if len(reference) else 0.0
+    return {"duration_delta_pct": delta, "snr_db": float(snr)}
+
+
+def _render(voice: Any, texts: Sequence[str], syn_config: Any) -> tuple[list[np.ndarray], float]:
+    """Audio per text and total synthesis seconds."""
+    audio, synth_s = [], 0.0
+    for text in texts:
+        start = time.perf_counter()
+        chunks = [c.audio_int16_array for c in voice.synthesize(text, syn_config=syn_config)]
+        synth_s += time.perf_counter() - start
+        audio.append(np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16))
+    return audio, synth_s
+
+
+def compare(
+    model_path: str,
+    precisions: Sequence[str] = PRECISIONS,
+    texts: Sequence[str] = REPLIES,
+    *,
+    intra_op_threads: int = 1,
+    syn_config: Any = None,
+    loader: Callable[[str, VoiceOptions], Any] = load_piper_voice,
+) -> list[dict[str, Any]]:
+    """RTF and audio drift of each precision against fp32 (which must come first)."""
+    rows: list[dict[str, Any]] = []
+    reference: list[np.ndarray] = []
+    for precision in precisions:
+        options = VoiceOptions(intra_op_threads=intra_op_threads, precision=precision)
+        start = time.perf_counter()
+        voice = loader(model_path, options)
+        load_s = time.perf_counter() - start
+        _render(voice, texts[:1], syn_config)  # warm-up
+        audio, synth_s = _render(voice, texts, syn_config)
+        audio_s = sum(len(a) for a in audio) / voice.config.sample_rate
+        row: dict[str, Any] = {
+            "precision": precision,
+            "model_mb": _size_mb(variant_path(model_path, precision)),
+            "load_s": load_s,
+            "rtf": synth_s / audio_s if audio_s else None,
+        }
+        if not reference:
+            reference = audio
+        else:
+            diffs = [audio_difference(r, a) for r, a in zip(reference, audio, strict=True)]
+            row["duration_delta_pct"] = max((d["duration_delta_pct"] for d in diffs), key=abs)
+            row["snr_db"] = min(d["snr_db"] for d in diffs)
+            row["speedup"] = rows[0]["rtf"] / row["rtf"] if row["rtf"] else None
+        rows.append(row)
+    return rows
+
+
+def _size_mb(path: Path) -> float | None:
+    try:
+        return path.stat().st_size / 2**20
+    except OSError:
+        return None
+
+
+def _deterministic_config() -> Any:
+    from piper import SynthesisConfig
+
+    return SynthesisConfig(noise_scale=0.0, noise_w_scale=0.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model", help="Piper .onnx model (float)")
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 variant")
+    parser.add_argument("--op-types", default=",".join(QUANTIZE_OP_TYPES))
+    parser.add_argument("--intra-op-threads", type=int, default=1, help="per-call threads")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    print(f"optimized: {optimize(args.model)}")
+    precisions = ["fp32", "optimized"]
+    if not args.no_quantize:
+        print(f"int8:      {quantize(args.model, args.op_types.split(','))}")
+        precisions.append("int8")
+
+    rows = compare(
+        args.model,
+        precisions,
+        intra_op_threads=args.intra_op_threads,
+        syn_config=_deterministic_config(),
+    )
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    print(
+        f"{'precision':>10}{'MB':>7}{'load s':>8}{'rtf':>7}{'speedup':>9}{'dur %':>7}{'SNR dB':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['precision']:>10}{row['model_mb'] or 0:>7.1f}{row['load_s']:>8.2f}"
+            f"{row['rtf']:>7.3f}{row.get('speedup') or 1.0:>9.2f}"
+            f"{row.get('duration_delta_pct', 0.0):>7.1f}{row.get('snr_db', float('inf')):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Streaming polyphase resampler for Piper's int16 PCM.
+
+Piper renders 22050 Hz while the room path runs at 48 kHz, so every pushed buffer was
+being resampled downstream, frame by frame. PolyphaseResampler converts each chunk once,
+vectorised in NumPy, with the filter taps cached per rate pair and the filter history
+carried from one chunk to the next, so chunk boundaries don't click.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+
+import numpy as np
+
+TAPS_PER_PHASE = 16  # filter length per output sample; ~0.4 ms of history at 22050 Hz
+KAISER_BETA = 8.0  # ~80 dB stop band
+ROLLOFF = 0.92  # cutoff as a fraction of the lower Nyquist frequency
+
+
+@functools.lru_cache(maxsize=8)
+def _polyphase_taps(up: int, down: int, taps_per_phase: int) -> np.ndarray:
+    """Windowed-sinc low-pass split into `up` phases: shape (up, taps_per_phase), float32."""
+    n = up * taps_per_phase
+    cutoff = ROLLOFF * 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    t = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * t) * np.kaiser(n, KAISER_BETA)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+    # phase p, tap k = h[p + k * up]; applied to x[base - k]
+    taps = h.reshape(taps_per_phase, up).T.astype(np.float32)
+    taps.flags.writeable = False  # shared through the cache
+    return taps
+
+
+class PolyphaseResampler:
+    """Rational-ratio resampler for a single mono int16 stream.
+
+    push() returns every output sample that the input so far determines; flush() drains
+    the filter tail and resets the state for the next segment.
+    """
+
+    def __init__(
+        self, input_rate: int, output_rate: int, *, taps_per_phase: int = TAPS_PER_PHASE
+    ) -> None:
+        g = math.gcd(input_rate, output_rate)
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self._up = output_rate // g
+        self._down = input_rate // g
+        self._k = taps_per_phase
+        self._taps = _polyphase_taps(self._up, self._down, taps_per_phase)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._history = np.zeros(self._k - 1, dtype=np.float32)
+        self._samples_in = 0  # real input samples this segment
+        self._consumed = 0  # input samples through the filter (incl. flush padding)
+        self._samples_out = 0
+
+    def push(self, pcm: bytes) -> bytes:
+        if self._up == self._down:
+            return pcm
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        self._samples_in += len(x)
+        return self._process(x).tobytes()
+
+    def flush(self) -> bytes:
+        """Emit the samples still held back by the filter and start a new segment."""
+        if self._up == self._down or self._samples_in == 0:
+            self._reset()
+            return b""
+        expected = -(-self._samples_in * self._up // self._down)
+        produced = self._samples_out
+        tail = self._process(np.zeros(self._k, dtype=np.float32))
+        self._reset()
+        return tail[: max(0, expected - produced)].tobytes()
+
+    def _process(self, x: np.ndarray) -> np.ndarray:
+        up, down, k = self._up, self._down, self._k
+        buf = np.concatenate((self._history, x))
+        start = self._consumed - (k - 1)  # absolute input index of buf[0]
+        self._consumed += len(x)
+        self._history = buf[len(buf) - (k - 1) :].copy()
+
+        # output n sits at n*down on the upsampled grid; adding the filter's group delay
+        # keeps it aligned with the input. It is ready once its newest input has arrived.
+        delay = (up * k - 1) // 2
+        n0 = self._samples_out
+        n1 = max(n0, -(-(self._consumed * up - delay) // down))
+        self._samples_out = n1
+        t = np.arange(n0, n1, dtype=np.int64) * down + delay
+        base = t // up
+        # rows: the k input samples feeding each output, newest first
+        idx = (base - start)[:, None] - np.arange(k)[None, :]
+        acc = np.einsum("ij,ij->i", buf[idx], self._taps[t % up])
+        return np.clip(np.rint(acc), -32768, 32767).astype(np.int16)
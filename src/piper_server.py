@@ -0,0 +1,507 @@
+"""
+Shared out-of-process Piper TTS server.
+
+Every LiveKit job process used to hold its own Piper model and compete for cores with
+VAD and the turn detector. In server mode one process per host owns the model; job
+processes send synthesis requests over a Unix socket and read the PCM back from a
+shared-memory ring buffer (one per connection), so audio never goes through the socket.
+
+Protocol (JSON lines on the socket):
+    server -> client  {"op": "hello", "shm": name, "size": bytes, "pid": pid, "sample_rate": hz,
+                       "num_channels": n}
+    client -> server  {"op": "synthesize", "id": n, "text": ..., "params": {...}, "priority": p}
+    server -> client  {"op": "audio", "id": n, "pos": ring position, "len": bytes}  (per sentence)
+    server -> client  {"op": "done", "id": n} | {"op": "error", "id": n, "error": message}
+    client -> server  {"op": "ack", "pos": consumed ring position} | {"op": "cancel", "id": n}
+
+Usage:
+    uv run python src/piper_server.py --model ~/.cache/livekit/piper/de_DE-thorsten-medium.onnx
+    uv run python src/piper_server.py --fake   # FakePiperVoice, for local testing
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any
+
+from livekit.agents import utils
+
+from piper_executor import InferenceExecutor
+from piper_frontend import synthesize_pcm
+from piper_tts_plugin import PiperChunkedStream, _run_abortable, _synthesis_config
+from piper_voices import PRECISIONS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = str(Path.home() / ".cache" / "livekit" / "piper" / "piper-tts.sock")
+DEFAULT_RING_BYTES = 4 * 1024 * 1024  # ~95 s of 22050 Hz int16 per connection
+SERVER_START_TIMEOUT = 60.0  # model load included
+WARMUP_TEXTS = ("Grüezi.", "Hallo! Wie kann ich Ihnen helfen?")  # first ONNX runs, before serving
+
+
+class TTSServerError(RuntimeError):
+    """The server ran the request and reported a synthesis error."""
+
+
+class _Ring:
+    """Single-producer/single-consumer byte ring over a SharedMemory block.
+
+    Positions are absolute byte counts; the producer may only overwrite bytes the
+    consumer has acknowledged.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, size: int, *, owner: bool) -> None:
+        self._shm = shm
+        self.size = size
+        self._owner = owner
+
+    @classmethod
+    def create(cls, size: int) -> _Ring:
+        return cls(shared_memory.SharedMemory(create=True, size=size), size, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, size: int, *, same_process: bool) -> _Ring:
+        shm = shared_memory.SharedMemory(name=name)
+        if not same_process:
+            # the server owns (and unlinks) the block; don't let this process's
+            # resource tracker unlink it at exit
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return cls(shm, size, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, pos: int, data: bytes) -> None:
+        offset = pos % self.size
+        first = min(len(data), self.size - offset)
+        buf = self._shm.buf
+        buf[offset : offset + first] = data[:first]
+        if first < len(data):
+            buf[: len(data) - first] = data[first:]
+
+    def read(self, pos: int, length: int) -> bytes:
+        offset = pos % self.size
+        first = min(length, self.size - offset)
+        buf = self._shm.buf
+        if first == length:
+            return bytes(buf[offset : offset + length])
+        return bytes(buf[offset:]) + bytes(buf[: length - first])
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            with contextlib.suppress(FileNotFoundError):
+                self._shm.unlink()
+
+
+async def _send(writer: asyncio.StreamWriter, msg: dict[str, Any]) -> None:
+    writer.write(json.dumps(msg).encode() + b"\n")
+    await writer.drain()
+
+
+class _Connection:
+    """Server side of one client connection: its ring and write position."""
+
+    def __init__(self, writer: asyncio.StreamWriter, ring: _Ring) -> None:
+        self.writer = writer
+        self.ring = ring
+        self.written = 0
+        self.consumed = 0
+        self.space = asyncio.Condition()
+        self.write_lock = asyncio.Lock()  # ring writes + their messages stay in order
+
+    async def ack(self, pos: int) -> None:
+        async with self.space:
+            self.consumed = max(self.consumed, pos)
+            self.space.notify_all()
+
+    async def send_audio(self, request_id: int, pcm: bytes) -> None:
+        async with self.write_lock:
+            # pieces no larger than half the ring so a writer never waits on itself
+            step = self.ring.size // 2
+            for start in range(0, len(pcm), step):
+                piece = pcm[start : start + step]
+                need = self.ring.size - len(piece)  # max unacknowledged bytes before writing
+                async with self.space:
+                    await self.space.wait_for(lambda n=need: self.written - self.consumed <= n)
+                self.ring.write(self.written, piece)
+                msg = {"op": "audio", "id": request_id, "pos": self.written, "len": len(piece)}
+                self.written += len(piece)
+                await _send(self.writer, msg)
+
+
+class PiperTTSServer:
+    """Serves one loaded voice to many job processes over `socket_path`."""
+
+    def __init__(
+        self,
+        voice: Any,
+        socket_path: str,
+        *,
+        executor: InferenceExecutor | None = None,
+        ring_bytes: int = DEFAULT_RING_BYTES,
+    ) -> None:
+        self._voice = voice
+        self._socket_path = socket_path
+        self._executor = executor or InferenceExecutor()
+        self._ring_bytes = ring_bytes
+        self._server: asyncio.Server | None = None
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+
+    async def start(self) -> None:
+        path = Path(self._socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if _server_alive(self._socket_path):
+                raise RuntimeError(f"Piper TTS server already running on {path}")
+            path.unlink()  # stale socket from a crashed server
+        self._server = await asyncio.start_unix_server(self._handle, path=str(path))
+        logger.info("Piper TTS server listening on %s", path)
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "start() not called"
+        await self._server.serve_forever()
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # closing the transports ends each handler's read loop, which cleans up
+            for writer in self._connections.values():
+                writer.close()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=5)
+            await self._server.wait_closed()
+            self._server = None
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._socket_path)
+        self._executor.shutdown(wait=False)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = writer
+        ring = _Ring.create(self._ring_bytes)
+        conn = _Connection(writer, ring)
+        requests: dict[int, asyncio.Task[None]] = {}
+        try:
+            await _send(
+                writer,
+                {
+                    "op": "hello",
+                    "shm": ring.name,
+                    "size": ring.size,
+                    "pid": os.getpid(),
+                    "sample_rate": self._voice.config.sample_rate,
+                    "num_channels": 1,  # Piper voices are mono
+                },
+            )
+            async for line in reader:
+                msg = json.loads(line)
+                op = msg.get("op")
+                if op == "synthesize":
+                    request_id = msg["id"]
+                    requests[request_id] = asyncio.create_task(self._synthesize(conn, msg))
+                    requests[request_id].add_done_callback(
+                        lambda _, rid=request_id: requests.pop(rid, None)
+                    )
+                elif op == "ack":
+                    await conn.ack(msg["pos"])
+                elif op == "cancel":
+                    if (req := requests.get(msg["id"])) is not None:
+                        req.cancel()
+                else:
+                    logger.warning("Piper TTS server: unknown op %r", op)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.debug("Piper TTS client dropped: %s", e)
+        finally:
+            await utils.aio.cancel_and_wait(*requests.values())
+            writer.close()
+            ring.close()
+            self._connections.pop(task, None)
+
+    async def _synthesize(self, conn: _Connection, msg: dict[str, Any]) -> None:
+        request_id = msg["id"]
+        loop = asyncio.get_running_loop()
+        audio_q: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+        def _on_audio(pcm: bytes) -> None:
+            loop.call_soon_threadsafe(audio_q.put_nowait, pcm)
+
+        forwarded = 0
+
+        async def _forward() -> None:
+            nonlocal forwarded
+            while (pcm := await audio_q.get()) is not None:
+                await conn.send_audio(request_id, pcm)
+                forwarded += len(pcm)
+
+        forward = asyncio.create_task(_forward())
+        try:
+            try:
+                # a client "cancel" aborts the run at the next sentence
+                await _run_abortable(
+                    self._executor,
+                    synthesize_pcm if msg.get("frontend") else PiperChunkedStream._synthesize,
+                    self._voice,
+                    msg["text"],
+                    _synthesis_config(msg.get("params") or {}),
+                    _on_audio,
+                    priority=msg.get("priority", 0),
+                    delivered=lambda: forwarded,
+                )
+            finally:
+                # queued after every call_soon_threadsafe from the finished run
+                loop.call_soon_threadsafe(audio_q.put_nowait, None)
+            await forward
+            await _send(conn.writer, {"op": "done", "id": request_id})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # reported to the requesting client
+            logger.exception("Piper TTS server: synthesis failed")
+            with contextlib.suppress(ConnectionError):
+                await _send(conn.writer, {"op": "error", "id": request_id, "error": str(e)})
+        finally:
+            await utils.aio.cancel_and_wait(forward)
+
+
+class PiperServerClient:
+    """Connection from one PiperTTS instance to the shared server (one event loop)."""
+
+    def __init__(self, socket_path: str, *, connect_timeout: float = 1.0) -> None:
+        self._socket_path = socket_path
+        self._connect_timeout = connect_timeout
+        self._writer: asyncio.StreamWriter | None = None
+        self._ring: _Ring | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._pending: dict[int, utils.aio.Chan[bytes]] = {}
+        self._errors: dict[int, BaseException] = {}
+        self._next_id = 0
+        self.sample_rate: int | None = None
+        self.num_channels = 1
+
+    @property
+    def connected(self) -> bool:
+        return self._reader_task is not None and not self._reader_task.done()
+
+    async def connect(self) -> None:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self._socket_path), self._connect_timeout
+        )
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), self._connect_timeout))
+            if hello.get("op") != "hello":
+                raise ConnectionError(f"unexpected greeting from Piper TTS server: {hello}")
+            self._ring = _Ring.attach(
+                hello["shm"], hello["size"], same_process=hello.get("pid") == os.getpid()
+            )
+        except BaseException:
+            writer.close()
+            raise
+        self.sample_rate = hello.get("sample_rate")
+        self.num_channels = hello.get("num_channels", 1)
+        self._writer = writer
+        self._reader_task = asyncio.create_task(self._read(reader), name="PiperServerClient")
+
+    async def synthesize(
+        self, text: str, params: dict[str, Any], *, priority: int = 0, text_frontend: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Yield raw PCM per sentence. Raises ConnectionError if the server goes away."""
+        if not self.connected:
+            raise ConnectionError("not connected to Piper TTS server")
+        assert self._writer is not None
+        request_id = self._next_id
+        self._next_id += 1
+        audio_ch = utils.aio.Chan[bytes]()
+        self._pending[request_id] = audio_ch
+        done = False
+        try:
+            await _send(
+                self._writer,
+                {
+                    "op": "synthesize",
+                    "id": request_id,
+                    "text": text,
+                    "params": params,
+                    "priority": priority,
+                    "frontend": text_frontend,
+                },
+            )
+            async for pcm in audio_ch:
+                yield pcm
+            done = True
+            if (error := self._errors.pop(request_id, None)) is not None:
+                raise error
+        finally:
+            self._pending.pop(request_id, None)
+            self._errors.pop(request_id, None)
+            if not done and self.connected:
+                with contextlib.suppress(ConnectionError):
+                    await _send(self._writer, {"op": "cancel", "id": request_id})
+
+    async def aclose(self) -> None:
+        if self._reader_task is not None:
+            await utils.aio.cancel_and_wait(self._reader_task)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        assert self._ring is not None and self._writer is not None
+        error: BaseException = ConnectionError("Piper TTS server closed the connection")
+        try:
+            async for line in reader:
+                msg = json.loads(line)
+                op = msg.get("op")
+                audio_ch = self._pending.get(msg.get("id", -1))
+                if op == "audio":
+                    # copy out and ack at once so the ring frees up in write order, even
+                    # for requests that were cancelled meanwhile
+                    pcm = self._ring.read(msg["pos"], msg["len"])
+                    await _send(self._writer, {"op": "ack", "pos": msg["pos"] + msg["len"]})
+                    if audio_ch is not None:
+                        audio_ch.send_nowait(pcm)
+                elif op in ("done", "error"):
+                    if op == "error":
+                        self._errors[msg["id"]] = TTSServerError(msg.get("error", "unknown"))
+                    if audio_ch is not None:
+                        audio_ch.close()
+        except (ConnectionError, json.JSONDecodeError) as e:
+            error = ConnectionError(f"Piper TTS server connection lost: {e}")
+        finally:
+            for request_id, audio_ch in list(self._pending.items()):
+                if not audio_ch.closed:
+                    self._errors.setdefault(request_id, error)
+                    audio_ch.close()
+
+
+def _server_alive(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(0.5)
+        try:
+            s.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def ensure_server_running(
+    socket_path: str,
+    model_path: str,
+    *,
+    workers: int | None = None,
+    intra_op_threads: int = 0,
+    precision: str = "fp32",
+    timeout: float = SERVER_START_TIMEOUT,
+    load_dir: str | None = None,
+) -> bool:
+    """Start the host's TTS server unless one is already listening (called from prewarm).
+
+    A file lock makes sure concurrent job processes spawn a single server; the server is
+    detached so it outlives the process that started it. Returns False if it didn't come up.
+    """
+    if _server_alive(socket_path):
+        return True
+    Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{socket_path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if _server_alive(socket_path):
+            return True
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--socket", socket_path]
+        cmd += ["--model", model_path, "--intra-op-threads", str(intra_op_threads)]
+        cmd += ["--precision", precision]
+        if workers:
+            cmd += ["--workers", str(workers)]
+        if load_dir:
+            cmd += ["--load-dir", load_dir]
+        logger.info("Starting Piper TTS server: %s", socket_path)
+        subprocess.Popen(
+            cmd,
+            start_new_session=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=None,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if _server_alive(socket_path):
+                return True
+            time.sleep(0.1)
+    logger.warning("Piper TTS server did not start within %.0fs", timeout)
+    return False
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    if args.fake:
+        from fake_piper_voice import FakePiperVoice
+
+        voice: Any = FakePiperVoice(seconds_per_char=0.001)
+    else:
+        from piper_voices import VoiceOptions, voice_registry, warm_up_voice
+
+        voice = voice_registry.preload(
+            args.model,
+            VoiceOptions(intra_op_threads=args.intra_op_threads, precision=args.precision),
+        )
+        if args.warmup_passes:
+            passes = warm_up_voice(voice, WARMUP_TEXTS, passes=args.warmup_passes)
+            logger.info("Warm-up passes: %s", ", ".join(f"{p:.2f}s" for p in passes))
+    executor = InferenceExecutor(args.workers, name="piper-server")
+    server = PiperTTSServer(voice, args.socket, executor=executor)
+    reporter = None
+    if args.load_dir:
+        from worker_load import LoadReporter
+
+        reporter = LoadReporter(args.load_dir, executor).start()  # the queue lives here
+    await server.start()
+    serve = asyncio.create_task(server.serve_forever())
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serve.cancel)
+    try:
+        await serve
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.aclose()
+        if reporter is not None:
+            reporter.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared Piper TTS server")
+    parser.add_argument("--model", help="Piper .onnx model")
+    parser.add_argument("--fake", action="store_true", help="serve a FakePiperVoice")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--intra-op-threads", type=int, default=0)
+    parser.add_argument("--precision", default="fp32", choices=PRECISIONS)
+    parser.add_argument("--warmup-passes", type=int, default=2, help="0 = no warm-up")
+    parser.add_argument("--load-dir", help="publish queue depth for the workers' load_fnc")
+    args = parser.parse_args()
+    if not args.model and not args.fake:
+        parser.error("--model or --fake is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
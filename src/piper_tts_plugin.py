@@ -1,12 +1,35 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import functools
 import logging
 import re
-from typing import Any
+import threading
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Mapping
+from typing import TYPE_CHECKING, Any
 
 from livekit.agents import APIConnectOptions, tts, utils
 
+from piper_batching import BatchingEngine, synthesize_batched
+from piper_cache import PCMCache, cache_key, model_fingerprint
+from piper_chunk_sizer import ChunkSizer, ChunkSizerMetrics, ChunkSizes
+from piper_executor import InferenceExecutor, default_executor
+from piper_frontend import synthesize_pcm
+from piper_language import detect_language
+from piper_resample import PolyphaseResampler
+from piper_voices import VoiceOptions, VoiceRegistry, voice_registry
+from voice_metrics import (
+    record_cache_hit,
+    record_cancelled_chunk,
+    record_chunk,
+    record_chunk_limits,
+)
+
+if TYPE_CHECKING:
+    from piper_server import PiperServerClient
+
 DEFAULT_CONN_OPTIONS = APIConnectOptions()
 
 logger = logging.getLogger(__name__)
@@ -14,12 +37,77 @@ logger = logging.getLogger(__name__)
 PIPER_SAMPLE_RATE = 22050
 PIPER_NUM_CHANNELS = 1
 
-# Streaming: first chunk small = low ttfb; rest up to MAX_CHUNK_CHARS
+# Streaming: first chunk small = low ttfb; rest up to MAX_CHUNK_CHARS. With adaptive
+# chunking these are the starting point until the host's speed has been measured.
 FIRST_CHUNK_MAX_CHARS = 35
 MAX_CHUNK_CHARS = 60
 
+# Look-ahead: chunks synthesizing ahead of the one being played; audio buffered ahead of
+# real time is capped so an interrupted reply doesn't waste inference on the whole tail
+LOOKAHEAD_CHUNKS = 2
+MAX_BUFFERED_AUDIO_S = 6.0
+FRAME_SIZE_MS = 20  # emitted frame duration (exact at 48 kHz; 440 samples at 22050 Hz)
+SERVER_RETRY_S = 30.0  # after a failed connect, synthesize in-process this long
+FRONTEND_LANGUAGES = ("de",)  # piper_frontend's normalisation rules are German
+_PCM_BYTES_PER_SECOND = 2 * PIPER_SAMPLE_RATE * PIPER_NUM_CHANNELS
+
+
+def _synthesis_config(params: dict[str, Any]) -> Any:
+    """Piper SynthesisConfig from PiperTTS's params; None = the voice's own defaults."""
+    if all(v is None for v in params.values()):
+        return None
+    from piper import SynthesisConfig
+
+    return SynthesisConfig(**params)
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Run fn on the worker thread and return (result, seconds spent in it)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+async def _run_abortable(
+    executor: InferenceExecutor,
+    synthesize_fn: Callable[..., list[bytes]],
+    *args: Any,
+    priority: int,
+    delivered: Callable[[], int] = lambda: 0,
+) -> tuple[list[bytes], float]:
+    """Run `synthesize_fn(*args, abort)` on the executor, returning (parts, seconds).
+
+    Cancelling the caller drops the work if it is still queued; if it is running, `abort`
+    makes it stop at the next sentence boundary instead of finishing the chunk. Either
+    way the inference time that went to waste (beyond the `delivered()` PCM bytes) is
+    recorded.
+    """
+    abort = threading.Event()
+    future = executor.submit(_timed_call, synthesize_fn, *args, abort, priority=priority)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        abort.set()
+        future.add_done_callback(functools.partial(_record_abandoned, delivered=delivered))
+        raise
+
+
+def _record_abandoned(future: concurrent.futures.Future[Any], delivered: Callable[[], int]) -> None:
+    if future.cancelled():
+        record_cancelled_chunk("queued")
+    elif future.exception() is None:
+        parts, synth_s = future.result()
+        produced = sum(len(p) for p in parts)
+        unplayed = max(0, produced - delivered()) / produced if produced else 1.0
+        record_cancelled_chunk("running", synth_s * unplayed)
+
 
-def _chunk_text_for_tts(text: str) -> list[str]:
+def _chunk_text_for_tts(
+    text: str,
+    *,
+    first_max_chars: int = FIRST_CHUNK_MAX_CHARS,
+    max_chars: int = MAX_CHUNK_CHARS,
+) -> list[str]:
     """Split text into speakable chunks. First chunk kept small so first audio plays fast (low ttfb)."""
     text = text.strip()
     if not text:
@@ -57,30 +145,98 @@ def _chunk_text_for_tts(text: str) -> list[str]:
                     out.append(" ".join(current))
         return out
 
-    all_chunks = split_by_size(text, MAX_CHUNK_CHARS)
+    all_chunks = split_by_size(text, max_chars)
     if not all_chunks:
         return []
     # First chunk smaller for faster first-byte (real-time feel)
     first = all_chunks[0]
-    if len(first) > FIRST_CHUNK_MAX_CHARS:
+    if len(first) > first_max_chars:
         words = first.split()
         head: list[str] = []
         n = 0
         for w in words:
-            if n + len(w) + (1 if head else 0) > FIRST_CHUNK_MAX_CHARS and head:
+            if n + len(w) + (1 if head else 0) > first_max_chars and head:
                 break
             head.append(w)
             n += len(w) + (1 if head else 0)
         rest_str = " ".join(words[len(head) :])
         first_chunk = " ".join(head)
         if rest_str.strip():
-            rest_chunks = split_by_size(rest_str.strip(), MAX_CHUNK_CHARS)
+            rest_chunks = split_by_size(rest_str.strip(), max_chars)
             all_chunks = [first_chunk] + rest_chunks + all_chunks[1:]
         else:
             all_chunks = [first_chunk] + all_chunks[1:]
     return [c for c in all_chunks if c.strip()]
 
 
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+_CLAUSE_END_RE = re.compile(r"[,;](?=\s)")
+
+
+class _IncrementalChunker:
+    """Cut speakable chunks out of a token stream as soon as they are complete.
+
+    Same policy as _chunk_text_for_tts: a chunk ends at a sentence boundary if it fits,
+    otherwise at the last clause/word boundary inside the limit; the first chunk uses the
+    smaller limit so inference can start while the LLM is still generating.
+    """
+
+    def __init__(
+        self,
+        *,
+        first_max_chars: int = FIRST_CHUNK_MAX_CHARS,
+        max_chars: int = MAX_CHUNK_CHARS,
+    ) -> None:
+        self._first_max_chars = first_max_chars
+        self._max_chars = max_chars
+        self._buf = ""
+        self._emitted = 0
+
+    def _limit(self) -> int:
+        return self._first_max_chars if self._emitted == 0 else self._max_chars
+
+    def push(self, token: str) -> list[str]:
+        self._buf += token
+        out: list[str] = []
+        while (chunk := self._next_chunk()) is not None:
+            out.append(chunk)
+        return out
+
+    def flush(self) -> list[str]:
+        """Return whatever is buffered (end of LLM segment); the next segment starts small."""
+        rest, self._buf = self._buf, ""
+        limit = self._limit()
+        out = _chunk_text_for_tts(rest, first_max_chars=limit, max_chars=self._max_chars)
+        self._emitted = 0
+        return out
+
+    def _next_chunk(self) -> str | None:
+        buf = self._buf.lstrip()
+        limit = self._limit()
+        cut: int | None = None
+
+        sentence_end = _SENTENCE_END_RE.search(buf)
+        if sentence_end and sentence_end.end() <= limit:
+            cut = sentence_end.end()
+        elif len(buf) > limit:
+            window = buf[: limit + 1]
+            clauses = [m.end() for m in _CLAUSE_END_RE.finditer(window)]
+            if clauses and self._emitted > 0:
+                cut = clauses[-1]
+            elif (space := window.rfind(" ")) > 0:
+                cut = space
+            elif (space := buf.find(" ", limit)) > 0:
+                cut = space  # single word longer than the limit
+        if cut is None:
+            return None
+
+        chunk, self._buf = buf[:cut].strip(), buf[cut:]
+        if not chunk:
+            return None
+        self._emitted += 1
+        return chunk
+
+
 class PiperChunkedStream(tts.ChunkedStream):
     def __init__(
         self,
@@ -95,62 +251,505 @@ class PiperChunkedStream(tts.ChunkedStream):
     async def _run(self, output_emitter: tts.AudioEmitter) -> None:
         output_emitter.initialize(
             request_id=utils.shortuuid(),
-            sample_rate=PIPER_SAMPLE_RATE,
+            sample_rate=self._tts_instance.sample_rate,
             num_channels=PIPER_NUM_CHANNELS,
             mime_type="audio/pcm",
+            frame_size_ms=self._tts_instance._frame_size_ms,
         )
 
-        voice = self._tts_instance._ensure_voice()
-        chunks = _chunk_text_for_tts(self.input_text)
+        sizes = self._tts_instance._chunk_sizes()
+        chunks = _chunk_text_for_tts(
+            self.input_text, first_max_chars=sizes.first_max_chars, max_chars=sizes.max_chars
+        )
         if not chunks:
             output_emitter.flush()
             output_emitter.end_input()
             return
 
         logger.debug("TTS streaming %d chunks: %s...", len(chunks), self.input_text[:50])
+        chunk_ch = utils.aio.Chan[str]()
         for chunk in chunks:
-            raw_audio = await asyncio.to_thread(self._synthesize, voice, chunk)
-            if raw_audio:
-                output_emitter.push(raw_audio)
+            chunk_ch.send_nowait(chunk)
+        chunk_ch.close()
+        await self._tts_instance._synthesize_ordered(chunk_ch, output_emitter)
         output_emitter.flush()
         output_emitter.end_input()
 
     @staticmethod
-    def _synthesize(voice: Any, text: str) -> bytes:
-        import wave
-        from io import BytesIO
+    def _synthesize(
+        voice: Any,
+        text: str,
+        syn_config: Any = None,
+        on_audio: Callable[[bytes], None] | None = None,
+        abort: threading.Event | None = None,
+    ) -> list[bytes]:
+        """Run Piper on one chunk and return its raw int16 PCM, one buffer per sentence.
 
+        Piper yields one audio array per sentence; each is converted to PCM once and handed
+        to `on_audio` immediately, so playback of the first sentence doesn't wait for the rest.
+        Setting `abort` stops before the next sentence is synthesized.
+        """
         if not text.strip():
-            return b""
-        buf = BytesIO()
-        with wave.open(buf, "wb") as wf:
-            voice.synthesize_wav(text, wf)
-        buf.seek(0)
-        with wave.open(buf, "rb") as wf:
-            return wf.readframes(wf.getnframes())
+            return []
+        parts: list[bytes] = []
+        for audio_chunk in voice.synthesize(text, syn_config=syn_config):
+            pcm = audio_chunk.audio_int16_array.tobytes()
+            if pcm:
+                parts.append(pcm)
+                if on_audio is not None:
+                    on_audio(pcm)
+            if abort is not None and abort.is_set():
+                break
+        return parts
+
+
+class _ChunkSynthesis:
+    """Synthesis of one chunk, started eagerly and consumed in order via `audio()`."""
+
+    def __init__(
+        self, tts_instance: PiperTTS, text: str, *, priority: int = 0, language: str | None = None
+    ) -> None:
+        self._tts_instance = tts_instance
+        self.text = text
+        self.priority = priority  # chunk index: the first chunk of a reply runs first
+        self.language = language or tts_instance._language  # picks the voice
+        self._default_voice = self.language == tts_instance._language
+        self._frontend = tts_instance._uses_frontend(self.language)
+        self._audio_ch = utils.aio.Chan[bytes]()
+        self._task: asyncio.Task[None] | None = None
+        self._synth_s = 0.0  # inference time of the finished chunk (0 for cache hits)
+        self._produced = 0  # PCM bytes synthesized / handed to the consumer
+        self._consumed = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="PiperTTS._chunk_synthesis")
+
+    async def audio(self) -> AsyncIterator[bytes]:
+        assert self._task is not None, "start() not called"
+        async for pcm in self._audio_ch:
+            self._consumed += len(pcm)
+            yield pcm
+        await self._task  # propagate inference errors
+
+    async def aclose(self) -> None:
+        """Stop the chunk (the stream was cancelled, e.g. on barge-in) or release it."""
+        if self._task is not None:
+            finished = self._task.done()
+            await utils.aio.cancel_and_wait(self._task)
+            unplayed = self._produced - self._consumed
+            if finished and self._synth_s and unplayed > 0:
+                # synthesized ahead, then never played
+                record_cancelled_chunk("done", self._synth_s * unplayed / self._produced)
+        self._audio_ch.close()
+
+    async def _run(self) -> None:
+        tts_instance = self._tts_instance
+        try:
+            key = (
+                tts_instance._cache_key(self.text, self.language)
+                if tts_instance.cache is not None
+                else None
+            )
+            if key is not None:
+                cached = await tts_instance.cache.aget(key)
+                if cached is not None:
+                    record_cache_hit()
+                    self._audio_ch.send_nowait(cached)
+                    return
+
+            result, source = None, "server"
+            if tts_instance._server_socket is not None and self._default_voice:
+                result = await self._synthesize_remote()  # the server has the default voice
+            if result is None:
+                result, source = await self._synthesize_local(), "local"
+            parts, synth_s = result
+            self._synth_s = synth_s
+            self._produced = sum(len(p) for p in parts)
+            if parts:
+                audio_s = self._produced / _PCM_BYTES_PER_SECOND
+                record_chunk(source, len(self.text), audio_s, synth_s)
+                if tts_instance._chunk_sizer is not None:
+                    tts_instance._chunk_sizer.observe(len(self.text), audio_s, synth_s)
+            if key is not None and parts:
+                tts_instance.cache.put(key, parts[0] if len(parts) == 1 else b"".join(parts))
+        finally:
+            self._audio_ch.close()
+
+    def _push(self, pcm: bytes) -> None:
+        if not self._audio_ch.closed:  # consumer may have gone away (cancelled)
+            self._audio_ch.send_nowait(pcm)
+
+    async def _synthesize_local(self) -> tuple[list[bytes], float]:
+        tts_instance = self._tts_instance
+        loop = asyncio.get_running_loop()
+        batching = tts_instance._batching
+        synthesize_fn: Callable[..., list[bytes]] = (
+            synthesize_pcm if self._frontend else PiperChunkedStream._synthesize
+        )
+        routed: str | None = None  # another language's voice, held only for this chunk
+        if not self._default_voice:
+            routed = tts_instance._voices[self.language]
+            target: Any = await asyncio.to_thread(
+                tts_instance._registry.acquire, routed, tts_instance._voice_options
+            )
+        elif batching is not None:
+            synthesize_fn = functools.partial(synthesize_batched, frontend=self._frontend)
+            target = batching  # the engine owns the (shared) voice
+        else:
+            target = tts_instance._voice or await asyncio.to_thread(tts_instance._ensure_voice)
+
+        def _on_audio(pcm: bytes) -> None:
+            loop.call_soon_threadsafe(self._push, pcm)
+
+        try:
+            return await _run_abortable(
+                tts_instance._executor,
+                synthesize_fn,
+                target,
+                self.text,
+                tts_instance._syn_config(),
+                _on_audio,
+                priority=self.priority,
+                delivered=lambda: self._consumed,
+            )
+        finally:
+            if routed is not None:
+                # idle voices are what the registry may evict under its RSS budget
+                tts_instance._registry.release(routed, tts_instance._voice_options)
+
+    async def _synthesize_remote(self) -> tuple[list[bytes], float] | None:
+        """Synthesize on the shared TTS server; None = server unavailable, run locally."""
+        client = await self._tts_instance._server_client()
+        if client is None:
+            return None
+        start = time.perf_counter()
+        parts: list[bytes] = []
+        try:
+            async for pcm in client.synthesize(
+                self.text,
+                self._tts_instance._syn_params,
+                priority=self.priority,
+                text_frontend=self._frontend,
+            ):
+                parts.append(pcm)
+                self._push(pcm)
+        except ConnectionError as e:
+            self._tts_instance._server_failed(e)
+            if parts:
+                raise  # part of the chunk was already played
+            return None
+        return parts, time.perf_counter() - start  # includes the server's queueing
+
+
+class PiperSynthesizeStream(tts.SynthesizeStream):
+    """Incremental synthesis fed by LLM tokens: the first chunk is cut and synthesized
+    while the rest of the reply is still being generated."""
+
+    def __init__(
+        self,
+        *,
+        tts_instance: PiperTTS,
+        conn_options: APIConnectOptions = DEFAULT_CONN_OPTIONS,
+    ) -> None:
+        super().__init__(tts=tts_instance, conn_options=conn_options)
+        self._tts_instance = tts_instance
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=self._tts_instance.sample_rate,
+            num_channels=PIPER_NUM_CHANNELS,
+            mime_type="audio/pcm",
+            frame_size_ms=self._tts_instance._frame_size_ms,
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+
+        sizes = self._tts_instance._chunk_sizes()
+        chunker = _IncrementalChunker(
+            first_max_chars=sizes.first_max_chars, max_chars=sizes.max_chars
+        )
+        chunk_ch = utils.aio.Chan[str | PiperSynthesizeStream._FlushSentinel]()
+
+        async def _chunk_input() -> None:
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    for chunk in chunker.flush():
+                        chunk_ch.send_nowait(chunk)
+                    chunk_ch.send_nowait(data)
+                    continue
+                self._mark_started()
+                for chunk in chunker.push(data):
+                    chunk_ch.send_nowait(chunk)
+            for chunk in chunker.flush():
+                chunk_ch.send_nowait(chunk)
+            chunk_ch.close()
+
+        tasks = [
+            asyncio.create_task(_chunk_input()),
+            asyncio.create_task(self._tts_instance._synthesize_ordered(chunk_ch, output_emitter)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
 
 
 class PiperTTS(tts.TTS):
-    def __init__(self, *, model_path: str) -> None:
+    def __init__(
+        self,
+        *,
+        model_path: str,
+        cache: PCMCache | None = None,
+        speaker_id: int | None = None,
+        length_scale: float | None = None,
+        noise_scale: float | None = None,
+        noise_w_scale: float | None = None,
+        lookahead: int = LOOKAHEAD_CHUNKS,
+        max_buffered_audio: float = MAX_BUFFERED_AUDIO_S,
+        voice_options: VoiceOptions | None = None,
+        registry: VoiceRegistry | None = None,
+        executor: InferenceExecutor | None = None,
+        batching: BatchingEngine | None = None,
+        server_socket: str | None = None,
+        sample_rate: int = PIPER_SAMPLE_RATE,
+        frame_size_ms: int = FRAME_SIZE_MS,
+        adaptive_chunking: bool = True,
+        text_frontend: bool = False,
+        language: str = "de",
+        voices: Mapping[str, str] | None = None,
+    ) -> None:
+        # sample_rate other than Piper's 22050 Hz resamples in the plugin (e.g. 48000 for
+        # the room path, so nothing downstream has to resample again)
         super().__init__(
-            capabilities=tts.TTSCapabilities(streaming=False),
-            sample_rate=PIPER_SAMPLE_RATE,
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=sample_rate,
             num_channels=PIPER_NUM_CHANNELS,
         )
         self._model_path = model_path
+        # language -> model path; each utterance goes to the voice of the language it is
+        # in (piper_language), `model_path` is the `language` voice and the default
+        self._language = language
+        self._voices = {**(voices or {}), language: model_path}
         self._voice: Any = None
+        self._voice_options = voice_options or VoiceOptions()
+        self._registry = registry or voice_registry
+        self._executor = executor or default_executor()
+        self._batching = batching  # opt-in: share ONNX runs with other sessions' sentences
+        # opt-in: synthesize on the host's shared TTS server (piper_server.py)
+        self._server_socket = server_socket
+        self._server: PiperServerClient | None = None
+        self._server_lock = asyncio.Lock()
+        self._server_retry_at = 0.0
+        self._voice_lock = threading.Lock()
+        self._voice_acquired = False
+        self._cache = cache
+        self._model_ids: dict[str, str] = {}
+        self._frame_size_ms = frame_size_ms
+        self._chunk_sizer = (
+            ChunkSizer(first_max_chars=FIRST_CHUNK_MAX_CHARS, max_chars=MAX_CHUNK_CHARS)
+            if adaptive_chunking
+            else None
+        )
+        # normalise numbers/dates/phone numbers and reuse cached phoneme ids (piper_frontend)
+        self._text_frontend = text_frontend
+        self._lookahead = max(0, lookahead)
+        self._max_buffered_audio = max_buffered_audio
+        # Piper SynthesisConfig fields; None = use the voice's own defaults
+        self._syn_params: dict[str, Any] = {
+            "speaker_id": speaker_id,
+            "length_scale": length_scale,
+            "noise_scale": noise_scale,
+            "noise_w_scale": noise_w_scale,
+        }
 
     @property
     def label(self) -> str:
         return "piper-tts"
 
+    @property
+    def cache(self) -> PCMCache | None:
+        return self._cache
+
+    def _syn_config(self) -> Any:
+        return _synthesis_config(self._syn_params)
+
+    def chunk_metrics(self) -> ChunkSizerMetrics | None:
+        """Measured RTF and the chunk limits currently chosen (None if not adaptive)."""
+        return self._chunk_sizer.metrics() if self._chunk_sizer is not None else None
+
+    def _chunk_sizes(self) -> ChunkSizes:
+        if self._chunk_sizer is None:
+            return ChunkSizes(FIRST_CHUNK_MAX_CHARS, MAX_CHUNK_CHARS)
+        sizes = self._chunk_sizer.sizes(
+            queue_depth=self._executor.queue_depth, workers=self._executor.max_workers
+        )
+        logger.debug("TTS chunk limits: first=%d rest=%d", sizes.first_max_chars, sizes.max_chars)
+        record_chunk_limits(sizes.first_max_chars, sizes.max_chars)
+        return sizes
+
+    def _route(self, text: str) -> str:
+        """Language (and so voice) for an utterance starting with `text`."""
+        if len(self._voices) == 1:
+            return self._language
+        return detect_language(text, self._voices, self._language)
+
+    def _uses_frontend(self, language: str) -> bool:
+        """Whether chunks in `language` go through piper_frontend (its rules are German)."""
+        return self._text_frontend and language in FRONTEND_LANGUAGES
+
+    def _cache_key(self, text: str, language: str | None = None) -> str:
+        model_path = self._voices[language or self._language]
+        model_id = self._model_ids.get(model_path)
+        if model_id is None:
+            model_id = self._model_ids[model_path] = model_fingerprint(model_path)
+        params = {**self._syn_params, "sample_rate": PIPER_SAMPLE_RATE}
+        if self._voice_options.precision != "fp32":
+            params["precision"] = self._voice_options.precision  # different audio, own entries
+        if self._uses_frontend(language or self._language):
+            params["frontend"] = True  # numbers are spoken differently
+        return cache_key(model_id, params, text)
+
+    async def _synthesize_chunk(self, text: str) -> AsyncIterator[bytes]:
+        """Synthesize one chunk, yielding raw PCM per sentence as Piper produces it.
+
+        Repeated phrases are served from the cache without running inference.
+        """
+        job = _ChunkSynthesis(self, text)
+        job.start()
+        try:
+            async for pcm in job.audio():
+                yield pcm
+        finally:
+            await job.aclose()
+
+    async def _synthesize_ordered(
+        self,
+        chunks: AsyncIterable[str | object],
+        output_emitter: tts.AudioEmitter,
+    ) -> None:
+        """Synthesize `chunks` with up to `lookahead` chunks in flight ahead of the one being
+        emitted, pushing audio in order. Non-str items are forwarded as emitter flushes."""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self._lookahead + 1)
+        order_ch = utils.aio.Chan[_ChunkSynthesis | object]()
+        jobs: set[_ChunkSynthesis] = set()
+
+        async def _schedule() -> None:
+            index = 0
+            language: str | None = None  # one voice per utterance, chosen by its first chunk
+            try:
+                async for chunk in chunks:
+                    if not isinstance(chunk, str):
+                        order_ch.send_nowait(chunk)
+                        index, language = 0, None  # a new segment: its first chunk goes first
+                        continue
+                    if language is None:
+                        language = self._route(chunk)
+                    await slots.acquire()
+                    job = _ChunkSynthesis(self, chunk, priority=index, language=language)
+                    index += 1
+                    job.start()
+                    jobs.add(job)
+                    order_ch.send_nowait(job)
+            finally:
+                order_ch.close()
+
+        async def _emit() -> None:
+            bytes_per_second = 2 * PIPER_SAMPLE_RATE * PIPER_NUM_CHANNELS
+            pushed_s = 0.0
+            first_push: float | None = None
+            # one filter state per stream: carried across chunks, drained at segment ends
+            resampler = None
+            if self.sample_rate != PIPER_SAMPLE_RATE:
+                resampler = PolyphaseResampler(PIPER_SAMPLE_RATE, self.sample_rate)
+
+            def _drain_resampler() -> None:
+                if resampler is not None and (tail := resampler.flush()):
+                    output_emitter.push(tail)
+
+            async for item in order_ch:
+                if not isinstance(item, _ChunkSynthesis):
+                    _drain_resampler()
+                    output_emitter.flush()
+                    continue
+                logger.debug("TTS chunk: %s", item.text)
+                async for pcm in item.audio():
+                    output_emitter.push(resampler.push(pcm) if resampler is not None else pcm)
+                    if first_push is None:
+                        first_push = loop.time()
+                    pushed_s += len(pcm) / bytes_per_second
+                jobs.discard(item)
+
+                # backpressure: don't keep synthesizing far ahead of what the caller has heard
+                if first_push is not None:
+                    ahead = pushed_s - (loop.time() - first_push)
+                    if ahead > self._max_buffered_audio:
+                        await asyncio.sleep(ahead - self._max_buffered_audio)
+                slots.release()
+            _drain_resampler()
+
+        tasks = [
+            asyncio.create_task(_schedule(), name="PiperTTS._schedule"),
+            asyncio.create_task(_emit(), name="PiperTTS._emit"),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            await asyncio.gather(*(job.aclose() for job in jobs))
+
     def _ensure_voice(self) -> Any:
-        if self._voice is None:
-            from piper import PiperVoice
+        """Resolve the shared voice from the process registry (loads it only if no session
+        in this process has yet). Blocking on first load; call from a thread."""
+        with self._voice_lock:
+            if self._voice is None:
+                self._voice = self._registry.acquire(self._model_path, self._voice_options)
+                self._voice_acquired = True
+            return self._voice
+
+    async def _server_client(self) -> PiperServerClient | None:
+        """Connected server client, or None while the server is unavailable."""
+        async with self._server_lock:
+            if self._server is not None and self._server.connected:
+                return self._server
+            loop = asyncio.get_running_loop()
+            if self._server_socket is None or loop.time() < self._server_retry_at:
+                return None
+            from piper_server import PiperServerClient
+
+            client = PiperServerClient(self._server_socket)
+            try:
+                await client.connect()
+            except (TimeoutError, OSError) as e:
+                self._server_failed(e)
+                return None
+            rate, channels = client.sample_rate, client.num_channels
+            if (rate, channels) != (PIPER_SAMPLE_RATE, PIPER_NUM_CHANNELS):
+                # the resampler and cache keys assume Piper's own format
+                await client.aclose()
+                self._server_failed(ConnectionError(f"server audio is {rate} Hz x {channels} ch"))
+                return None
+            self._server = client
+            return client
 
-            logger.info("Loading Piper voice: %s", self._model_path)
-            self._voice = PiperVoice.load(self._model_path)
-        return self._voice
+    def _server_failed(self, error: BaseException) -> None:
+        logger.warning(
+            "Piper TTS server unavailable (%s), synthesizing in-process for %.0fs",
+            error,
+            SERVER_RETRY_S,
+        )
+        self._server_retry_at = asyncio.get_running_loop().time() + SERVER_RETRY_S
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            await self._server.aclose()
+            self._server = None
+        with self._voice_lock:
+            if self._voice_acquired:
+                self._registry.release(self._model_path, self._voice_options)
+                self._voice_acquired = False
+            self._voice = None
 
     def synthesize(
         self,
@@ -160,13 +759,21 @@ class PiperTTS(tts.TTS):
     ) -> PiperChunkedStream:
         return PiperChunkedStream(tts_instance=self, input_text=text, conn_options=conn_options)
 
+    def stream(
+        self,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_CONN_OPTIONS,
+    ) -> PiperSynthesizeStream:
+        return PiperSynthesizeStream(tts_instance=self, conn_options=conn_options)
+
 
 # Helper function for easy creation
 def create_piper_tts(model_path: str, config_path: str | None = None, **kwargs) -> PiperTTS:
     """Create Piper TTS instance.
-    
+
     Args:
         model_path: Path to .onnx model file
         config_path: Not used (kept for compatibility)
+        **kwargs: Forwarded to PiperTTS (e.g. cache=PCMCache(...))
     """
-    return PiperTTS(model_path=model_path)
+    return PiperTTS(model_path=model_path, **kwargs)
@@ -0,0 +1,314 @@
+"""Process-wide registry of loaded Piper voices.
+
+A job process serves many sessions; each of them used to load its own copy of the
+~60 MB ONNX model on the first utterance. PiperTTS now resolves its voice here, keyed by
+model path and session options, so every session in the process shares one instance.
+`prewarm` seeds the registry and warms the voice up, so even the first call's greeting
+skips the load and the first-inference overhead.
+
+With several voices (one per language, see PiperTTS(voices=...)) the registry can be given
+an RSS budget: after loading a voice pushes the process over it, the least recently used
+voices that no synthesis is using are unloaded.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VoiceOptions:
+    """Options that change how the ONNX session is built (and therefore the registry key)."""
+
+    use_cuda: bool = False
+    intra_op_threads: int = 0  # 0 = onnxruntime default (one per physical core)
+    inter_op_threads: int = 0
+    precision: str = "fp32"  # "fp32", "optimized" or "int8" (see variant_path)
+
+
+VoiceKey = tuple[str, VoiceOptions]
+VoiceLoader = Callable[[str, VoiceOptions], Any]
+
+
+def process_rss() -> int:
+    import psutil
+
+    return psutil.Process().memory_info().rss
+
+
+PRECISIONS = ("fp32", "optimized", "int8")
+
+
+def variant_path(model_path: str, precision: str) -> Path:
+    """The model file for `precision`, next to the original.
+
+    "optimized" is onnxruntime's graph-optimised copy of the float model, written on first
+    load and reused after that; "int8" is the dynamically quantised model written offline
+    by src/piper_optimize.py.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision {precision!r}, expected one of {PRECISIONS}")
+    path = Path(model_path)
+    if precision == "fp32":
+        return path
+    return path.with_name(f"{path.stem}.{precision}{path.suffix}")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _fresh(variant: Path, source: Path) -> bool:
+    try:
+        return variant.stat().st_mtime_ns >= source.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def load_piper_voice(model_path: str, options: VoiceOptions) -> Any:
+    """PiperVoice.load() with explicit onnxruntime session options and precision."""
+    import json
+
+    import onnxruntime
+    from piper import PiperConfig, PiperVoice
+
+    # the config belongs to the original model whatever the precision
+    with open(f"{model_path}.json", encoding="utf-8") as f:
+        config = PiperConfig.from_dict(json.load(f))
+
+    sess_options = onnxruntime.SessionOptions()
+    if options.intra_op_threads:
+        sess_options.intra_op_num_threads = options.intra_op_threads
+    if options.inter_op_threads:
+        sess_options.inter_op_num_threads = options.inter_op_threads
+
+    providers: list[Any] = ["CPUExecutionProvider"]
+    if options.use_cuda:
+        providers = [("CUDAExecutionProvider", {"cudnn_conv_algo_search": "HEURISTIC"})]
+
+    source = Path(model_path)
+    precision = options.precision
+    if precision == "int8" and not _fresh(variant_path(model_path, "int8"), source):
+        logger.warning(
+            "No int8 variant of %s (run src/piper_optimize.py), using the optimized float model",
+            model_path,
+        )
+        precision = "optimized"
+
+    load_path, cache_to = variant_path(model_path, precision), None
+    if precision == "optimized" and not _fresh(load_path, source):
+        # optimise the float graph now and keep the result for the next process
+        load_path, cache_to = source, load_path
+        sess_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        )
+        tmp = cache_to.with_name(f"{cache_to.name}.{os.getpid()}.tmp")
+        sess_options.optimized_model_filepath = str(tmp)
+    elif precision == "optimized":
+        # already optimised offline; running the optimizers again only costs start-up time
+        sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+
+    session = onnxruntime.InferenceSession(
+        str(load_path), sess_options=sess_options, providers=providers
+    )
+    if cache_to is not None:
+        try:
+            os.replace(tmp, cache_to)  # concurrent job processes: last complete write wins
+            logger.info("Cached optimised Piper graph: %s", cache_to)
+        except OSError as e:
+            logger.warning("Could not cache optimised Piper graph %s: %s", cache_to, e)
+    return PiperVoice(config=config, session=session)
+
+
+def warm_up_voice(
+    voice: Any,
+    texts: Sequence[str],
+    *,
+    passes: int = 1,
+    syn_config: Any = None,
+    text_frontend: bool = False,
+) -> list[float]:
+    """Synthesize `texts` `passes` times; returns the seconds each pass took.
+
+    The first run of an ONNX session pays for graph initialisation and arena growth; a
+    short and a longer text cover the input shapes a greeting needs. With `text_frontend`
+    the run goes through piper_frontend, which also caches the texts' phoneme ids.
+    """
+    from piper_frontend import synthesize_pcm
+
+    durations = []
+    for _ in range(passes):
+        start = time.perf_counter()
+        for text in texts:
+            if text_frontend:
+                synthesize_pcm(voice, text, syn_config)
+                continue
+            for _chunk in voice.synthesize(text, syn_config=syn_config):
+                pass
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+@dataclass
+class _Entry:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    voice: Any = None
+    refs: int = 0
+    pinned: bool = False
+    load_seconds: float = 0.0
+    rss_bytes: int = 0  # process RSS growth while it loaded: what unloading it frees
+    last_used: float = 0.0
+
+
+class VoiceRegistry:
+    """Thread-safe, reference-counted map of (model path, options) -> loaded voice.
+
+    Unreferenced voices stay loaded (sessions come and go constantly); `unload_unused()`
+    drops the ones that are neither referenced nor pinned by prewarm. With `max_rss_bytes`
+    set, loading a voice that takes the process over the budget also unloads unreferenced,
+    unpinned voices, least recently used first, until their recorded footprint brings it
+    back under (RSS itself only drops once the allocator returns the memory).
+    """
+
+    def __init__(
+        self,
+        loader: VoiceLoader = load_piper_voice,
+        *,
+        max_rss_bytes: int | None = None,
+        rss: Callable[[], int] = process_rss,
+    ) -> None:
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: dict[VoiceKey, _Entry] = {}
+        self.max_rss_bytes = max_rss_bytes
+        self._rss = rss
+        self.evictions = 0
+
+    @staticmethod
+    def key(model_path: str, options: VoiceOptions | None = None) -> VoiceKey:
+        return (str(Path(model_path).resolve()), options or VoiceOptions())
+
+    def acquire(self, model_path: str, options: VoiceOptions | None = None) -> Any:
+        """Return the shared voice, loading it on first use, and take a reference."""
+        voice = self._load(self.key(model_path, options), add_ref=True)
+        return voice
+
+    def release(self, model_path: str, options: VoiceOptions | None = None) -> None:
+        key = self.key(model_path, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refs == 0:
+                logger.warning("release() without acquire() for Piper voice %s", key[0])
+                return
+            entry.refs -= 1
+
+    def preload(self, model_path: str, options: VoiceOptions | None = None) -> Any:
+        """Load and pin a voice (used from prewarm) without taking a session reference."""
+        key = self.key(model_path, options)
+        voice = self._load(key, add_ref=False)
+        with self._lock:
+            self._entries[key].pinned = True
+        return voice
+
+    def _log_unloaded(self, keys: list[VoiceKey]) -> None:
+        for key in keys:
+            logger.info("Unloaded Piper voice: %s", key[0])
+
+    def _enforce_budget(self, loaded: VoiceKey, rss: int) -> None:
+        """Unload LRU idle voices (never `loaded`) while `rss` is over the budget."""
+        assert self.max_rss_bytes is not None
+        evicted: list[VoiceKey] = []
+        with self._lock:
+            idle = sorted(
+                (
+                    (entry.last_used, key)
+                    for key, entry in self._entries.items()
+                    if key != loaded
+                    and entry.refs == 0
+                    and not entry.pinned
+                    and entry.voice is not None
+                ),
+                key=lambda item: item[0],
+            )
+            for _, key in idle:
+                if rss <= self.max_rss_bytes:
+                    break
+                rss -= self._entries.pop(key).rss_bytes
+                evicted.append(key)
+            self.evictions += len(evicted)
+        self._log_unloaded(evicted)
+        if rss > self.max_rss_bytes:
+            logger.warning(
+                "Piper voices over the RSS budget (%.0f MB > %.0f MB), all in use",
+                rss / 2**20,
+                self.max_rss_bytes / 2**20,
+            )
+
+    def unload_unused(self) -> int:
+        with self._lock:
+            unused = [k for k, e in self._entries.items() if e.refs == 0 and not e.pinned]
+            for key in unused:
+                del self._entries[key]
+        self._log_unloaded(unused)
+        return len(unused)
+
+    def stats(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "model_path": path,
+                    "options": options,
+                    "loaded": entry.voice is not None,
+                    "refs": entry.refs,
+                    "pinned": entry.pinned,
+                    "load_seconds": entry.load_seconds,
+                    "rss_mb": entry.rss_bytes / 2**20,
+                }
+                for (path, options), entry in self._entries.items()
+            ]
+
+    def _load(self, key: VoiceKey, *, add_ref: bool) -> Any:
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.last_used = time.monotonic()
+            if add_ref:
+                entry.refs += 1
+
+        # per-entry lock: concurrent sessions wait for one load, other models aren't blocked
+        try:
+            with entry.lock:
+                if entry.voice is not None:
+                    return entry.voice
+                logger.info("Loading Piper voice: %s", key[0])
+                budgeted = self.max_rss_bytes is not None
+                rss_before = self._rss() if budgeted else 0
+                start = time.perf_counter()
+                entry.voice = self._loader(*key)
+                entry.load_seconds = time.perf_counter() - start
+                voice = entry.voice
+            if budgeted:
+                rss = self._rss()
+                # at least the weights, if another load grew or freed memory meanwhile
+                entry.rss_bytes = max(rss - rss_before, _file_size(key[0]))
+                self._enforce_budget(key, rss)
+            return voice
+        except BaseException:
+            if add_ref:
+                with self._lock:
+                    entry.refs -= 1
+            raise
+
+
+voice_registry = VoiceRegistry()
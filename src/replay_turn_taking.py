@@ -0,0 +1,466 @@
+"""
+Offline turn-taking replay: end-of-turn latency, false endpoints and false interruptions.
+Usage:
+    uv run python src/replay_turn_taking.py calls/*.wav
+    uv run python src/replay_turn_taking.py calls/*.caller.pcm.gz --min-endpointing 0.2,0.4,0.6 \
+        --max-endpointing 1.0,1.5 --min-interruption 0.3,0.5 --json grid.json
+
+Recorded caller audio (16-bit mono WAV, or the CallRecorder's caller track) goes through
+the same Silero VAD and multilingual turn detector model the agent uses, offline. STT is
+a stub: every audio file has a sidecar `<name>.json` with what the caller said and when,
+
+    {"language": "de", "sample_rate": 48000,
+     "utterances": [{"start": 0.4, "end": 3.1, "text": "Grüezi, ich ...", "turn": true,
+                     "reply": "Grüezi, wie cha ich hälfe?"}, ...]}
+
+with `"turn": false` for backchannels and noise ("mhm", a cough: `"text": ""`) that are
+not meant to take the turn, and the optional agent `reply` to a turn as chat history.
+`sample_rate` is only needed for raw PCM. The partial transcript at each pause is the
+utterance's words up to that point, spread over its speech.
+
+The models run once per file (one file per process, --jobs of them at a time): VAD
+speech segments, and the end-of-utterance probability at the end of every segment. Each
+grid point of MIN_ENDPOINTING_DELAY x MAX_ENDPOINTING_DELAY x MIN_INTERRUPTION_DURATION x
+FALSE_INTERRUPTION_TIMEOUT is then replayed on those results the way AgentSession
+decides: the turn ends min (or max, below the language's unlikely threshold) delay after
+the last speech, unless the caller speaks again first; caller speech of
+MIN_INTERRUPTION_DURATION during the agent's reply interrupts it, and an interruption
+without a transcript is resumed after FALSE_INTERRUPTION_TIMEOUT. Defaults are the
+values in agent.py. Both models must be downloaded first (`agent.py download-files`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import wave
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+VAD_SAMPLE_RATE = 16000
+EOU_HISTORY_MESSAGES = 6  # turn_detector.base.MAX_HISTORY_TURNS
+
+EouFn = Callable[[list[dict[str, str]]], float]
+
+
+@dataclass(frozen=True)
+class Settings:
+    min_endpointing_delay: float
+    max_endpointing_delay: float
+    min_interruption_duration: float
+    false_interruption_timeout: float
+
+
+@dataclass
+class ReplayOptions:
+    stt_delay: float = 0.3  # end of speech -> final transcript
+    vad_min_silence: float = 0.55  # silero.VAD.load() default; end of speech comes this late
+    response_s: float = 0.8  # end of turn -> first agent audio (LLM + TTS)
+    reply_s: float = 3.0  # length of each agent reply
+
+
+@dataclass
+class Utterance:
+    start: float
+    end: float
+    text: str = ""
+    turn: bool = True
+    reply: str = ""
+
+
+@dataclass
+class Segment:
+    """One VAD speech segment and what the turn detector thinks at its end."""
+
+    start: float
+    end: float
+    utterance: int | None  # index into Recording.utterances, None for unlabelled audio
+    last: bool  # last segment of its utterance
+    eou_probability: float | None  # None: no transcript, no end of turn
+
+
+@dataclass
+class Recording:
+    name: str
+    utterances: list[Utterance]
+    segments: list[Segment]
+    threshold: float | None  # turn detector's unlikely threshold, None: language unsupported
+
+
+@dataclass
+class Outcome:
+    """Replay of one recording with one Settings."""
+
+    turns: int = 0
+    latencies: dict[int, float] = field(default_factory=dict)  # utterance -> endpoint - end
+    merged: int = 0  # turns whose end was missed because the next one started first
+    false_endpoints: int = 0  # endpoints inside a turn
+    interruptions: int = 0
+    false_interruptions: int = 0  # interrupted by a backchannel or noise
+    resumed: int = 0  # ... and resumed after false_interruption_timeout
+    paused_s: float = 0.0  # agent silence caused by false interruptions
+
+
+# ── inputs ───────────────────────────────────────────────────────
+def sidecar_path(audio_path: Path) -> Path:
+    name = audio_path.name
+    for suffix in (".gz", ".pcm", ".wav"):
+        name = name.removesuffix(suffix)
+    return audio_path.with_name(name + ".json")
+
+
+def load_audio(path: Path, sample_rate: int | None = None) -> np.ndarray:
+    """Mono int16 samples at VAD_SAMPLE_RATE from a WAV or a (gzipped) raw s16le file."""
+    if path.suffix == ".wav":
+        with wave.open(str(path), "rb") as wf:
+            if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                raise ValueError(f"{path}: need 16-bit mono WAV")
+            audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            rate = wf.getframerate()
+    else:
+        if not sample_rate:
+            raise ValueError(f"{path}: raw PCM needs sample_rate in its sidecar")
+        data = path.read_bytes()
+        audio = np.frombuffer(gzip.decompress(data) if path.suffix == ".gz" else data, np.int16)
+        rate = sample_rate
+    if rate != VAD_SAMPLE_RATE:
+        from piper_resample import PolyphaseResampler
+
+        rs = PolyphaseResampler(rate, VAD_SAMPLE_RATE)
+        audio = np.frombuffer(rs.push(audio.tobytes()) + rs.flush(), dtype=np.int16)
+    return audio
+
+
+# ── models ───────────────────────────────────────────────────────
+def vad_probabilities(audio: np.ndarray) -> tuple[np.ndarray, float]:
+    """Silero speech probability per window of `audio` (16 kHz), and the window length in s."""
+    from livekit.plugins.silero import onnx_model
+
+    model = onnx_model.OnnxModel(
+        onnx_session=onnx_model.new_inference_session(force_cpu=True),
+        sample_rate=VAD_SAMPLE_RATE,
+    )
+    n = model.window_size_samples
+    x = audio.astype(np.float32) / 32768.0
+    probs = np.array([model(x[i : i + n]) for i in range(0, len(x) - n + 1, n)], np.float32)
+    return probs, n / VAD_SAMPLE_RATE
+
+
+def speech_segments(
+    probs: Iterable[float],
+    window_s: float,
+    *,
+    activation: float = 0.5,
+    deactivation: float = 0.35,
+    min_speech_s: float = 0.05,
+    min_silence_s: float = 0.55,
+) -> list[tuple[float, float]]:
+    """(start, end) of speech in s, with silero.VAD's start/end hysteresis."""
+    segments: list[tuple[float, float]] = []
+    speaking = False
+    speech_run = silence_run = 0.0
+    start = t = 0.0
+    for i, p in enumerate(probs):
+        t = (i + 1) * window_s
+        if not speaking:
+            speech_run = speech_run + window_s if p >= activation else 0.0
+            if speech_run >= min_speech_s - 1e-9:
+                speaking, start, silence_run = True, t - speech_run, 0.0
+        else:
+            silence_run = silence_run + window_s if p < deactivation else 0.0
+            if silence_run >= min_silence_s - 1e-9:
+                segments.append((start, t - silence_run))
+                speaking, speech_run = False, 0.0
+    if speaking:
+        segments.append((start, t - silence_run))
+    return segments
+
+
+def turn_detector() -> tuple[EouFn, Callable[[str], float | None]]:
+    """End-of-utterance probability and unlikely threshold from the local model files."""
+    from livekit.plugins.turn_detector.base import _download_from_hf_hub
+    from livekit.plugins.turn_detector.models import HG_MODEL, MODEL_REVISIONS
+    from livekit.plugins.turn_detector.multilingual import _EUORunnerMultilingual
+
+    runner = _EUORunnerMultilingual()
+    runner.initialize()
+    languages_path = _download_from_hf_hub(
+        HG_MODEL, "languages.json", revision=MODEL_REVISIONS["multilingual"], local_files_only=True
+    )
+    with open(languages_path) as f:
+        languages = json.load(f)
+
+    def _eou(messages: list[dict[str, str]]) -> float:
+        out = runner.run(json.dumps({"chat_ctx": messages}).encode())
+        return float(json.loads(out)["eou_probability"]) if out else 0.0
+
+    def _threshold(language: str) -> float | None:
+        lang = language.lower()
+        data = languages.get(lang) or languages.get(lang.split("-")[0])
+        return data["threshold"] if data else None
+
+    return _eou, _threshold
+
+
+# ── analysis (once per file) ─────────────────────────────────────
+def analyze(
+    name: str,
+    utterances: list[Utterance],
+    speech: list[tuple[float, float]],
+    eou: EouFn,
+    threshold: float | None,
+) -> Recording:
+    """Label VAD segments with utterances and run the turn detector at the end of each."""
+    labels: list[int | None] = []
+    for start, end in speech:
+        overlaps = [(min(end, u.end) - max(start, u.start), i) for i, u in enumerate(utterances)]
+        best = max(overlaps, default=(0.0, None))
+        labels.append(best[1] if best[0] > 0 else None)
+
+    segments = []
+    for k, ((start, end), u) in enumerate(zip(speech, labels, strict=True)):
+        last = u is not None and u not in labels[k + 1 :]
+        prob = None
+        if u is not None and utterances[u].text.strip():
+            own = [s for s, lbl in zip(speech, labels, strict=True) if lbl == u]
+            spoken = sum(e - s for s, e in own if s <= start)
+            total = sum(e - s for s, e in own)
+            words = utterances[u].text.split()
+            n = len(words) if last else max(1, round(len(words) * spoken / total))
+            prob = eou(_history(utterances, u) + [{"role": "user", "content": " ".join(words[:n])}])
+        segments.append(Segment(start, end, u, last, prob))
+    return Recording(name, utterances, segments, threshold)
+
+
+def _history(utterances: list[Utterance], before: int) -> list[dict[str, str]]:
+    messages = []
+    for u in utterances[:before]:
+        if u.turn and u.text.strip():
+            messages.append({"role": "user", "content": u.text})
+            if u.reply:
+                messages.append({"role": "assistant", "content": u.reply})
+    return messages[-(EOU_HISTORY_MESSAGES - 1) :]
+
+
+# ── replay (once per file and grid point) ────────────────────────
+def simulate(rec: Recording, settings: Settings, opts: ReplayOptions) -> Outcome:
+    out = Outcome(turns=sum(u.turn and bool(u.text.strip()) for u in rec.utterances))
+    reply_start = reply_end = -math.inf
+    for k, seg in enumerate(rec.segments):
+        utt = rec.utterances[seg.utterance] if seg.utterance is not None else None
+        real = utt is not None and utt.turn
+
+        # caller speech while the agent's reply is due or playing
+        interrupt_at = seg.start + settings.min_interruption_duration
+        if seg.start < reply_end and seg.end >= interrupt_at:
+            if interrupt_at <= reply_start:
+                reply_end = reply_start  # reply dropped before it was heard
+            elif interrupt_at < reply_end:
+                if real:
+                    out.interruptions += 1
+                    reply_end = interrupt_at
+                else:
+                    out.false_interruptions += 1
+                    if utt is not None and utt.text.strip():
+                        reply_end = interrupt_at  # a transcript: the agent doesn't resume
+                    else:
+                        paused = seg.end + settings.false_interruption_timeout - interrupt_at
+                        out.resumed += 1
+                        out.paused_s += paused
+                        reply_end += paused
+
+        # end of turn after this segment
+        if seg.eou_probability is None:
+            continue
+        delay = settings.min_endpointing_delay
+        if rec.threshold is not None and seg.eou_probability < rec.threshold:
+            delay = settings.max_endpointing_delay
+        endpoint = seg.end + max(delay, opts.vad_min_silence, opts.stt_delay)
+        resumes = rec.segments[k + 1].start if k + 1 < len(rec.segments) else math.inf
+        if resumes < endpoint:
+            if real and seg.last:
+                out.merged += 1
+            continue
+        if real and not seg.last:
+            out.false_endpoints += 1
+        if real and seg.last:
+            out.latencies[seg.utterance] = endpoint - utt.end  # type: ignore[index, union-attr]
+        reply_start = endpoint + opts.response_s
+        reply_end = reply_start + opts.reply_s
+    return out
+
+
+def grid(
+    min_delays: Iterable[float],
+    max_delays: Iterable[float],
+    min_interruptions: Iterable[float],
+    timeouts: Iterable[float],
+) -> list[Settings]:
+    return [
+        Settings(*values)
+        for values in itertools.product(min_delays, max_delays, min_interruptions, timeouts)
+        if values[0] <= values[1]
+    ]
+
+
+def summarize(settings: Settings, outcomes: list[Outcome]) -> dict[str, Any]:
+    latencies = sorted(x for o in outcomes for x in o.latencies.values())
+    turns = sum(o.turns for o in outcomes)
+    return {
+        **asdict(settings),
+        "turns": turns,
+        "eot_p50_ms": _pct(latencies, 50),
+        "eot_p90_ms": _pct(latencies, 90),
+        "eot_mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+        "merged": sum(o.merged for o in outcomes),
+        "false_endpoints": sum(o.false_endpoints for o in outcomes),
+        "false_endpoint_rate": sum(o.false_endpoints for o in outcomes) / turns if turns else 0.0,
+        "interruptions": sum(o.interruptions for o in outcomes),
+        "false_interruptions": sum(o.false_interruptions for o in outcomes),
+        "resumed": sum(o.resumed for o in outcomes),
+        "paused_s": sum(o.paused_s for o in outcomes),
+    }
+
+
+def _pct(sorted_s: list[float], q: float) -> float | None:
+    if not sorted_s:
+        return None
+    return sorted_s[min(len(sorted_s) - 1, int(len(sorted_s) * q / 100))] * 1000
+
+
+# ── worker processes ─────────────────────────────────────────────
+_detector: tuple[EouFn, Callable[[str], float | None]] | None = None
+
+
+def replay_file(
+    path: str, settings: list[Settings], opts: ReplayOptions
+) -> tuple[dict[str, Any], list[Outcome]]:
+    """Analyze one recording with the real models and replay it for every grid point."""
+    global _detector
+    if _detector is None:
+        _detector = turn_detector()  # once per worker process
+    eou, threshold = _detector
+
+    audio_path = Path(path)
+    meta = json.loads(sidecar_path(audio_path).read_text())
+    utterances = [Utterance(**u) for u in meta["utterances"]]
+    audio = load_audio(audio_path, meta.get("sample_rate"))
+    probs, window_s = vad_probabilities(audio)
+    speech = speech_segments(probs, window_s, min_silence_s=opts.vad_min_silence)
+    rec = analyze(audio_path.name, utterances, speech, eou, threshold(meta.get("language", "de")))
+
+    outcomes = [simulate(rec, s, opts) for s in settings]
+    turns = [
+        {
+            "start": u.start,
+            "end": u.end,
+            "text": u.text,
+            "eot_ms": [_ms(o.latencies.get(i)) for o in outcomes],  # per grid point
+        }
+        for i, u in enumerate(utterances)
+        if u.turn and u.text.strip()
+    ]
+    info = {
+        "file": path,
+        "seconds": len(audio) / VAD_SAMPLE_RATE,
+        "segments": len(rec.segments),
+        "threshold": rec.threshold,
+        "turns": turns,
+    }
+    return info, outcomes
+
+
+def run(
+    paths: list[str], settings: list[Settings], opts: ReplayOptions, jobs: int
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """(per-file results with each turn's latency per grid point, summary per grid point)"""
+    ctx = get_context("spawn")
+    with ProcessPoolExecutor(max(1, min(jobs, len(paths))), mp_context=ctx) as pool:
+        results = list(pool.map(replay_file, paths, [settings] * len(paths), [opts] * len(paths)))
+
+    files = [info for info, _ in results]
+    summary = [
+        summarize(s, [outcomes[i] for _, outcomes in results]) for i, s in enumerate(settings)
+    ]
+    return files, summary
+
+
+def main() -> None:
+    import agent
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("audio", nargs="+", help="caller WAV or .pcm.gz files with sidecars")
+    parser.add_argument("--min-endpointing", default=str(agent.MIN_ENDPOINTING_DELAY))
+    parser.add_argument("--max-endpointing", default=str(agent.MAX_ENDPOINTING_DELAY))
+    parser.add_argument("--min-interruption", default=str(agent.MIN_INTERRUPTION_DURATION))
+    parser.add_argument(
+        "--false-interruption-timeout", default=str(agent.FALSE_INTERRUPTION_TIMEOUT)
+    )
+    parser.add_argument("--stt-delay", type=float, default=0.3)
+    parser.add_argument("--response-s", type=float, default=0.8, help="end of turn -> agent audio")
+    parser.add_argument("--reply-s", type=float, default=3.0, help="length of an agent reply")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", type=Path, help="write per-file and per-setting results here")
+    args = parser.parse_args()
+
+    def _floats(s: str) -> list[float]:
+        return [float(x) for x in s.split(",")]
+
+    settings = grid(
+        _floats(args.min_endpointing),
+        _floats(args.max_endpointing),
+        _floats(args.min_interruption),
+        _floats(args.false_interruption_timeout),
+    )
+    opts = ReplayOptions(stt_delay=args.stt_delay, response_s=args.response_s, reply_s=args.reply_s)
+    files, summary = run(args.audio, settings, opts, args.jobs)
+
+    print(
+        f"{'min':>6}{'max':>6}{'intr':>6}{'fi to':>6}{'turns':>7}{'eot p50':>9}{'eot p90':>9}"
+        f"{'false ep':>10}{'merged':>8}{'intr':>6}{'false intr':>12}{'paused s':>10}"
+    )
+    for row in sorted(summary, key=lambda r: (r["false_endpoint_rate"], r["eot_p50_ms"] or 0)):
+        print(
+            f"{row['min_endpointing_delay']:>6.2f}{row['max_endpointing_delay']:>6.2f}"
+            f"{row['min_interruption_duration']:>6.2f}{row['false_interruption_timeout']:>6.1f}"
+            f"{row['turns']:>7}{_fmt(row['eot_p50_ms']):>9}{_fmt(row['eot_p90_ms']):>9}"
+            f"{row['false_endpoints']:>10}{row['merged']:>8}{row['interruptions']:>6}"
+            f"{row['false_interruptions']:>12}{row['paused_s']:>10.1f}"
+        )
+
+    if args.json:
+        result = {
+            "meta": {
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "options": asdict(opts),
+            },
+            "settings": [asdict(s) for s in settings],
+            "files": files,
+            "summary": summary,
+        }
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+def _ms(s: float | None) -> int | None:
+    return None if s is None else round(s * 1000)
+
+
+def _fmt(ms: float | None) -> str:
+    return "-" if ms is None else f"{ms:.0f}"
+
+
+if __name__ == "__main__":
+    main()
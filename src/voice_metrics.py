@@ -0,0 +1,268 @@
+"""
+Per-turn latency and TTS synthesis metrics.
+
+Stage timings come from the AgentSession events: end of user speech -> end of utterance
+committed (eou) -> final transcript (stt) -> LLM first token (llm_ttft) -> TTS first
+byte (tts_ttfb) -> agent audio out (response). The LLM request's prompt size
+(prompt_tokens) is recorded with each turn too. PiperTTS reports per-chunk synthesis
+times, its adaptive chunk sizes and text-frontend stage timings here as well,
+piper_fillers the fillers played, llm_cache its hit rate and call_recorder what it
+had to drop.
+
+Metrics are prometheus_client histograms, served by the worker's own endpoint
+(AgentServer(prometheus_port=...)); with `prometheus_multiproc_dir` set, values from every
+job process are aggregated. Each completed turn is also appended as one JSON line to a
+size-rotated file per process (JsonlSink), written from a background thread.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from pathlib import Path
+from typing import Any
+
+from livekit.agents import AgentSession, metrics
+from prometheus_client import Counter, Gauge, Histogram
+
+from worker_load import observe_synthesis
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+RTF_BUCKETS = (0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0)
+CHARS_BUCKETS = (10, 20, 35, 50, 60, 80, 120, 160, 200, 300)
+
+TURN_STAGE_SECONDS = Histogram(
+    "voice_agent_turn_stage_seconds",
+    "Per-turn latency by stage (eou, stt, llm_ttft, tts_ttfb, response)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "voice_agent_llm_prompt_tokens",
+    "Prompt tokens per LLM request (chat context size)",
+    buckets=(250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000),
+)
+TTS_CHUNK_SECONDS = Histogram(
+    "voice_agent_tts_chunk_synthesis_seconds",
+    "Synthesis time per TTS chunk",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+TTS_CHUNK_RTF = Histogram(
+    "voice_agent_tts_chunk_rtf",
+    "Synthesis seconds per second of audio, per TTS chunk",
+    ["source"],
+    buckets=RTF_BUCKETS,
+)
+TTS_CHUNK_CHARS = Histogram(
+    "voice_agent_tts_chunk_chars", "Characters per TTS chunk", buckets=CHARS_BUCKETS
+)
+TTS_CACHE_HITS = Counter("voice_agent_tts_cache_hits", "TTS chunks served from the PCM cache")
+TTS_WASTED_SECONDS = Counter(
+    "voice_agent_tts_wasted_inference_seconds",
+    "Inference time spent on TTS audio that was never played (barge-in)",
+    ["reason"],  # aborted: stopped mid-chunk, discarded: finished but not played
+)
+TTS_CANCELLED_CHUNKS = Counter(
+    "voice_agent_tts_cancelled_chunks",
+    "TTS chunks cancelled by barge-in, by how far inference had got",
+    ["stage"],  # queued (nothing spent), running, done
+)
+TTS_FRONTEND_SECONDS = Histogram(
+    "voice_agent_tts_frontend_seconds",
+    "Per-sentence time in the Piper text frontend and model (normalize, phonemize, infer)",
+    ["stage"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+TTS_PHONEME_CACHE = Counter(
+    "voice_agent_tts_phoneme_cache", "Phoneme-id cache lookups per sentence", ["result"]
+)
+LLM_RESPONSE_CACHE = Counter(
+    "voice_agent_llm_response_cache",
+    "LLM response cache lookups per turn",
+    ["result"],  # hit, miss, bypass (turn not cacheable)
+)
+RECORDER_DROPPED = Counter(
+    "voice_agent_recorder_dropped",
+    "Call recorder items dropped because its buffer was full (events, audio bytes)",
+    ["kind"],
+)
+FILLERS_PLAYED = Counter(
+    "voice_agent_fillers_played", "Prerendered fillers played to cover a slow LLM first token"
+)
+TTS_CHUNK_LIMIT = Gauge(
+    "voice_agent_tts_chunk_limit_chars",
+    "Adaptive chunk limits last chosen (first chunk / later chunks)",
+    ["chunk"],
+    multiprocess_mode="mostrecent",
+)
+
+
+def record_chunk(source: str, chars: int, audio_s: float, synth_s: float) -> None:
+    """One synthesized TTS chunk; `source` is "local" or "server"."""
+    observe_synthesis(audio_s, synth_s)  # feeds the worker's load report
+    TTS_CHUNK_SECONDS.labels(source).observe(synth_s)
+    TTS_CHUNK_CHARS.observe(chars)
+    if audio_s > 0:
+        TTS_CHUNK_RTF.labels(source).observe(synth_s / audio_s)
+
+
+def record_cache_hit() -> None:
+    TTS_CACHE_HITS.inc()
+
+
+def record_cancelled_chunk(stage: str, wasted_s: float = 0.0) -> None:
+    """A chunk dropped by a cancelled stream; `wasted_s` of inference went unplayed."""
+    TTS_CANCELLED_CHUNKS.labels(stage).inc()
+    if wasted_s > 0:
+        TTS_WASTED_SECONDS.labels("discarded" if stage == "done" else "aborted").inc(wasted_s)
+
+
+def record_frontend_stage(stage: str, seconds: float) -> None:
+    TTS_FRONTEND_SECONDS.labels(stage).observe(seconds)
+
+
+def record_phoneme_cache(*, hit: bool) -> None:
+    TTS_PHONEME_CACHE.labels("hit" if hit else "miss").inc()
+
+
+def record_llm_cache(result: str) -> None:
+    LLM_RESPONSE_CACHE.labels(result).inc()
+
+
+def record_recorder_drop(kind: str, amount: int = 1) -> None:
+    RECORDER_DROPPED.labels(kind).inc(amount)
+
+
+def record_filler() -> None:
+    FILLERS_PLAYED.inc()
+
+
+def record_chunk_limits(first_max_chars: int, max_chars: int) -> None:
+    TTS_CHUNK_LIMIT.labels("first").set(first_max_chars)
+    TTS_CHUNK_LIMIT.labels("rest").set(max_chars)
+
+
+class JsonlSink:
+    """Append-only JSON lines, rotated by size, written off the event loop.
+
+    One file per process (`<name>-<pid>.jsonl`): rotating a file shared between job
+    processes would race.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        name: str = "turns",
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 5,
+    ) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{name}-{os.getpid()}.jsonl"
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self._queue, self._handler)
+        self._listener.start()
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        # straight onto the listener's queue: no logger, so app log config can't touch it
+        self._queue.put(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self) -> None:
+        self._listener.stop()  # drains what's queued
+        self._handler.close()
+
+
+class SessionMetrics:
+    """Collects stage timings for one AgentSession and emits them per turn."""
+
+    def __init__(
+        self, session: AgentSession, *, sink: JsonlSink | None = None, room: str = ""
+    ) -> None:
+        self._session = session
+        self._sink = sink
+        self._room = room
+        self._user_stopped_at: float | None = None
+        self._turns: dict[str, dict[str, Any]] = {}  # speech_id -> record
+
+    def attach(self) -> None:
+        session = self._session
+        session.on("user_state_changed", self._on_user_state)
+        session.on("agent_state_changed", self._on_agent_state)
+        session.on("user_input_transcribed", self._on_transcript)
+        session.on("conversation_item_added", self._on_item)
+        session.on("metrics_collected", self._on_metrics)
+
+    def flush(self) -> None:
+        """Emit pending turns (call when the session ends)."""
+        for speech_id in list(self._turns):
+            self._emit(speech_id)
+
+    def _turn(self, speech_id: str | None) -> dict[str, Any] | None:
+        if not speech_id:
+            return None
+        return self._turns.setdefault(speech_id, {"speech_id": speech_id})
+
+    def _stage(self, speech_id: str | None, stage: str, seconds: float) -> None:
+        turn = self._turn(speech_id)
+        if turn is None or stage in turn:
+            return  # first value per turn only (e.g. ttfb of the first TTS segment)
+        turn[stage] = round(seconds, 4)
+        TURN_STAGE_SECONDS.labels(stage).observe(seconds)
+
+    def _emit(self, speech_id: str) -> None:
+        turn = self._turns.pop(speech_id)
+        if self._sink is not None:
+            self._sink.write({"ts": time.time(), "room": self._room, **turn})
+
+    def _on_user_state(self, ev: Any) -> None:
+        if ev.new_state == "speaking":
+            self.flush()  # the previous exchange is over
+            self._user_stopped_at = None
+        elif ev.old_state == "speaking":
+            self._user_stopped_at = ev.created_at
+
+    def _on_agent_state(self, ev: Any) -> None:
+        if ev.new_state != "speaking" or self._user_stopped_at is None:
+            return
+        speech = self._session.current_speech
+        self._stage(
+            speech.id if speech else None, "response", ev.created_at - self._user_stopped_at
+        )
+        self._user_stopped_at = None
+
+    def _on_transcript(self, ev: Any) -> None:
+        if ev.is_final:
+            logger.info("USER: %s", ev.transcript)
+
+    def _on_item(self, ev: Any) -> None:
+        item = ev.item
+        if getattr(item, "role", None) == "assistant" and item.text_content:
+            logger.info("AGENT: %s", item.text_content)
+
+    def _on_metrics(self, ev: Any) -> None:
+        m = ev.metrics
+        if isinstance(m, metrics.EOUMetrics):
+            self._stage(m.speech_id, "eou", m.end_of_utterance_delay)
+            self._stage(m.speech_id, "stt", m.transcription_delay)
+        elif isinstance(m, metrics.LLMMetrics):
+            self._stage(m.speech_id, "llm_ttft", m.ttft)
+            turn = self._turn(m.speech_id)
+            if turn is not None and "prompt_tokens" not in turn:
+                turn["prompt_tokens"] = m.prompt_tokens
+                LLM_PROMPT_TOKENS.observe(m.prompt_tokens)
+        elif isinstance(m, metrics.TTSMetrics):
+            if m.ttfb >= 0:
+                self._stage(m.speech_id, "tts_ttfb", m.ttfb)
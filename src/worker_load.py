@@ -0,0 +1,228 @@
+"""
+Worker load from TTS saturation, not just CPU.
+
+LiveKit's default load is the host CPU average, which stays moderate while Piper's
+inference queues back up (workers block in onnxruntime with their intra-op threads, and
+callers hear the gap before the CPU number moves). Each job process, and the shared TTS
+server if there is one, runs a LoadReporter that writes its executor's queue depth and
+its recent synthesis real-time factor to `<dir>/<pid>.json` twice a second. WorkerLoad,
+the AgentServer load_fnc in the main process, reads them and reports
+
+    load = max(cpu, queued per inference worker / MAX_BACKLOG_PER_WORKER, rtf / RTF_LIMIT)
+
+each term clamped to [0, 1]: the worker is as loaded as its most saturated resource.
+AgentServer stops taking jobs once load reaches its load_threshold.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+REPORT_INTERVAL_S = 0.5  # LiveKit re-evaluates load every 0.5s
+STALE_AFTER_S = 3.0  # status files older than this are from a stuck or dead process
+MAX_BACKLOG_PER_WORKER = 2.0  # queued chunks per inference worker that count as full
+RTF_LIMIT = 0.8  # synthesis this close to real time leaves no headroom for a new call
+RTF_IDLE_S = 10.0  # forget the RTF after this long without synthesis
+RTF_DECAY = 0.8
+
+WORKER_LOAD = Gauge(
+    "voice_agent_worker_load",
+    "Load reported to the dispatcher and its components",
+    ["component"],
+    multiprocess_mode="mostrecent",
+)
+
+
+@dataclass
+class LoadStatus:
+    pid: int
+    ts: float
+    queued: int
+    busy: int
+    workers: int
+    rtf: float | None  # None: nothing synthesized recently
+
+
+class _RtfTracker:
+    """Recent synthesis seconds per audio second in this process (decayed sums)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._audio = self._synth = 0.0
+        self._last = 0.0
+
+    def observe(self, audio_s: float, synth_s: float) -> None:
+        if audio_s <= 0:
+            return
+        with self._lock:
+            self._audio = RTF_DECAY * self._audio + audio_s
+            self._synth = RTF_DECAY * self._synth + synth_s
+            self._last = time.monotonic()
+
+    def value(self) -> float | None:
+        with self._lock:
+            if not self._audio or time.monotonic() - self._last > RTF_IDLE_S:
+                return None
+            return self._synth / self._audio
+
+
+_rtf = _RtfTracker()
+
+
+def observe_synthesis(audio_s: float, synth_s: float) -> None:
+    """One synthesized TTS chunk in this process (voice_metrics.record_chunk calls this)."""
+    _rtf.observe(audio_s, synth_s)
+
+
+class LoadReporter:
+    """Publishes this process's inference state for the worker's WorkerLoad."""
+
+    def __init__(
+        self, directory: str | Path, executor: Any, *, interval: float = REPORT_INTERVAL_S
+    ) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self.path = self._dir / f"{os.getpid()}.json"
+        self._executor = executor
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-reporter", daemon=True)
+
+    def start(self) -> LoadReporter:
+        self.write()
+        self._thread.start()
+        return self
+
+    def status(self) -> LoadStatus:
+        stats = self._executor.stats()
+        return LoadStatus(
+            pid=os.getpid(),
+            ts=time.time(),
+            queued=stats["queued"],
+            busy=stats["busy"],
+            workers=stats["workers"],
+            rtf=_rtf.value(),
+        )
+
+    def write(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(self.status())))
+        os.replace(tmp, self.path)  # readers never see a partial file
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning("Failed to write load status: %s", e)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_statuses(directory: str | Path, *, now: float | None = None) -> list[LoadStatus]:
+    """Fresh statuses in `directory`; files of exited processes are removed."""
+    now = time.time() if now is None else now
+    statuses = []
+    for path in Path(directory).glob("*.json"):
+        try:
+            status = LoadStatus(**json.loads(path.read_text()))
+        except (OSError, ValueError, TypeError):
+            continue  # vanished or foreign file
+        if not _pid_alive(status.pid):
+            path.unlink(missing_ok=True)
+            continue
+        if now - status.ts <= STALE_AFTER_S:
+            statuses.append(status)
+    return statuses
+
+
+@dataclass
+class LoadComponents:
+    cpu: float
+    queue: float
+    rtf: float
+
+    @property
+    def load(self) -> float:
+        return max(self.cpu, self.queue, self.rtf)
+
+
+def combine(cpu: float, statuses: list[LoadStatus]) -> LoadComponents:
+    workers = sum(s.workers for s in statuses)
+    queued = sum(s.queued for s in statuses)
+    backlog = queued / workers / MAX_BACKLOG_PER_WORKER if workers else 0.0
+    rtfs = [s.rtf for s in statuses if s.rtf is not None]
+    rtf = max(rtfs, default=0.0) / RTF_LIMIT
+    return LoadComponents(cpu=min(max(cpu, 0.0), 1.0), queue=min(backlog, 1.0), rtf=min(rtf, 1.0))
+
+
+class WorkerLoad:
+    """AgentServer load_fnc: max of CPU, inference backlog and synthesis RTF."""
+
+    def __init__(
+        self, directory: str | Path, *, cpu_percent: Callable[[], float] | None = None
+    ) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._cpu_percent = cpu_percent
+        self.last: LoadComponents | None = None
+
+    def __call__(self) -> float:
+        if self._cpu_percent is None:
+            # first call, in the main process (job processes import agent.py too)
+            self._cpu_percent = _CpuSampler().get
+        components = combine(self._cpu_percent(), read_statuses(self._dir))
+        self.last = components
+        for name in ("cpu", "queue", "rtf"):
+            WORKER_LOAD.labels(name).set(getattr(components, name))
+        WORKER_LOAD.labels("load").set(components.load)
+        return components.load
+
+
+class _CpuSampler:
+    """Host CPU averaged over ~2.5s, sampled in the background like LiveKit's default."""
+
+    def __init__(self, window: int = 5) -> None:
+        from livekit.agents.utils.hw import get_cpu_monitor
+
+        self._monitor = get_cpu_monitor()
+        self._samples: list[float] = []
+        self._window = window
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name="worker-load-cpu", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            sample = self._monitor.cpu_percent(interval=REPORT_INTERVAL_S)
+            with self._lock:
+                self._samples = [*self._samples[-(self._window - 1) :], sample]
+
+    def get(self) -> float:
+        with self._lock:
+            return sum(self._samples) / len(self._samples) if self._samples else 0.0
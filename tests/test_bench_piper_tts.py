@@ -0,0 +1,26 @@
+from bench_piper_tts import REPLIES, bench_chunking, bench_level, compare
+from fake_piper_voice import FakePiperVoice
+
+
+async def test_bench_level_reports_latency_and_throughput() -> None:
+    result = await bench_level(FakePiperVoice(), 2, REPLIES[:2], workers=2, lookahead=2)
+
+    assert result["concurrency"] == 2
+    assert 0 < result["ttfb_p50_ms"] <= result["ttfb_p95_ms"]
+    assert result["audio_s_per_s"] > 0
+    assert result["peak_rss_mb"] > 0
+    assert bench_chunking(REPLIES, iterations=1)["chunks_per_reply"] >= 1
+
+
+def test_compare_flags_regressions_beyond_tolerance() -> None:
+    base = {
+        "levels": [{"concurrency": 1, "ttfb_p50_ms": 100, "ttfb_p95_ms": 200, "audio_s_per_s": 50}]
+    }
+    slower = {
+        "levels": [{"concurrency": 1, "ttfb_p50_ms": 150, "ttfb_p95_ms": 210, "audio_s_per_s": 48}]
+    }
+
+    problems = compare(slower, base, tolerance=0.25)
+
+    assert len(problems) == 1 and "ttfb_p50_ms" in problems[0]
+    assert compare(base, base, tolerance=0.0) == []
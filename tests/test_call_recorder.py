@@ -0,0 +1,41 @@
+import gzip
+import json
+
+from livekit import rtc
+
+from call_recorder import CallRecorder
+
+
+def _frame(samples: int = 480) -> rtc.AudioFrame:
+    return rtc.AudioFrame(b"\x01\x00" * samples, 48000, 1, samples)
+
+
+async def test_transcript_and_audio_are_written_per_room(tmp_path) -> None:
+    recorder = CallRecorder(tmp_path, "room/a", audio=True, flush_interval_s=0.01)
+
+    async def _frames():
+        for _ in range(3):
+            yield _frame()
+
+    recorder.event("message", role="user", text="Grüezi")
+    played = [f async for f in recorder.tee(_frames(), "agent")]
+    recorder.close()
+
+    lines = gzip.decompress(recorder.path.read_bytes()).decode("utf-8").splitlines()
+    events = [json.loads(line) for line in lines]
+    assert [e["kind"] for e in events] == ["message", "audio"]
+    assert events[0]["text"] == "Grüezi"
+    audio = tmp_path / events[1]["file"]
+    assert audio.name.startswith("room_a-") and audio.name.endswith(".agent.pcm.gz")
+    assert gzip.decompress(audio.read_bytes()) == b"".join(bytes(f.data) for f in played)
+
+
+def test_full_buffer_drops_instead_of_blocking(tmp_path) -> None:
+    recorder = CallRecorder(tmp_path, "room", audio=True, max_buffer_bytes=2000)
+    for _ in range(5):
+        recorder.audio("caller", _frame())  # 960 bytes each, never flushed in between
+    recorder.close()
+
+    assert recorder.stats["audio_bytes"] == 960
+    assert recorder.stats["dropped_audio_bytes"] == 4 * 960
+    assert recorder.stats["dropped_events"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+
+from livekit.agents import llm
+
+from context_compaction import SUMMARY_PREFIX, ContextCompactor
+
+
+def _call(turns: int) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="Du bisch en Telefonassistent.")
+    for i in range(turns):
+        chat_ctx.add_message(role="user", content=f"Frag {i}: " + "bla " * 40)
+        chat_ctx.add_message(role="assistant", content=f"Antwort {i}: " + "jo " * 40)
+    return chat_ctx
+
+
+def _texts(chat_ctx: llm.ChatContext) -> list[str]:
+    return [item.text_content or "" for item in chat_ctx.items]
+
+
+async def test_old_turns_are_summarised_in_the_background() -> None:
+    calls: list[int] = []
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def _summarize(summary: str, messages) -> str:
+        calls.append(len(messages))
+        started.set()
+        await release.wait()
+        return "Anrufer will en Termin."
+
+    compactor = ContextCompactor(_summarize, budget_tokens=10_000, keep_turns=2)
+    chat_ctx = _call(5)
+    compactor.schedule(chat_ctx)
+    await asyncio.wait_for(started.wait(), 1)
+
+    # summary still running: nothing waits for it, older turns go verbatim
+    assert len(compactor.compact(chat_ctx).items) == len(chat_ctx.items)
+    release.set()
+    await asyncio.wait_for(compactor._task, 1)  # aclose() would cancel an unfinished summary
+    await compactor.aclose()
+
+    compacted = _texts(compactor.compact(chat_ctx))
+    assert calls == [6]  # three turns left the window
+    assert compacted[1] == SUMMARY_PREFIX + "Anrufer will en Termin."
+    assert compacted[0] == "Du bisch en Telefonassistent."
+    assert compacted[2].startswith("Frag 3") and compacted[-1].startswith("Antwort 4")
+
+
+async def test_budget_drops_oldest_turns_but_keeps_the_latest_question() -> None:
+    async def _never(summary: str, messages) -> str:
+        raise AssertionError
+
+    compactor = ContextCompactor(_never, budget_tokens=120, keep_turns=4)
+    chat_ctx = _call(6)
+    chat_ctx.add_message(role="user", content="Und jetzt?")
+
+    compacted = compactor.compact(chat_ctx)
+
+    assert compactor.last_estimate <= 120
+    assert _texts(compacted)[0] == "Du bisch en Telefonassistent."
+    assert _texts(compacted)[-1] == "Und jetzt?"
+    assert len(compacted.items) < len(chat_ctx.items)
@@ -0,0 +1,114 @@
+import hashlib
+import http.server
+import threading
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from download_piper_models import DownloadError, ModelFile, download, download_file
+
+MODEL = bytes(range(256)) * 4096  # 1 MiB
+MODEL_PATH = "de/de_DE/thorsten/medium/voice.onnx"
+
+
+def _model_file(**kw) -> ModelFile:
+    return ModelFile(
+        MODEL_PATH, **{"sha256": hashlib.sha256(MODEL).hexdigest(), "size": len(MODEL), **kw}
+    )
+
+
+def _mirror(root: Path) -> Path:
+    (root / MODEL_PATH).parent.mkdir(parents=True)
+    (root / MODEL_PATH).write_bytes(MODEL)
+    (root / "de/de_DE/thorsten/medium/voice.onnx.json").write_text('{"audio": {}}')
+    return root
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    ranges: ClassVar[list[str | None]] = []
+
+    def do_GET(self) -> None:
+        offset = 0
+        if rng := self.headers.get("Range"):
+            offset = int(rng.removeprefix("bytes=").rstrip("-"))
+        self.ranges.append(rng)
+        body = MODEL[offset:]
+        self.send_response(206 if offset else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.send_response(302)  # like Hugging Face's resolve URLs for LFS files
+        self.send_header("Location", "/cdn/voice.onnx")
+        self.send_header("X-Linked-Etag", f'"{hashlib.sha256(MODEL).hexdigest()}"')
+        self.send_header("X-Linked-Size", str(len(MODEL)))
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_download_resumes_a_partial_file_over_http(tmp_path) -> None:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    (tmp_path / "voice.onnx.part").write_bytes(MODEL[:300_000])
+    try:
+        download_file(_model_file(), f"http://127.0.0.1:{server.server_port}", tmp_path)
+    finally:
+        server.shutdown()
+
+    assert _RangeHandler.ranges == ["bytes=300000-"]
+    assert (tmp_path / "voice.onnx").read_bytes() == MODEL
+    assert not (tmp_path / "voice.onnx.part").exists()
+
+
+def test_mirror_download_verifies_and_replaces_corrupt_files(tmp_path) -> None:
+    mirror = _mirror(tmp_path / "mirror")
+    dest = tmp_path / "models"
+    dest.mkdir()
+    (dest / "voice.onnx").write_bytes(MODEL[:1000])  # truncated by an earlier run
+
+    config = ModelFile("de/de_DE/thorsten/medium/voice.onnx.json")
+    results = download([_model_file(), config], str(mirror), dest, jobs=2)
+
+    assert results["voice.onnx"] == hashlib.sha256(MODEL).hexdigest()
+    assert (dest / "voice.onnx").read_bytes() == MODEL
+    assert (dest / "voice.onnx.json").exists()
+
+
+def test_checksum_mismatch_never_lands_in_place(tmp_path) -> None:
+    mirror = _mirror(tmp_path / "mirror")
+
+    with pytest.raises(DownloadError):
+        download_file(_model_file(sha256="0" * 64), str(mirror), tmp_path)
+
+    assert not (tmp_path / "voice.onnx").exists()
+    assert not (tmp_path / "voice.onnx.part").exists()
+
+
+def test_unpinned_truncated_file_is_checked_against_the_source(tmp_path) -> None:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    (tmp_path / "voice.onnx").write_bytes(MODEL[:10])
+    try:
+        digest = download_file(
+            ModelFile(MODEL_PATH), f"http://127.0.0.1:{server.server_port}", tmp_path
+        )
+    finally:
+        server.shutdown()
+
+    assert digest == hashlib.sha256(MODEL).hexdigest()
+    assert (tmp_path / "voice.onnx").read_bytes() == MODEL
+
+
+def test_unpinned_file_with_nothing_to_check_against_is_not_accepted(tmp_path) -> None:
+    (tmp_path / "voice.onnx").write_bytes(MODEL[:10])
+
+    with pytest.raises(DownloadError):
+        download_file(
+            ModelFile(MODEL_PATH), "http://mirror", tmp_path, remote=lambda _: (None, None)
+        )
+
+    assert (tmp_path / "voice.onnx").read_bytes() == MODEL[:10]
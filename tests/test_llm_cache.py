@@ -0,0 +1,88 @@
+from livekit.agents import llm
+
+from llm_cache import ResponseCache
+
+GREETING = "Hallo! Wie kann ich Ihnen helfen?"
+
+
+def _chat(*turns: str) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="instructions")
+    chat_ctx.add_message(role="assistant", content=GREETING)
+    for i, text in enumerate(turns):
+        chat_ctx.add_message(role="user" if i % 2 == 0 else "assistant", content=text)
+    return chat_ctx
+
+
+class _FakeLLM:
+    def __init__(self, *chunks: str | llm.ChatChunk) -> None:
+        self.chunks = chunks
+        self.calls = 0
+
+    async def node(self):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def _reply(cache: ResponseCache, chat_ctx: llm.ChatContext, fake: _FakeLLM) -> str:
+    chunks = [c async for c in cache.respond(chat_ctx, "instructions", fake.node)]
+    return "".join(c for c in chunks if isinstance(c, str))
+
+
+async def test_repeated_question_is_served_from_a_shared_directory(tmp_path) -> None:
+    fake = _FakeLLM("Mir händ ", "vo achti bis füfi offe.")
+    first = ResponseCache(disk_dir=tmp_path)
+    await _reply(first, _chat("Wann händ Sie offe?"), fake)
+
+    other_process = ResponseCache(disk_dir=tmp_path)
+    reply = await _reply(other_process, _chat("wann HÄND sie offe"), fake)
+
+    assert reply == "Mir händ vo achti bis füfi offe."
+    assert fake.calls == 1
+    assert other_process.stats().hit_rate == 1.0
+
+
+async def test_key_includes_instructions_and_recent_context() -> None:
+    cache = ResponseCache()
+    chat_ctx = _chat("Ja.")
+    other_greeting = llm.ChatContext.empty()
+    other_greeting.add_message(role="assistant", content="Praxis Müller, grüezi.")
+    other_greeting.add_message(role="user", content="Ja.")
+    assert cache.key(chat_ctx, "a") != cache.key(chat_ctx, "b")
+    assert cache.key(chat_ctx, "a") != cache.key(other_greeting, "a")
+    assert cache.key(_chat("Ja.", "Guet."), "a") is None  # last message is not the caller's
+
+
+async def test_only_the_callers_first_turn_is_cached(tmp_path) -> None:
+    cache = ResponseCache(disk_dir=tmp_path)
+    later = _chat("Ich bi de Herr Meier.", "Grüezi Herr Meier.", "Wann isch min Termin nomal?")
+    fake = _FakeLLM("Am Mäntig am nüni.")
+
+    assert cache.key(later, "instructions") is None
+    await _reply(cache, later, fake)
+    await _reply(cache, later, fake)
+
+    assert fake.calls == 2
+    assert cache.stats().stores == 0 and cache.stats().bypassed == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_expired_interrupted_and_tool_replies_are_not_served() -> None:
+    now = [1000.0]
+    cache = ResponseCache(ttl_s=60, clock=lambda: now[0])
+    fake = _FakeLLM("Grüezi.")
+    await _reply(cache, _chat("Hallo"), fake)
+    now[0] += 61
+    await _reply(cache, _chat("Hallo"), fake)
+    assert fake.calls == 2
+    assert cache.stats().expired == 1
+
+    interrupted = cache.respond(_chat("Wer isch dra?"), "instructions", _FakeLLM("A", "B").node)
+    await anext(interrupted)
+    await interrupted.aclose()
+    tool_call = llm.FunctionToolCall(name="book", arguments="{}", call_id="1")
+    chunk = llm.ChatChunk(id="1", delta=llm.ChoiceDelta(role="assistant", tool_calls=[tool_call]))
+    await _reply(cache, _chat("Termin bitte"), _FakeLLM(chunk))
+
+    assert cache.stats().stores == 2  # only the two "Hallo" replies
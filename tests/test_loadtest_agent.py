@@ -0,0 +1,37 @@
+from livekit.agents import llm
+
+from loadtest_agent import LoadTestConfig, StubLLM, capacity, run_calls
+
+
+async def test_stub_llm_streams_the_canned_reply() -> None:
+    stub = StubLLM(ttft=0.0, tokens_per_s=1000.0, replies=["Grüezi mitenand, wie gohts?"])
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content="Hallo")
+
+    async with stub.chat(chat_ctx=chat_ctx) as stream:
+        text = "".join([chunk.delta.content async for chunk in stream if chunk.delta])
+
+    assert text == "Grüezi mitenand, wie gohts?"
+
+
+def test_capacity_is_the_largest_level_within_the_slo() -> None:
+    levels = [
+        {"calls": 1, "missed": 0, "e2e_p95_ms": 900.0},
+        {"calls": 4, "missed": 0, "e2e_p95_ms": 1400.0},
+        {"calls": 8, "missed": 1, "e2e_p95_ms": 1300.0},
+        {"calls": 16, "missed": 0, "e2e_p95_ms": 2600.0},
+    ]
+    assert capacity(levels, slo_ms=1500) == 4
+    assert capacity(levels, slo_ms=500) == 0
+
+
+async def test_synthetic_call_gets_answered() -> None:
+    cfg = LoadTestConfig(turns=1, stt_latency=0.05, llm_ttft=0.05, ramp_s=0.0, fake_voice=True)
+
+    result = await run_calls([0], cfg)
+
+    (call,) = result["calls"]
+    assert call["missed"] == 0
+    assert len(call["latencies"]) == 1
+    assert any("llm_ttft" in turn for turn in call["turns"])
+    assert result["cpu_s"] > 0
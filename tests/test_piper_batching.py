@@ -0,0 +1,92 @@
+import threading
+
+from fake_piper_voice import FakePiperVoice
+from piper_batching import BatchingEngine, synthesize_batched
+from piper_executor import InferenceExecutor
+from piper_tts_plugin import PiperTTS
+
+TEXTS = [
+    "Grüezi mitenand.",
+    "Wie chan ich Ihne hälfe? Ich bi da.",
+    "Danke für Ihre Aaruef.",
+    "Uf Widerluege.",
+]
+
+
+def _unbatched(voice: FakePiperVoice, text: str) -> list[bytes]:
+    return [c.audio_int16_array.tobytes() for c in voice.synthesize(text)]
+
+
+def test_concurrent_callers_share_batches_and_get_their_own_audio() -> None:
+    voice = FakePiperVoice(audio_per_char=0.01, call_overhead=0.01)
+    engine = BatchingEngine(voice, window_ms=20, max_batch=8)
+    results: dict[str, list[bytes]] = {}
+    barrier = threading.Barrier(len(TEXTS))
+
+    def _caller(text: str) -> None:
+        barrier.wait()
+        results[text] = synthesize_batched(engine, text)
+
+    threads = [threading.Thread(target=_caller, args=(t,)) for t in TEXTS]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    stats = engine.stats()
+    engine.close()
+
+    assert stats.max_batch > 1
+    assert stats.items == sum(len(voice.phonemize(t)) for t in TEXTS)
+    reference = FakePiperVoice(audio_per_char=0.01)
+    for text in TEXTS:
+        assert results[text] == _unbatched(reference, text)
+
+
+async def test_tts_uses_batching_engine() -> None:
+    voice = FakePiperVoice(audio_per_char=0.01)
+    engine = BatchingEngine(voice, window_ms=1)
+    tts = PiperTTS(model_path="fake.onnx", batching=engine, executor=InferenceExecutor(2))
+
+    frames = [ev.frame async for ev in tts.synthesize(TEXTS[1])]
+    engine.close()
+
+    audio = b"".join(bytes(f.data) for f in frames)
+    expected = b"".join(_unbatched(FakePiperVoice(audio_per_char=0.01), TEXTS[1]))
+    assert audio[: len(expected)] == expected
+    assert engine.stats().items == 2
+    assert voice.texts == []  # went through the engine, not voice.synthesize
+
+
+def test_frontend_only_applies_when_enabled() -> None:
+    voice = FakePiperVoice(audio_per_char=0.01)
+    engine = BatchingEngine(voice, window_ms=1)
+    text = "Termin am 12.03.2025."
+
+    plain = synthesize_batched(engine, text)
+    normalized = synthesize_batched(engine, text, frontend=True)
+    engine.close()
+
+    assert plain == _unbatched(FakePiperVoice(audio_per_char=0.01), text)
+    assert normalized != plain
+
+
+def test_model_without_durations_output_is_not_batched() -> None:
+    voice = FakePiperVoice(audio_per_char=0.01, call_overhead=0.01, durations=False)
+    engine = BatchingEngine(voice, window_ms=20, max_batch=8)
+    results: dict[str, list[bytes]] = {}
+    barrier = threading.Barrier(len(TEXTS))
+
+    def _caller(text: str) -> None:
+        barrier.wait()
+        results[text] = synthesize_batched(engine, text)
+
+    threads = [threading.Thread(target=_caller, args=(t,)) for t in TEXTS]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    engine.close()
+
+    assert engine.stats().max_batch == 1
+    for text in TEXTS:
+        assert results[text] == _unbatched(FakePiperVoice(audio_per_char=0.01), text)
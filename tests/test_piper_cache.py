@@ -0,0 +1,69 @@
+import threading
+
+from piper_cache import PCMCache, cache_key
+
+
+def test_key_ignores_whitespace_but_not_params() -> None:
+    params = {"length_scale": None}
+    assert cache_key("m", params, "Hallo!  Wie  geht's?") == cache_key(
+        "m", params, " Hallo! Wie geht's?"
+    )
+    assert cache_key("m", params, "Hallo!") != cache_key("m", {"length_scale": 1.2}, "Hallo!")
+    assert cache_key("m", params, "Hallo!") != cache_key("other", params, "Hallo!")
+
+
+def test_memory_lru_is_byte_bounded() -> None:
+    cache = PCMCache(max_memory_bytes=10)
+    cache.put("a", b"\0" * 4)
+    cache.put("b", b"\0" * 4)
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", b"\0" * 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    stats = cache.stats()
+    assert stats.memory_evictions == 1
+    assert stats.memory_bytes == 8
+    assert stats.misses == 1
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path) -> None:
+    writer = PCMCache(disk_dir=tmp_path)
+    writer.put("greeting", b"\1\2" * 100)
+    writer.flush()
+
+    reader = PCMCache(disk_dir=tmp_path)
+    assert reader.get("greeting") == b"\1\2" * 100
+    assert reader.get("greeting") == b"\1\2" * 100
+    stats = reader.stats()
+    assert stats.disk_hits == 1
+    assert stats.memory_hits == 1
+
+
+def test_disk_tier_evicts_oldest(tmp_path) -> None:
+    cache = PCMCache(disk_dir=tmp_path, max_disk_bytes=250)
+    cache.put("a", b"\0" * 100)
+    cache.put("b", b"\0" * 100)
+    cache.put("c", b"\0" * 100)
+    cache.flush()
+
+    assert len(list(tmp_path.glob("*.pcm"))) == 2
+    assert cache.stats().disk_evictions == 1
+
+
+async def test_event_loop_lookups_read_disk_in_a_thread(tmp_path, monkeypatch) -> None:
+    writer = PCMCache(disk_dir=tmp_path)
+    writer.put("greeting", b"\1\2" * 100)
+    writer.flush()
+    reader = PCMCache(disk_dir=tmp_path)
+    threads: list[str] = []
+    read_disk = reader._read_disk
+
+    def _read_disk(key: str) -> bytes | None:
+        threads.append(threading.current_thread().name)
+        return read_disk(key)
+
+    monkeypatch.setattr(reader, "_read_disk", _read_disk)
+    assert await reader.aget("greeting") == b"\1\2" * 100
+    assert await reader.aget("greeting") == b"\1\2" * 100  # memory hit, no disk read
+    assert len(threads) == 1 and threads[0] != threading.main_thread().name
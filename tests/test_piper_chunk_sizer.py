@@ -0,0 +1,37 @@
+from piper_chunk_sizer import MIN_FIRST_CHARS, MIN_OBSERVATIONS, ChunkSizer, ChunkSizes
+
+DEFAULT = ChunkSizes(35, 60)
+AUDIO_PER_CHAR = 0.06
+
+
+def _sizer(overhead: float, per_char: float, n: int = 8) -> ChunkSizer:
+    sizer = ChunkSizer(first_max_chars=DEFAULT.first_max_chars, max_chars=DEFAULT.max_chars)
+    for i in range(n):
+        chars = 30 + 10 * (i % 4)
+        sizer.observe(chars, chars * AUDIO_PER_CHAR, overhead + per_char * chars)
+    return sizer
+
+
+def test_static_limits_until_enough_observations() -> None:
+    assert _sizer(0.02, 0.002, n=MIN_OBSERVATIONS - 1).sizes() == DEFAULT
+
+
+def test_fast_host_gets_small_first_chunk() -> None:
+    sizer = _sizer(overhead=0.01, per_char=0.001)
+    sizes = sizer.sizes()
+
+    assert sizes.first_max_chars == MIN_FIRST_CHARS
+    assert sizes.max_chars == DEFAULT.max_chars
+    metrics = sizer.metrics()
+    assert abs(metrics.seconds_per_char - 0.001) < 1e-6
+    assert abs(metrics.overhead_s - 0.01) < 1e-6
+
+
+def test_slow_or_loaded_host_gets_longer_chunks() -> None:
+    sizer = _sizer(overhead=0.4, per_char=0.035)
+    slow = sizer.sizes()
+    assert slow.max_chars > DEFAULT.max_chars  # amortise the per-call overhead
+
+    loaded = sizer.sizes(queue_depth=8, workers=4)
+    assert loaded.max_chars >= slow.max_chars
+    assert sizer.metrics().load == 3.0
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+from piper_executor import InferenceExecutor
+
+
+def test_first_chunks_jump_ahead_of_queued_tail_chunks() -> None:
+    executor = InferenceExecutor(1)
+    gate = threading.Event()
+    order: list[str] = []
+
+    blocker = executor.submit(gate.wait)
+    futures = [
+        executor.submit(order.append, "tail-a", priority=3),
+        executor.submit(order.append, "tail-b", priority=3),
+        executor.submit(order.append, "first", priority=0),
+    ]
+    gate.set()
+    for f in [blocker, *futures]:
+        f.result(timeout=5)
+
+    assert order == ["first", "tail-a", "tail-b"]
+    executor.shutdown()
+
+
+async def test_cancelled_work_is_dropped_from_the_queue() -> None:
+    executor = InferenceExecutor(1)
+    gate = threading.Event()
+    ran: list[int] = []
+
+    blocker = executor.submit(gate.wait)
+    while executor.busy_workers == 0:
+        await asyncio.sleep(0.001)
+    queued = executor.submit(ran.append, 1, priority=1)
+    assert executor.queue_depth == 1
+    assert queued.cancel()
+    assert executor.queue_depth == 0  # not counted while it waits to be skipped
+    gate.set()
+    blocker.result(timeout=5)
+    executor.shutdown()
+
+    assert ran == []
+    assert executor.stats()["completed"] == 1
+
+
+async def test_run_propagates_exceptions() -> None:
+    executor = InferenceExecutor(2)
+    with pytest.raises(ZeroDivisionError):
+        await executor.run(lambda: 1 / 0)
+    assert await executor.run(sum, [1, 2, 3]) == 6
+    executor.shutdown()
@@ -0,0 +1,50 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator
+
+from livekit import rtc
+
+from fake_piper_voice import FakePiperVoice
+from piper_fillers import FillerBank
+
+
+def _reply_frame() -> rtc.AudioFrame:
+    return rtc.AudioFrame(
+        b"\x07\x00" * 480, sample_rate=48000, num_channels=1, samples_per_channel=480
+    )
+
+
+async def _tts_node(text: AsyncIterable[str]) -> AsyncIterator[rtc.AudioFrame]:
+    async for _ in text:
+        yield _reply_frame()
+
+
+async def _llm(ttft: float, tokens: list[str]) -> AsyncIterator[str]:
+    await asyncio.sleep(ttft)
+    for token in tokens:
+        yield token
+
+
+async def _play(bank: FillerBank, ttft: float) -> list[rtc.AudioFrame]:
+    audio = bank.mask_latency(_llm(ttft, ["Grüezi", " mitenand."]), _tts_node, after_s=0.05)
+    return [frame async for frame in audio]
+
+
+def test_fillers_are_rendered_at_the_output_rate() -> None:
+    bank = FillerBank.render(FakePiperVoice(), ["Moment bitte.", "Jo, guet."], sample_rate=48000)
+
+    assert len(bank.clips) == 2
+    assert 1.0 < bank.audio_seconds < 2.0
+    frames = bank.frames()
+    assert {f.sample_rate for f in frames} == {48000}
+    assert all(f.samples_per_channel == 960 for f in frames[:-1])
+
+
+async def test_filler_plays_only_when_the_llm_is_slow() -> None:
+    bank = FillerBank([b"\x01\x00" * 4800], sample_rate=48000, frame_size_ms=20)
+
+    fast = await _play(bank, ttft=0.0)
+    slow = await _play(bank, ttft=0.2)
+
+    assert len(fast) == 2
+    assert len(slow) == 5 + 2  # the whole filler, then the reply
+    assert bytes(slow[-1].data) == bytes(_reply_frame().data)
@@ -0,0 +1,67 @@
+import pytest
+
+from fake_piper_voice import FakePiperVoice
+from piper_frontend import TextFrontend, normalize_german, synthesize_pcm
+
+
+@pytest.mark.parametrize(
+    ("text", "spoken"),
+    [
+        (
+            "Rufen Sie 044 123 45 67 an.",
+            "Rufen Sie null vier vier, eins zwei drei, vier fünf, sechs sieben an.",
+        ),
+        ("Termin am 12.03.2025.", "Termin am zwölften März zweitausendfünfundzwanzig."),
+        ("Wir öffnen um 14:30 Uhr.", "Wir öffnen um vierzehn Uhr dreissig."),
+        ("Das kostet CHF 12.50.", "Das kostet zwölf Franken fünfzig."),
+        ("Rund 1'500 Kunden, 20% mehr.", "Rund tausendfünfhundert Kunden, zwanzig Prozent mehr."),
+        ("Gegründet 1291.", "Gegründet zwölfhunderteinundneunzig."),
+        ("Grüezi mitenand.", "Grüezi mitenand."),
+        ("Das kostet CHF 5.10.", "Das kostet fünf Franken zehn."),
+        ("Kapitel 2.3.", "Kapitel zwei Punkt drei."),
+        ("Am Freitag, 2.3. offen.", "Am Freitag, zweiten März offen."),
+        ("Es sind 1.000 Leute", "Es sind tausend Leute"),
+        ("Zimmer 1234", "Zimmer tausendzweihundertvierunddreissig"),
+        ("Seit 1998 im Dorf.", "Seit neunzehnhundertachtundneunzig im Dorf."),
+        ("-5 Grad", "minus fünf Grad"),
+        ("Nur 3.5 Prozent", "Nur drei Komma fünf Prozent"),
+        ("Es sind 101000 Leute", "Es sind hunderteintausend Leute"),
+        ("Zimmer 201001", "Zimmer zweihunderteintausendeins"),
+        ("Praxis im 1. Stock.", "Praxis im ersten Stock."),
+        ("Das ist das 2. Mal.", "Das ist das zweite Mal."),
+        ("Öffnungszeiten: 8.00-12.00 Uhr", "Öffnungszeiten: acht bis zwölf Uhr"),
+        (
+            "Offen 10-12 Uhr und 13.30-17 Uhr",
+            "Offen zehn bis zwölf Uhr und dreizehn Uhr dreissig bis siebzehn Uhr",
+        ),
+        ("Das kostet 2,50 Franken.", "Das kostet zwei Franken fünfzig."),
+        ("Das kostet 100 Fr.", "Das kostet hundert Franken."),
+        ("Für 1 Person und 1 Termin", "Für eine Person und ein Termin"),
+        ("Es steht 1:0.", "Es steht eins zu null."),
+    ],
+)
+def test_normalize_german_makes_numbers_speakable(text: str, spoken: str) -> None:
+    assert normalize_german(text) == spoken
+
+
+def test_phoneme_cache_hits_repeated_sentences_and_evicts_oldest() -> None:
+    voice = FakePiperVoice()
+    frontend = TextFrontend(voice, cache_size=2)
+
+    first = frontend.phoneme_ids("Grüezi. Wie gahts?")
+    assert frontend.phoneme_ids("Grüezi.") == first[:1]
+    assert (frontend.hits, frontend.misses) == (1, 2)
+
+    frontend.phoneme_ids("Uf Widerluege.")  # evicts "Wie gahts?"
+    frontend.phoneme_ids("Wie gahts?")
+    assert (frontend.hits, frontend.misses) == (1, 4)
+
+
+def test_synthesize_pcm_matches_piper_synthesize() -> None:
+    text = "Grüezi mitenand. Wie chan ich Ihne hälfe?"
+    expected = [c.audio_int16_array.tobytes() for c in FakePiperVoice().synthesize(text)]
+
+    voice = FakePiperVoice()
+    assert synthesize_pcm(voice, text) == expected
+    assert synthesize_pcm(voice, text) == expected  # second time from the cache
+    assert voice.texts == []  # ONNX only; never through voice.synthesize
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from fake_piper_voice import FakePiperVoice
+from piper_optimize import audio_difference, compare
+from piper_tts_plugin import PiperTTS
+from piper_voices import VoiceOptions, variant_path
+
+
+class _NoisyVoice(FakePiperVoice):
+    """Stands in for a quantised model: same utterance, slightly perturbed."""
+
+    def phoneme_ids_to_audio(self, phoneme_ids, syn_config=None):
+        audio = super().phoneme_ids_to_audio(phoneme_ids, syn_config)
+        return audio + np.random.default_rng(0).normal(0, 0.003, audio.shape)
+
+
+def test_variants_live_next_to_the_model() -> None:
+    assert str(variant_path("/m/de_DE-thorsten-medium.onnx", "int8")).endswith(
+        "/m/de_DE-thorsten-medium.int8.onnx"
+    )
+    assert str(variant_path("/m/voice.onnx", "fp32")) == "/m/voice.onnx"
+    with pytest.raises(ValueError):
+        variant_path("/m/voice.onnx", "fp16")
+
+    fp32 = PiperTTS(model_path="voice.onnx")
+    int8 = PiperTTS(model_path="voice.onnx", voice_options=VoiceOptions(precision="int8"))
+    assert fp32._cache_key("Hallo") != int8._cache_key("Hallo")
+
+
+def test_report_compares_each_precision_with_the_float_model() -> None:
+    voices = {"fp32": FakePiperVoice(), "int8": _NoisyVoice()}
+
+    rows = compare(
+        "voice.onnx",
+        ["fp32", "int8"],
+        ["Grüezi mitenand.", "Wie chan ich hälfe?"],
+        loader=lambda path, options: voices[options.precision],
+    )
+
+    assert [r["precision"] for r in rows] == ["fp32", "int8"]
+    assert rows[1]["duration_delta_pct"] == 0.0
+    assert 20 < rows[1]["snr_db"] < 60
+    assert rows[1]["speedup"] > 0
+    assert audio_difference(np.ones(10), np.ones(10))["snr_db"] == float("inf")
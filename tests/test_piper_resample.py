@@ -0,0 +1,36 @@
+import numpy as np
+
+from piper_resample import PolyphaseResampler
+
+
+def _tone(rate: int, seconds: float, freq: float = 440.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (10000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def test_chunked_resampling_matches_one_shot() -> None:
+    x = _tone(22050, 0.5)
+    one_shot = PolyphaseResampler(22050, 48000)
+    whole = one_shot.push(x.tobytes()) + one_shot.flush()
+
+    chunked = PolyphaseResampler(22050, 48000)
+    parts = [chunked.push(x[i : i + 777].tobytes()) for i in range(0, len(x), 777)]
+    parts.append(chunked.flush())
+
+    assert b"".join(parts) == whole  # no discontinuity at chunk boundaries
+    assert len(whole) // 2 == 24000
+
+
+def test_resampled_tone_stays_aligned() -> None:
+    resampler = PolyphaseResampler(22050, 48000)
+    y = np.frombuffer(resampler.push(_tone(22050, 0.2).tobytes()) + resampler.flush(), np.int16)
+    expected = _tone(48000, 0.2).astype(np.float64)
+
+    assert np.abs(y[50:-50] - expected[50:-50]).max() < 50
+
+
+def test_same_rate_is_passthrough() -> None:
+    resampler = PolyphaseResampler(22050, 22050)
+    pcm = _tone(22050, 0.01).tobytes()
+    assert resampler.push(pcm) is pcm
+    assert resampler.flush() == b""
@@ -0,0 +1,134 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fake_piper_voice import FakePiperVoice
+from piper_executor import InferenceExecutor
+from piper_server import PiperServerClient, PiperTTSServer, TTSServerError
+from piper_tts_plugin import PiperTTS
+
+TEXT = "Grüezi mitenand. Wie chan ich Ihne hälfe?"
+
+
+def _expected(text: str) -> list[bytes]:
+    voice = FakePiperVoice(audio_per_char=0.01)
+    return [c.audio_int16_array.tobytes() for c in voice.synthesize(text)]
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are limited to ~100 chars, pytest's tmp_path can be longer
+    with tempfile.TemporaryDirectory(prefix="piper-") as d:
+        yield str(Path(d) / "tts.sock")
+
+
+@pytest.fixture
+async def server(socket_path):
+    server = PiperTTSServer(
+        FakePiperVoice(audio_per_char=0.01),
+        socket_path,
+        executor=InferenceExecutor(2),
+        ring_bytes=8192,  # smaller than one sentence: exercises wrap-around and acks
+    )
+    await server.start()
+    yield server
+    await server.aclose()
+
+
+async def test_client_receives_audio_through_shared_memory(server, socket_path) -> None:
+    client = PiperServerClient(socket_path)
+    await client.connect()
+
+    async def _collect(text: str) -> list[bytes]:
+        return [pcm async for pcm in client.synthesize(text, {})]
+
+    results = await asyncio.gather(_collect(TEXT), _collect("Uf Widerluege."))
+    await client.aclose()
+
+    assert b"".join(results[0]) == b"".join(_expected(TEXT))
+    assert b"".join(results[1]) == b"".join(_expected("Uf Widerluege."))
+
+
+async def test_server_errors_are_raised_on_the_client(socket_path) -> None:
+    class _BrokenVoice(FakePiperVoice):
+        def synthesize(self, text, syn_config=None):
+            raise ValueError("boom")
+
+    server = PiperTTSServer(_BrokenVoice(), socket_path, executor=InferenceExecutor(1))
+    await server.start()
+    client = PiperServerClient(socket_path)
+    await client.connect()
+    with pytest.raises(TTSServerError, match="boom"):
+        [pcm async for pcm in client.synthesize(TEXT, {})]
+    await client.aclose()
+    await server.aclose()
+
+
+async def test_tts_synthesizes_on_the_server(server, socket_path) -> None:
+    tts = PiperTTS(model_path="fake.onnx", server_socket=socket_path)
+    local = FakePiperVoice(audio_per_char=0.01)
+    tts._voice = local
+
+    frames = [ev.frame async for ev in tts.synthesize(TEXT)]
+    await tts.aclose()
+
+    audio = b"".join(bytes(f.data) for f in frames)
+    expected = b"".join(_expected(TEXT))
+    assert audio[: len(expected)] == expected
+    assert local.texts == []  # nothing ran in-process
+
+
+@pytest.mark.parametrize(("language", "frontend"), [("de", True), ("en", False)])
+async def test_server_gets_the_frontend_only_for_its_languages(
+    server, socket_path, monkeypatch, language: str, frontend: bool
+) -> None:
+    sent: list[bool] = []
+    synthesize = PiperServerClient.synthesize
+
+    def _synthesize(self, text, params, **kwargs):
+        sent.append(kwargs["text_frontend"])
+        return synthesize(self, text, params, **kwargs)
+
+    monkeypatch.setattr(PiperServerClient, "synthesize", _synthesize)
+    tts = PiperTTS(
+        model_path="fake.onnx", server_socket=socket_path, text_frontend=True, language=language
+    )
+    tts._voice = FakePiperVoice(audio_per_char=0.01)
+
+    _ = [ev async for ev in tts.synthesize("Am 2.3. um 14:30 Uhr.")]
+    await tts.aclose()
+
+    assert sent and set(sent) == {frontend}
+
+
+async def test_tts_runs_in_process_when_the_server_audio_format_differs(socket_path) -> None:
+    server = PiperTTSServer(
+        FakePiperVoice(audio_per_char=0.01, sample_rate=16000),
+        socket_path,
+        executor=InferenceExecutor(1),
+    )
+    await server.start()
+    tts = PiperTTS(model_path="fake.onnx", server_socket=socket_path)
+    local = FakePiperVoice(audio_per_char=0.01)
+    tts._voice = local
+
+    frames = [ev.frame async for ev in tts.synthesize(TEXT)]
+    await tts.aclose()
+    await server.aclose()
+
+    assert frames
+    assert " ".join(local.texts) == TEXT
+
+
+async def test_tts_falls_back_to_in_process_without_server(socket_path) -> None:
+    tts = PiperTTS(model_path="fake.onnx", server_socket=socket_path)
+    local = FakePiperVoice(audio_per_char=0.01)
+    tts._voice = local
+
+    frames = [ev.frame async for ev in tts.synthesize(TEXT)]
+    await tts.aclose()
+
+    assert frames
+    assert " ".join(local.texts) == TEXT
@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import threading
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+import piper_tts_plugin
+from fake_piper_voice import FakePiperVoice
+from piper_executor import InferenceExecutor
+from piper_tts_plugin import (
+    FIRST_CHUNK_MAX_CHARS,
+    MAX_CHUNK_CHARS,
+    PiperTTS,
+    _chunk_text_for_tts,
+    _IncrementalChunker,
+)
+from piper_voices import VoiceRegistry
+
+REPLY = (
+    "Grüezi mitenand, do isch de digitali Assistent vo de Praxis Müller. "
+    "Mir händ hüt bis am sächsi offe, und morn am Morge ab achti. "
+    "Söll ich Ihne en Rückruef organisiere?"
+)
+
+
+def _fake_tts() -> tuple[PiperTTS, FakePiperVoice]:
+    voice = FakePiperVoice(audio_per_char=0.01)
+    tts = PiperTTS(model_path="fake.onnx")
+    tts._voice = voice
+    return tts, voice
+
+
+def _tokens(text: str, size: int = 3) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_chunking_keeps_first_chunk_small() -> None:
+    chunks = _chunk_text_for_tts(REPLY)
+    assert len(chunks[0]) <= FIRST_CHUNK_MAX_CHARS
+    assert all(len(c) <= MAX_CHUNK_CHARS for c in chunks)
+    assert " ".join(chunks).split() == REPLY.split()
+
+
+def test_incremental_chunker_emits_before_end_of_input() -> None:
+    chunker = _IncrementalChunker()
+    emitted: list[list[str]] = [chunker.push(tok) for tok in _tokens(REPLY)]
+    chunks = [c for batch in emitted for c in batch] + chunker.flush()
+
+    first_emit = next(i for i, batch in enumerate(emitted) if batch)
+    assert first_emit * 3 < 60  # first chunk is ready long before the reply is complete
+    assert len(chunks[0]) <= FIRST_CHUNK_MAX_CHARS
+    assert all(len(c) <= MAX_CHUNK_CHARS for c in chunks)
+    assert " ".join(chunks).split() == REPLY.split()
+
+
+def test_incremental_chunker_cuts_short_sentences() -> None:
+    chunker = _IncrementalChunker()
+    assert chunker.push("Hallo! ") == ["Hallo!"]
+    assert chunker.push("Wie kann ich Ihnen helfen?") == []
+    assert chunker.flush() == ["Wie kann ich Ihnen helfen?"]
+
+
+def test_incremental_chunker_starts_every_segment_small() -> None:
+    chunker = _IncrementalChunker()
+    segments = []
+    for _ in range(2):
+        chunks = [c for tok in _tokens(REPLY) for c in chunker.push(tok)] + chunker.flush()
+        segments.append(chunks)
+
+    assert segments[0] == segments[1]
+    assert len(segments[1][0]) <= FIRST_CHUNK_MAX_CHARS
+
+
+class _RecordingEmitter:
+    def __init__(self) -> None:
+        self.pcm = b""
+
+    def push(self, data: bytes) -> None:
+        self.pcm += data
+
+    def flush(self) -> None:
+        pass
+
+
+async def test_priorities_restart_at_every_segment(monkeypatch) -> None:
+    tts, _voice = _fake_tts()
+    started: list[tuple[str, int]] = []
+    start = piper_tts_plugin._ChunkSynthesis.start
+
+    def _start(job) -> None:
+        started.append((job.text, job.priority))
+        start(job)
+
+    monkeypatch.setattr(piper_tts_plugin._ChunkSynthesis, "start", _start)
+    chunks = _chunk_text_for_tts(REPLY)
+
+    async def _segments():
+        for _ in range(2):
+            for chunk in chunks:
+                yield chunk
+            yield object()  # flush sentinel
+
+    await tts._synthesize_ordered(_segments(), _RecordingEmitter())
+
+    expected = [(chunk, i) for i, chunk in enumerate(chunks)]
+    assert started == expected + expected
+
+
+async def test_stream_synthesizes_pushed_tokens() -> None:
+    tts, voice = _fake_tts()
+    stream = tts.stream()
+    for tok in _tokens(REPLY):
+        stream.push_text(tok)
+    stream.end_input()
+
+    frames = [ev.frame async for ev in stream]
+    await stream.aclose()
+
+    duration = sum(f.duration for f in frames)
+    assert duration == pytest.approx(0.01 * sum(len(t) for t in voice.texts), abs=0.05)
+    assert " ".join(voice.texts).split() == REPLY.split()
+    assert len(voice.texts[0]) <= FIRST_CHUNK_MAX_CHARS
+
+
+async def test_chunked_stream_matches_chunking() -> None:
+    tts, voice = _fake_tts()
+    await tts.synthesize(REPLY).collect()
+    assert voice.texts == _chunk_text_for_tts(REPLY)
+
+
+async def test_chunk_audio_is_yielded_per_sentence() -> None:
+    tts = PiperTTS(model_path="fake.onnx")
+    tts._voice = FakePiperVoice(audio_per_char=0.01, seconds_per_char=0.002)
+
+    parts = [pcm async for pcm in tts._synthesize_chunk("Ja. Das ist ein etwas längerer Satz.")]
+    assert len(parts) == 2
+    assert len(parts[0]) < len(parts[1])
+
+
+class _ConcurrencyProbeVoice(FakePiperVoice):
+    def __init__(self) -> None:
+        super().__init__(audio_per_char=0.01, seconds_per_char=0.001)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def synthesize(self, text, syn_config=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            yield from super().synthesize(text, syn_config)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.mark.parametrize("lookahead", [0, 2])
+async def test_lookahead_overlaps_chunks_and_keeps_order(lookahead: int) -> None:
+    voice = _ConcurrencyProbeVoice()
+    tts = PiperTTS(model_path="fake.onnx", lookahead=lookahead, executor=InferenceExecutor(4))
+    tts._voice = voice
+
+    frame = await tts.synthesize(REPLY).collect()
+
+    expected = b"".join(
+        c.audio_int16_array.tobytes()
+        for chunk in _chunk_text_for_tts(REPLY)
+        for c in FakePiperVoice(audio_per_char=0.01).synthesize(chunk)
+    )
+    assert bytes(frame.data)[: len(expected)] == expected  # emitter pads the last frame
+    assert voice.max_active == (1 if lookahead == 0 else lookahead + 1)
+
+
+async def test_output_is_resampled_to_the_target_rate() -> None:
+    tts = PiperTTS(model_path="fake.onnx", sample_rate=48000, frame_size_ms=20)
+    tts._voice = FakePiperVoice(audio_per_char=0.01)
+
+    frames = [ev.frame async for ev in tts.synthesize(REPLY)]
+
+    assert {f.sample_rate for f in frames} == {48000}
+    source = sum(
+        len(c.audio_int16_array)
+        for chunk in _chunk_text_for_tts(REPLY)
+        for c in FakePiperVoice(audio_per_char=0.01).synthesize(chunk)
+    )
+    total = sum(f.samples_per_channel for f in frames)
+    assert abs(total - source * 48000 / 22050) < 960  # emitter pads the last 20 ms frame
+
+
+class _GatedVoice(FakePiperVoice):
+    """Waits for `gate` before synthesizing each sentence after the first."""
+
+    def __init__(self) -> None:
+        super().__init__(audio_per_char=0.01)
+        self.gate = threading.Event()
+        self.sentences = 0
+
+    def synthesize(self, text, syn_config=None):
+        inner = super().synthesize(text, syn_config)
+        for i in itertools.count():
+            if i:
+                self.gate.wait(5)
+            chunk = next(inner, None)
+            if chunk is None:
+                return
+            self.sentences += 1
+            yield chunk
+
+
+def _cancelled_chunks(stage: str) -> float:
+    value = REGISTRY.get_sample_value("voice_agent_tts_cancelled_chunks_total", {"stage": stage})
+    return value or 0.0
+
+
+async def test_cancelled_chunk_stops_at_the_next_sentence() -> None:
+    voice = _GatedVoice()
+    executor = InferenceExecutor(1)
+    tts = PiperTTS(model_path="fake.onnx", executor=executor)
+    tts._voice = voice
+    before = _cancelled_chunks("running")
+
+    audio = tts._synthesize_chunk("Ja. Nei. Guet. Merci.")
+    await audio.__anext__()  # first sentence played
+    await audio.aclose()  # barge-in
+    voice.gate.set()
+    await asyncio.to_thread(executor.shutdown)  # worker finished
+
+    assert voice.sentences <= 2  # at most the one in progress, never the remaining ones
+    assert _cancelled_chunks("running") == before + 1
+
+
+async def test_cancelled_stream_drops_queued_chunks() -> None:
+    voice = FakePiperVoice(audio_per_char=0.01)
+    executor = InferenceExecutor(1)
+    tts = PiperTTS(model_path="fake.onnx", executor=executor, lookahead=2)
+    tts._voice = voice
+    gate = threading.Event()
+    executor.submit(gate.wait)  # another session's inference holds the worker
+    before = _cancelled_chunks("queued")
+
+    stream = tts.synthesize(REPLY)
+    consume = asyncio.create_task(stream.collect())
+    while executor.queue_depth < 3:
+        await asyncio.sleep(0.01)
+    await stream.aclose()
+    consume.cancel()
+
+    assert executor.queue_depth == 0
+    assert _cancelled_chunks("queued") == before + 3
+    gate.set()
+    await asyncio.to_thread(executor.shutdown)
+    assert voice.texts == []
+
+
+async def test_each_reply_is_spoken_by_the_voice_of_its_language() -> None:
+    voices = {"de.onnx": FakePiperVoice(audio_per_char=0.01), "en.onnx": FakePiperVoice()}
+    registry = VoiceRegistry(loader=lambda path, options: voices[Path(path).name])
+    tts = PiperTTS(model_path="de.onnx", voices={"en": "en.onnx"}, registry=registry)
+
+    async for _ in tts.synthesize("Grüezi, wie chan ich Ihne hälfe?"):
+        pass
+    async for _ in tts.synthesize("Hello, how can I help you today?"):
+        pass
+    await tts.aclose()
+
+    assert voices["de.onnx"].texts == ["Grüezi, wie chan ich Ihne hälfe?"]
+    assert voices["en.onnx"].texts == ["Hello, how can I help you today?"]
+    assert all(s["refs"] == 0 for s in registry.stats())  # idle voices can be evicted
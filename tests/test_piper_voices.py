@@ -0,0 +1,101 @@
+import threading
+import time
+
+from fake_piper_voice import FakePiperVoice
+from piper_tts_plugin import PiperTTS
+from piper_voices import VoiceOptions, VoiceRegistry, warm_up_voice
+
+
+class _CountingLoader:
+    def __init__(self) -> None:
+        self.loads: list[tuple[str, VoiceOptions]] = []
+
+    def __call__(self, model_path: str, options: VoiceOptions) -> FakePiperVoice:
+        time.sleep(0.02)  # widen the race window
+        self.loads.append((model_path, options))
+        return FakePiperVoice()
+
+
+def test_concurrent_acquire_loads_once() -> None:
+    loader = _CountingLoader()
+    registry = VoiceRegistry(loader=loader)
+    voices: list[object] = []
+
+    threads = [
+        threading.Thread(target=lambda: voices.append(registry.acquire("voice.onnx")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loader.loads) == 1
+    assert len({id(v) for v in voices}) == 1
+    assert registry.stats()[0]["refs"] == 8
+
+
+def test_options_are_part_of_the_key() -> None:
+    loader = _CountingLoader()
+    registry = VoiceRegistry(loader=loader)
+    assert registry.acquire("voice.onnx") is not registry.acquire(
+        "voice.onnx", VoiceOptions(use_cuda=True)
+    )
+    assert len(loader.loads) == 2
+
+
+def test_preloaded_voice_survives_unload_unused() -> None:
+    registry = VoiceRegistry(loader=_CountingLoader())
+    pinned = registry.preload("pinned.onnx")
+    registry.acquire("session.onnx")
+    registry.release("session.onnx")
+
+    assert registry.unload_unused() == 1
+    assert registry.acquire("pinned.onnx") is pinned
+
+
+async def test_sessions_share_the_prewarmed_voice() -> None:
+    loader = _CountingLoader()
+    registry = VoiceRegistry(loader=loader)
+    prewarmed = registry.preload("voice.onnx")
+
+    sessions = [PiperTTS(model_path="voice.onnx", registry=registry) for _ in range(3)]
+    for tts in sessions:
+        await tts.synthesize("Hallo!").collect()
+        assert tts._voice is prewarmed
+    assert len(loader.loads) == 1
+    assert registry.stats()[0]["refs"] == 3
+
+    for tts in sessions:
+        await tts.aclose()
+    assert registry.stats()[0]["refs"] == 0
+
+
+def test_warm_up_runs_every_text_each_pass() -> None:
+    voice = FakePiperVoice()
+
+    durations = warm_up_voice(voice, ["Grüezi.", "Wie chan ich hälfe?"], passes=2)
+
+    assert len(durations) == 2
+    assert voice.texts == ["Grüezi.", "Wie chan ich hälfe?"] * 2
+
+
+def test_rss_budget_unloads_least_recently_used_idle_voices() -> None:
+    rss = [500]
+
+    def _loader(model_path: str, options: VoiceOptions) -> FakePiperVoice:
+        rss[0] += 100  # each voice grows the process by 100
+        return FakePiperVoice()
+
+    registry = VoiceRegistry(loader=_loader, max_rss_bytes=700, rss=lambda: rss[0])
+    for path in ("de.onnx", "en.onnx"):
+        registry.acquire(path)
+        registry.release(path)
+    registry.acquire("en.onnx")  # in use, and now the most recently used
+    registry.acquire("fr.onnx")  # 800 > 700: "de" is the only idle voice
+
+    loaded = {s["model_path"].rsplit("/", 1)[-1] for s in registry.stats()}
+    assert loaded == {"en.onnx", "fr.onnx"}
+    assert registry.evictions == 1
+    registry.acquire("it.onnx")  # nothing idle left: over budget, but nothing in use goes
+    assert registry.evictions == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from replay_turn_taking import (
+    ReplayOptions,
+    Settings,
+    Utterance,
+    analyze,
+    grid,
+    simulate,
+    speech_segments,
+    summarize,
+)
+
+WINDOW_S = 0.032
+
+
+def _probs(*spans: tuple[float, float]) -> list[float]:
+    """Speech probability per VAD window for (seconds, probability) spans."""
+    return [p for seconds, p in spans for _ in range(round(seconds / WINDOW_S))]
+
+
+def test_short_pauses_stay_inside_a_speech_segment() -> None:
+    probs = _probs((0.32, 0.05), (0.96, 0.9), (0.32, 0.05), (0.96, 0.9), (0.96, 0.05))
+
+    segments = speech_segments(probs, WINDOW_S, min_silence_s=0.55)
+
+    assert len(segments) == 1
+    start, end = segments[0]
+    assert start == pytest.approx(0.32) and end == pytest.approx(2.56)
+
+
+def _call(eou_calls: list[str]):
+    utterances = [
+        Utterance(0.0, 2.0, "Ich hätte gern einen Termin am Donnerstag"),
+        Utterance(6.5, 7.5, "Danke, tschüss"),
+    ]
+    speech = [(0.0, 0.9), (1.6, 2.0), (3.5, 4.2), (6.5, 7.5)]  # a pause mid-turn, a cough
+
+    def _eou(messages) -> float:
+        eou_calls.append(messages[-1]["content"])
+        return 0.9 if messages[-1]["content"].endswith(("Donnerstag", "tschüss")) else 0.01
+
+    return analyze("call.wav", utterances, speech, _eou, threshold=0.1)
+
+
+def test_low_end_of_turn_probability_waits_out_the_pause() -> None:
+    eou_calls: list[str] = []
+    rec = _call(eou_calls)
+    patient, eager = grid([0.25], [0.5, 1.5], [0.5], [2.0])[::-1]
+
+    assert eou_calls[0].startswith("Ich hätte") and not eou_calls[0].endswith("Donnerstag")
+    assert rec.segments[2].eou_probability is None  # the cough has no transcript
+
+    out = simulate(rec, patient, ReplayOptions())
+    assert out.false_endpoints == 0
+    assert out.latencies[0] == pytest.approx(0.55)  # VAD end of speech, then min delay passed
+
+    assert simulate(rec, eager, ReplayOptions()).false_endpoints == 1
+
+
+def test_cough_during_the_reply_is_a_false_interruption_that_resumes() -> None:
+    rec = _call([])
+    opts = ReplayOptions(response_s=0.8, reply_s=3.0)  # reply 3.35 .. 6.35
+
+    out = simulate(rec, Settings(0.25, 1.5, 0.5, 2.0), opts)
+    assert (out.false_interruptions, out.resumed) == (1, 1)
+    assert out.paused_s == pytest.approx(4.2 + 2.0 - 4.0)
+    assert out.interruptions == 1  # the resumed reply now runs into the caller's next turn
+
+    out = simulate(rec, Settings(0.25, 1.5, 0.8, 2.0), opts)
+    assert out.false_interruptions == 0
+
+    row = summarize(Settings(0.25, 1.5, 0.8, 2.0), [out])
+    assert row["turns"] == 2 and row["eot_p50_ms"] == pytest.approx(550)
@@ -0,0 +1,22 @@
+from livekit.plugins import silero
+
+from startup_profile import StartupProfiler, warm_up_vad
+
+
+def test_report_breaks_startup_down_by_stage() -> None:
+    profiler = StartupProfiler()
+    profiler.record("import livekit.agents", 1.5)
+    profiler.record("load piper voice", 0.5)
+    with profiler.stage("warm-up piper"):
+        pass
+    profiler.record("load piper voice", 0.5)
+
+    assert list(profiler.stages) == ["import livekit.agents", "load piper voice", "warm-up piper"]
+    assert profiler.stages["load piper voice"] == 1.0
+    report = profiler.report().splitlines()
+    assert report[0].startswith("Startup 2.50s")
+    assert "60%" in report[1]
+
+
+def test_vad_warm_up_runs_the_silero_session() -> None:
+    warm_up_vad(silero.VAD.load(), passes=2)
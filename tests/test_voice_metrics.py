@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+from livekit.agents import metrics, utils
+from livekit.agents.voice.events import (
+    AgentStateChangedEvent,
+    MetricsCollectedEvent,
+    UserStateChangedEvent,
+)
+from prometheus_client import REGISTRY
+
+from voice_metrics import JsonlSink, SessionMetrics
+
+
+class _FakeSession(utils.EventEmitter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.current_speech = SimpleNamespace(id="speech-1")
+
+
+def _stage_count(stage: str) -> float:
+    value = REGISTRY.get_sample_value("voice_agent_turn_stage_seconds_count", {"stage": stage})
+    return value or 0.0
+
+
+def test_turn_stages_are_recorded_and_written(tmp_path) -> None:
+    sink = JsonlSink(tmp_path)
+    session = _FakeSession()
+    collector = SessionMetrics(session, sink=sink, room="room-a")  # type: ignore[arg-type]
+    collector.attach()
+    before = _stage_count("response")
+
+    session.emit(
+        "user_state_changed",
+        UserStateChangedEvent(old_state="speaking", new_state="listening", created_at=100.0),
+    )
+    eou = metrics.EOUMetrics(
+        timestamp=100.3,
+        end_of_utterance_delay=0.3,
+        transcription_delay=0.2,
+        on_user_turn_completed_delay=0.0,
+        speech_id="speech-1",
+    )
+    session.emit("metrics_collected", MetricsCollectedEvent(metrics=eou))
+    llm_metrics = metrics.LLMMetrics(
+        label="groq",
+        request_id="req-1",
+        timestamp=100.6,
+        duration=0.5,
+        ttft=0.25,
+        cancelled=False,
+        completion_tokens=20,
+        prompt_tokens=812,
+        prompt_cached_tokens=0,
+        total_tokens=832,
+        tokens_per_second=40.0,
+        speech_id="speech-1",
+    )
+    session.emit("metrics_collected", MetricsCollectedEvent(metrics=llm_metrics))
+    session.emit(
+        "agent_state_changed",
+        AgentStateChangedEvent(old_state="thinking", new_state="speaking", created_at=101.2),
+    )
+    collector.flush()
+    sink.close()
+
+    assert _stage_count("response") == before + 1
+    (record,) = [json.loads(line) for line in sink.path.read_text().splitlines()]
+    assert record["room"] == "room-a"
+    assert record["speech_id"] == "speech-1"
+    assert record["eou"] == 0.3 and record["stt"] == 0.2
+    assert record["llm_ttft"] == 0.25 and record["prompt_tokens"] == 812
+    assert abs(record["response"] - 1.2) < 1e-6
+
+
+def test_jsonl_sink_rotates(tmp_path) -> None:
+    sink = JsonlSink(tmp_path, name="rot", max_bytes=200, backups=2)
+    for i in range(50):
+        sink.write({"i": i, "pad": "x" * 20})
+    sink.close()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) == 3  # current file + 2 backups
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, multiprocess
+
+from piper_executor import InferenceExecutor
+from worker_load import (
+    MAX_BACKLOG_PER_WORKER,
+    RTF_LIMIT,
+    LoadReporter,
+    LoadStatus,
+    WorkerLoad,
+    combine,
+    read_statuses,
+)
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def _status(**kw) -> LoadStatus:
+    fields = {"pid": os.getpid(), "ts": time.time(), "queued": 0, "busy": 0, "workers": 2}
+    return LoadStatus(**{**fields, "rtf": None, **kw})
+
+
+def test_load_is_the_most_saturated_component() -> None:
+    idle = combine(0.2, [_status()])
+    assert idle.load == 0.2
+
+    backlogged = combine(0.2, [_status(queued=2), _status(queued=4, workers=2)])
+    assert backlogged.queue == 6 / 4 / MAX_BACKLOG_PER_WORKER
+    assert backlogged.load == backlogged.queue
+
+    slow = combine(0.2, [_status(rtf=RTF_LIMIT * 2)])
+    assert slow.rtf == 1.0
+
+
+def test_reporter_status_reaches_worker_load(tmp_path) -> None:
+    executor = InferenceExecutor(1)
+    reporter = LoadReporter(tmp_path, executor).start()
+    load = WorkerLoad(tmp_path, cpu_percent=lambda: 0.1)
+
+    assert [s.pid for s in read_statuses(tmp_path)] == [os.getpid()]
+    assert load() == 0.1
+
+    reporter.close()
+    executor.shutdown()
+    assert read_statuses(tmp_path) == []
+
+
+def test_stale_and_dead_process_statuses_are_ignored(tmp_path) -> None:
+    (tmp_path / "1.json").write_text(json.dumps(vars(_status(ts=time.time() - 60, queued=9))))
+    dead = _status(pid=2**22 + 1, queued=9)  # above Linux's pid_max default
+    (tmp_path / "dead.json").write_text(json.dumps(vars(dead)))
+
+    assert read_statuses(tmp_path) == []
+    assert not (tmp_path / "dead.json").exists()
+
+
+def test_load_gauge_is_published_in_multiprocess_mode(tmp_path) -> None:
+    prom_dir = tmp_path / "prometheus"
+    prom_dir.mkdir()
+    # a fresh interpreter: the directory is set before prometheus_client is imported
+    script = (
+        "from worker_load import WorkerLoad; "
+        f"WorkerLoad({str(tmp_path / 'load')!r}, cpu_percent=lambda: 0.3)()"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(prom_dir)}
+    subprocess.run([sys.executable, "-c", script], env=env, check=True, cwd=SRC)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, str(prom_dir))
+    assert registry.get_sample_value("voice_agent_worker_load", {"component": "cpu"}) == 0.3